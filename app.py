@@ -1,12 +1,34 @@
 # ============================================
 # CONFIGURATION VARIABLES
 # ============================================
-from openai import AzureOpenAI
+from openai import AzureOpenAI, AsyncAzureOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient, APIConnectionError
 from datetime import datetime
 import os
 import json
+import time
+import itertools
+import logging
+from functools import lru_cache
+import httpx
+from typing import Callable, Optional, Tuple
 import streamlit as st
 
+from audio_utils import AUDIO_PRELOAD, get_model_readiness, start_model_preload
+from metrics import get_metrics, start_metrics_server
+from resilient_call import CircuitBreaker, LLMCallError, ResilientCaller, default_retryable
+from response_cache import ResponseCache, history_digest, make_response_key
+from score_lookup import ScoreIndex
+
+# Tokenizer import (optional, used only for prompt-token estimates)
+try:
+    import tiktoken
+    TOKENIZER_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TOKENIZER_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
 # Azure OpenAI API configuration
 # Get API key from environment variable (can be overridden in main() from Streamlit secrets)
 AZURE_API_KEY = os.getenv("AZURE_API_KEY", "")
@@ -15,6 +37,57 @@ AZURE_ENDPOINT = "https://german-west-cenral.openai.azure.com"
 MODEL = "gpt-4o"
 TEMPERATURE = 0.2
 
+# HTTP connection pool for the shared Azure OpenAI client (override via environment)
+AZURE_MAX_CONNECTIONS = int(os.getenv("AZURE_MAX_CONNECTIONS", "100"))
+AZURE_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("AZURE_MAX_KEEPALIVE_CONNECTIONS", "20"))
+AZURE_KEEPALIVE_EXPIRY = float(os.getenv("AZURE_KEEPALIVE_EXPIRY", "120"))
+AZURE_CONNECT_TIMEOUT = float(os.getenv("AZURE_CONNECT_TIMEOUT", "5"))
+AZURE_READ_TIMEOUT = float(os.getenv("AZURE_READ_TIMEOUT", "60"))
+
+# Resilient call layer (see get_llm_caller). An attempt lasts until the first
+# streamed token; hedging sends a duplicate request after the p95 of that time.
+AZURE_ATTEMPT_TIMEOUT = float(os.getenv("AZURE_ATTEMPT_TIMEOUT", "20"))
+AZURE_TOTAL_TIMEOUT = float(os.getenv("AZURE_TOTAL_TIMEOUT", "45"))
+AZURE_MAX_ATTEMPTS = int(os.getenv("AZURE_MAX_ATTEMPTS", "3"))
+AZURE_BACKOFF_BASE = float(os.getenv("AZURE_BACKOFF_BASE", "0.25"))
+AZURE_HEDGE = os.getenv("AZURE_HEDGE", "0") == "1"
+AZURE_BREAKER_FAILURES = int(os.getenv("AZURE_BREAKER_FAILURES", "5"))
+AZURE_BREAKER_RESET = float(os.getenv("AZURE_BREAKER_RESET", "30"))
+
+# Minimum seconds between chat UI redraws while a reply is streaming
+STREAM_RENDER_INTERVAL = 0.05
+
+# Prompt token budget per API call (system prompt + summary + recent history).
+# When exceeded, the oldest turns are folded into a running summary until the
+# prompt is back under HISTORY_LOW_WATER * budget. Set to 0 to send everything.
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "8000"))
+HISTORY_LOW_WATER = float(os.getenv("HISTORY_LOW_WATER", "0.75"))
+HISTORY_MIN_RECENT_MESSAGES = int(os.getenv("HISTORY_MIN_RECENT_MESSAGES", "6"))
+HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "400"))
+
+# Reply cache keyed by QA scores + normalized user message + conversation history.
+# Off by default; enable per deployment with RESPONSE_CACHE=1 (set RESPONSE_CACHE_DIR to persist).
+# The whole history is keyed by default: the system prompt picks the next category
+# and applies the No-Repeat rule from all earlier turns, not just the last ones.
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "0") == "1"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 3600)))
+RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR") or None
+RESPONSE_CACHE_HISTORY_MESSAGES = (
+    int(os.getenv("RESPONSE_CACHE_HISTORY_MESSAGES")) if os.getenv("RESPONSE_CACHE_HISTORY_MESSAGES") else None)
+
+# Answer unambiguous score/feedback lookups from qa_scores_json without the LLM.
+# Off by default: local replies are templated and quote feedback verbatim; enable with SCORE_FAST_PATH=1.
+SCORE_FAST_PATH = os.getenv("SCORE_FAST_PATH", "0") == "1"
+
+# Serve /metrics (Prometheus text) and /metrics.json on this port (0 = off)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# Per-stage latency metrics (prompt_build, history_summary, llm_ttft, llm_total); see metrics.py
+_metrics = get_metrics()
+
 # Portrait QA Conversational Assistant prompt template
 portrait_qa_conversational_assistant = f"""
 
@@ -23,7 +96,7 @@ You are a Portrait QA Conversational Assistant — a chatbot that helps users un
 
 You receive:
 - A full QA evaluation JSON of a portrait (qa_scores_json)
-- Conversation history (conversation_history)
+- Conversation history (conversation_history), sent as the chat messages that follow this prompt
 
 Your task is to:
 - Answer the user's questions about their portrait evaluation.
@@ -61,7 +134,7 @@ qa_scores_json:
 {{qa_scores_json}}
 
 conversation_history:
-{{conversation_history}}
+The chat messages that follow this system prompt, oldest first.
 
 ---
 
@@ -281,62 +354,556 @@ TOOLS = []
 # ============================================
 
 
-def build_system_prompt(qa_scores_json: dict, conversation_history: list) -> str:
-    """Build system prompt from portrait_qa_conversational_assistant template."""
+def build_system_prompt(qa_scores_json: dict) -> str:
+    """
+    Build system prompt from portrait_qa_conversational_assistant template.
+
+    The prompt only depends on the template and the QA scores, so it is
+    byte-identical on every turn of a conversation. This keeps the prompt
+    prefix cacheable by the provider; the conversation history is sent once,
+    as chat messages after it (see build_api_messages).
+    """
     prompt = portrait_qa_conversational_assistant
     # Template is f-string so {{x}} became {x}; replace single-brace placeholders
     prompt = prompt.replace("{qa_scores_json}", json.dumps(
         qa_scores_json, ensure_ascii=False, indent=2))
-    prompt = prompt.replace("{conversation_history}", json.dumps(
-        conversation_history, ensure_ascii=False, indent=2))
     return prompt
 
 
+@_metrics.timed("prompt_build", builder="full")
+def build_api_messages(qa_scores_json: dict, messages: list) -> list:
+    """
+    Assemble the message list for the API: stable system prompt first,
+    followed by the conversation history (user/assistant messages only).
+    """
+    api_messages = [
+        {"role": "system", "content": build_system_prompt(qa_scores_json)}
+    ]
+    api_messages.extend([
+        {"role": m["role"], "content": m["content"]}
+        for m in messages
+        if m.get("role") in ("user", "assistant")
+    ])
+    return api_messages
+
+
+_ENCODING = None
+_ENCODING_FAILED = False
+
+
+def _load_encoding():
+    try:
+        return tiktoken.encoding_for_model(MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """
+    Count tokens in text with the MODEL tokenizer.
+    Falls back to a ~4 characters per token estimate if tiktoken is missing
+    or its encoding cannot be loaded (e.g. offline, BPE file not cached).
+    Results are cached, so every message is tokenized once per process.
+    """
+    global _ENCODING, _ENCODING_FAILED
+    if not TOKENIZER_AVAILABLE or _ENCODING_FAILED:
+        return (len(text) + 3) // 4
+    if _ENCODING is None:
+        try:
+            _ENCODING = _load_encoding()
+        except Exception as e:
+            # Load once: later calls stay on the estimate instead of retrying the download
+            _ENCODING_FAILED = True
+            logger.warning("tiktoken encoding unavailable, estimating tokens as len/4: %s", e)
+            return (len(text) + 3) // 4
+    return len(_ENCODING.encode(text))
+
+
+def count_message_tokens(messages: list) -> int:
+    """Estimate prompt tokens for a chat message list (content + per-message overhead)."""
+    # 4 tokens of role/separator overhead per message, 3 to prime the reply
+    return sum(4 + count_tokens(m["content"]) for m in messages) + 3
+
+
+# ============================================
+# TOKEN BUDGET FOR LONG CONVERSATIONS
+# ============================================
+
+HISTORY_SUMMARY_PROMPT = f"""You maintain a running summary of a conversation between a user and a portrait evaluation assistant.
+Update the current summary with the new conversation turns. Keep: which QA categories were discussed,
+the advice given, the user's questions, goals and preferences, and anything the user was promised.
+Drop greetings and repetition. Write in the language of the conversation, as short plain sentences,
+at most {HISTORY_SUMMARY_MAX_TOKENS * 3 // 4} words. Output only the updated summary."""
+
+
+def summarize_history(summary: str, messages: list) -> str:
+    """
+    Fold messages into the running summary with the LLM.
+    Falls back to extractive_summary if the API call fails.
+    """
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    try:
+        result = call_azure_api([
+            {"role": "system", "content": HISTORY_SUMMARY_PROMPT},
+            {"role": "user", "content": f"Current summary:\n{summary or '(none)'}\n\nNew conversation turns:\n{transcript}"},
+        ], purpose="summary").strip()
+    except LLMCallError:
+        result = ""
+    return result or extractive_summary(summary, messages)
+
+
+def extractive_summary(summary: str, messages: list, max_chars: int = 160) -> str:
+    """
+    Summary without an API call: the first sentence of every folded message,
+    appended to the previous summary and trimmed (oldest lines first) to
+    HISTORY_SUMMARY_MAX_TOKENS.
+    """
+    lines = summary.splitlines() if summary else []
+    for m in messages:
+        first = m["content"].strip().split("\n")[0]
+        end = min((i for i in (first.find(". "), first.find("? "), first.find("! ")) if i >= 0), default=-1)
+        first = first[:end + 1] if end >= 0 else first
+        lines.append(f"{m['role']}: {first[:max_chars]}")
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > HISTORY_SUMMARY_MAX_TOKENS:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def build_budgeted_messages(qa_scores_json: dict, messages: list, summary_state: dict,
+                            budget: int = PROMPT_TOKEN_BUDGET, summarize=summarize_history) -> list:
+    """
+    Like build_api_messages, but keeps the prompt within a token budget.
+
+    Only a sliding window of recent messages is sent verbatim. When the
+    prompt would exceed budget, the oldest messages of the window (at least
+    HISTORY_MIN_RECENT_MESSAGES stay) are folded into a running summary until
+    it is under HISTORY_LOW_WATER * budget, so summarization happens once
+    every few turns rather than on every turn. The summary is sent as a
+    second system message, which keeps the first one byte-stable.
+
+    Summarization is recorded as its own "history_summary" stage and left
+    out of the "prompt_build" time.
+
+    Args:
+        qa_scores_json: QA scores for the system prompt
+        messages: Full conversation history (user/assistant messages)
+        summary_state: {"text": str, "count": int} running summary and the
+            number of leading messages it covers; updated in place
+        budget: Prompt token budget (0 = unlimited)
+        summarize: Callable(summary, messages) -> new summary
+
+    Returns:
+        Message list for the API
+    """
+    start = time.perf_counter()
+    summarize_seconds = 0.0
+    history = [
+        {"role": m["role"], "content": m["content"]}
+        for m in messages
+        if m.get("role") in ("user", "assistant")
+    ]
+    system = {"role": "system", "content": build_system_prompt(qa_scores_json)}
+    if budget <= 0:
+        _metrics.observe("prompt_build", time.perf_counter() - start, builder="budgeted")
+        return [system] + history
+
+    covered = min(summary_state.get("count", 0), len(history))
+    window = history[covered:]
+    summary_tokens = 4 + count_tokens(summary_state["text"]) if summary_state.get("text") else 0
+    sizes = [4 + count_tokens(m["content"]) for m in window]
+    fixed = count_message_tokens([system])
+
+    if fixed + summary_tokens + sum(sizes) > budget:
+        # Reserve room for the (bounded) summary and fold down to the low-water mark
+        target = int(budget * HISTORY_LOW_WATER)
+        remaining = fixed + 4 + HISTORY_SUMMARY_MAX_TOKENS + sum(sizes)
+        fold = 0
+        while len(window) - fold > HISTORY_MIN_RECENT_MESSAGES and remaining > target:
+            remaining -= sizes[fold]
+            fold += 1
+        # Never start the window with an assistant reply to a folded question
+        while 0 < fold < len(window) - 1 and window[fold]["role"] == "assistant":
+            fold += 1
+        if fold:
+            summary_start = time.perf_counter()
+            summary_state["text"] = summarize(summary_state.get("text", ""), window[:fold])
+            summarize_seconds = time.perf_counter() - summary_start
+            _metrics.observe("history_summary", summarize_seconds)
+            summary_state["count"] = covered + fold
+            window = window[fold:]
+
+    api_messages = [system]
+    if summary_state.get("text"):
+        api_messages.append({
+            "role": "system",
+            "content": "Summary of the earlier conversation (older turns are not shown):\n" + summary_state["text"]
+        })
+    api_messages.extend(window)
+    _metrics.observe("prompt_build", time.perf_counter() - start - summarize_seconds, builder="budgeted")
+    return api_messages
+
+
 # ============================================
 # AZURE OPENAI API CALL
 # ============================================
 
 
-def get_azure_client() -> AzureOpenAI:
-    """Initialize and return Azure OpenAI client."""
+def get_http_limits() -> httpx.Limits:
+    """Connection pool limits shared by the sync and async clients."""
+    return httpx.Limits(
+        max_connections=AZURE_MAX_CONNECTIONS,
+        max_keepalive_connections=AZURE_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=AZURE_KEEPALIVE_EXPIRY
+    )
+
+
+def get_http_timeout() -> httpx.Timeout:
+    """Per-request timeouts (read timeout applies between streamed chunks)."""
+    return httpx.Timeout(AZURE_READ_TIMEOUT, connect=AZURE_CONNECT_TIMEOUT)
+
+
+@st.cache_resource
+def create_azure_client(api_key: str, azure_endpoint: str, api_version: str) -> AzureOpenAI:
+    """
+    Create an Azure OpenAI client backed by a keep-alive connection pool.
+    Cached per process, so all Streamlit sessions reuse the same connections.
+    """
     return AzureOpenAI(
-        api_key=AZURE_API_KEY,
-        api_version=AZURE_API_VERSION,
-        azure_endpoint=AZURE_ENDPOINT
+        api_key=api_key,
+        api_version=api_version,
+        azure_endpoint=azure_endpoint,
+        timeout=get_http_timeout(),
+        # Retries are done by the resilient call layer (get_llm_caller)
+        max_retries=0,
+        http_client=DefaultHttpxClient(
+            limits=get_http_limits(),
+            timeout=get_http_timeout()
+        )
     )
 
 
-def call_azure_api(messages: list) -> str:
+@st.cache_resource
+def create_async_azure_client(api_key: str, azure_endpoint: str, api_version: str) -> AsyncAzureOpenAI:
     """
-    Call Azure OpenAI API with streaming.
-    Returns final text response.
+    Async counterpart of create_azure_client for concurrent callers.
+    The underlying pool binds to the event loop that first uses it, so use
+    it from a single long-running loop.
     """
-    client = get_azure_client()
+    return AsyncAzureOpenAI(
+        api_key=api_key,
+        api_version=api_version,
+        azure_endpoint=azure_endpoint,
+        timeout=get_http_timeout(),
+        # Retries are done by the resilient call layer (get_llm_caller)
+        max_retries=0,
+        http_client=DefaultAsyncHttpxClient(
+            limits=get_http_limits(),
+            timeout=get_http_timeout()
+        )
+    )
+
+
+def get_azure_client() -> AzureOpenAI:
+    """Return the shared, process-wide Azure OpenAI client."""
+    return create_azure_client(AZURE_API_KEY, AZURE_ENDPOINT, AZURE_API_VERSION)
+
+
+def get_async_azure_client() -> AsyncAzureOpenAI:
+    """Return the shared, process-wide async Azure OpenAI client."""
+    return create_async_azure_client(AZURE_API_KEY, AZURE_ENDPOINT, AZURE_API_VERSION)
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Retry 408/409/429/5xx responses, timeouts and connection errors."""
+    return isinstance(error, APIConnectionError) or default_retryable(error)
 
+
+@st.cache_resource
+def get_llm_caller() -> ResilientCaller:
+    """
+    Process-wide resilient call layer shared by the sync and async API calls:
+    per-attempt and total deadlines, jittered backoff honouring Retry-After,
+    optional hedging and a circuit breaker. Configured via the AZURE_ATTEMPT_TIMEOUT,
+    AZURE_TOTAL_TIMEOUT, AZURE_MAX_ATTEMPTS, AZURE_BACKOFF_BASE, AZURE_HEDGE,
+    AZURE_BREAKER_FAILURES and AZURE_BREAKER_RESET settings.
+
+    Returns:
+        ResilientCaller instance (use .stats() for latency histograms and error counters)
+    """
+    caller = ResilientCaller(
+        attempt_timeout=AZURE_ATTEMPT_TIMEOUT,
+        total_timeout=AZURE_TOTAL_TIMEOUT,
+        max_attempts=AZURE_MAX_ATTEMPTS,
+        backoff_base=AZURE_BACKOFF_BASE,
+        hedge=AZURE_HEDGE,
+        breaker=CircuitBreaker(AZURE_BREAKER_FAILURES, AZURE_BREAKER_RESET),
+        retryable=is_retryable_error,
+        max_workers=AZURE_MAX_CONNECTIONS
+    )
+    _metrics.register_collector("llm_call", lambda: {
+        **caller.stats(), "circuit_open": caller.breaker.state != "closed"})
+    return caller
+
+
+def get_stream_params(messages: list) -> dict:
+    """Request parameters for a streamed chat completion."""
+    return {
+        "model": MODEL,
+        "messages": messages,
+        "temperature": TEMPERATURE,
+        "max_tokens": 3000,
+        "stream": True,
+        "stream_options": {"include_usage": True}
+    }
+
+
+def update_usage_stats(chunk, stats: dict):
+    """Copy token usage from the final stream chunk (include_usage) into stats."""
+    usage = getattr(chunk, "usage", None)
+    if usage is None or stats is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    stats["prompt_tokens"] = usage.prompt_tokens
+    stats["cached_tokens"] = getattr(details, "cached_tokens", 0) or 0
+    stats["completion_tokens"] = usage.completion_tokens
+
+
+def record_llm_timing(start: float, first_token: Optional[float], backend: str, purpose: str):
+    """Record time to first token and total time (seconds) of one streamed completion."""
+    if first_token is not None:
+        _metrics.observe("llm_ttft", first_token - start, model=MODEL, backend=backend, purpose=purpose)
+    _metrics.observe("llm_total", time.perf_counter() - start, model=MODEL, backend=backend, purpose=purpose)
+
+
+def record_delta_timing(stats: dict, start: float):
+    """Record time-to-first-token / time-to-last-token (seconds) for a content delta."""
+    if stats is None:
+        return
+    elapsed = time.perf_counter() - start
+    stats.setdefault("time_to_first_token", elapsed)
+    stats["time_to_last_token"] = elapsed
+
+
+def is_last_chunk(chunk) -> bool:
+    """Whether chunk is the usage chunk (include_usage), the last one before [DONE]."""
+    return getattr(chunk, "usage", None) is not None and not chunk.choices
+
+
+def drain_stream(stream):
+    """
+    Read the rest of the HTTP body (the trailing [DONE] event) without
+    decoding it. Only a response read to its end goes back to the connection
+    pool; newer SDKs close the response right after [DONE] without reading
+    on, which would cost a new connection (and TLS handshake) per reply.
+    """
     try:
-        stream_params = {
-            "model": MODEL,
-            "messages": messages,
-            "temperature": TEMPERATURE,
-            "max_tokens": 3000,
-            "stream": True
-        }
+        for _ in stream.response.stream:
+            pass
+    except Exception:
+        pass
 
-        stream = client.chat.completions.create(**stream_params)
 
-        full_content = ""
+async def drain_stream_async(stream):
+    """Async variant of drain_stream."""
+    try:
+        async for _ in stream.response.stream:
+            pass
+    except Exception:
+        pass
+
+
+def content_of(chunk) -> str:
+    """Content delta of a stream chunk ("" for role/usage-only chunks)."""
+    if chunk.choices and len(chunk.choices) > 0:
+        return chunk.choices[0].delta.content or ""
+    return ""
+
+
+def open_stream(client: AzureOpenAI, messages: list, timeout: float) -> tuple:
+    """
+    One attempt: start a streamed completion and read it up to the first
+    content delta, so a request that stalls before its first token counts
+    as a timed-out attempt (and can be retried or hedged).
+
+    Returns:
+        (stream, iterator over the remaining chunks, chunks read so far)
+    """
+    stream = client.chat.completions.create(**get_stream_params(messages), timeout=timeout)
+    chunks = iter(stream)
+    head = []
+    try:
+        for chunk in chunks:
+            head.append(chunk)
+            if content_of(chunk):
+                break
+    except BaseException:
+        stream.close()
+        raise
+    return stream, chunks, head
+
+
+async def open_stream_async(client: AsyncAzureOpenAI, messages: list, timeout: float) -> tuple:
+    """Async variant of open_stream."""
+    stream = await client.chat.completions.create(**get_stream_params(messages), timeout=timeout)
+    chunks = stream.__aiter__()
+    head = []
+    try:
+        async for chunk in chunks:
+            head.append(chunk)
+            if content_of(chunk):
+                break
+    except BaseException:
+        await stream.close()
+        raise
+    return stream, chunks, head
 
-        for chunk in stream:
-            if chunk.choices and len(chunk.choices) > 0:
-                delta = chunk.choices[0].delta
 
-                if delta.content:
-                    full_content += delta.content
+def stream_azure_api(messages: list, stats: dict = None, purpose: str = "reply"):
+    """
+    Call Azure OpenAI API with streaming and yield content deltas as they arrive.
+
+    The request goes through the resilient call layer (get_llm_caller), which
+    retries and hedges it until the first token arrives. If stats is given,
+    it is filled with the token usage reported by the API (prompt_tokens,
+    cached_tokens, completion_tokens) and the time to the first and last
+    content token in seconds (time_to_first_token, time_to_last_token).
+    purpose labels the call's latency metrics ("reply", or "summary" for
+    history summarization).
+
+    Raises:
+        LLMCallError: No reply could be started (CircuitOpenError while the
+            service is failing), or the stream broke off midway
+    """
+    start = time.perf_counter()
+    first_token = None
+    client = get_azure_client()
+    try:
+        stream, chunks, head = get_llm_caller().call(
+            lambda timeout: open_stream(client, messages, timeout),
+            cleanup=lambda opened: opened[0].close()
+        )
+    except LLMCallError:
+        _metrics.count("stage_errors", stage="llm_total", model=MODEL, backend="azure", purpose=purpose)
+        raise
 
-        return full_content
+    try:
+        for chunk in itertools.chain(head, chunks):
+            update_usage_stats(chunk, stats)
+            content = content_of(chunk)
+            if content:
+                first_token = first_token or time.perf_counter()
+                record_delta_timing(stats, start)
+                yield content
+            if is_last_chunk(chunk):
+                drain_stream(stream)
+                break
+    except Exception as e:
+        _metrics.count("stage_errors", stage="llm_total", model=MODEL, backend="azure", purpose=purpose)
+        raise LLMCallError(f"Stream interrupted: {str(e)}") from e
+    finally:
+        stream.close()
+    record_llm_timing(start, first_token, "azure", purpose)
+
+
+async def stream_azure_api_async(messages: list, stats: dict = None, purpose: str = "reply"):
+    """Async variant of stream_azure_api using the shared async client."""
+    start = time.perf_counter()
+    first_token = None
+    client = get_async_azure_client()
+    try:
+        stream, chunks, head = await get_llm_caller().call_async(
+            lambda timeout: open_stream_async(client, messages, timeout),
+            cleanup=lambda opened: opened[0].close()
+        )
+    except LLMCallError:
+        _metrics.count("stage_errors", stage="llm_total", model=MODEL, backend="azure-async",
+                       purpose=purpose)
+        raise
 
+    try:
+        for chunk in head:
+            update_usage_stats(chunk, stats)
+            content = content_of(chunk)
+            if content:
+                first_token = first_token or time.perf_counter()
+                record_delta_timing(stats, start)
+                yield content
+        async for chunk in chunks:
+            update_usage_stats(chunk, stats)
+            content = content_of(chunk)
+            if content:
+                first_token = first_token or time.perf_counter()
+                record_delta_timing(stats, start)
+                yield content
+            if is_last_chunk(chunk):
+                await drain_stream_async(stream)
+                break
     except Exception as e:
-        return f"[ERROR: {str(e)}]"
+        _metrics.count("stage_errors", stage="llm_total", model=MODEL, backend="azure-async",
+                       purpose=purpose)
+        raise LLMCallError(f"Stream interrupted: {str(e)}") from e
+    finally:
+        await stream.close()
+    record_llm_timing(start, first_token, "azure-async", purpose)
+
+
+def call_azure_api(messages: list, stats: dict = None, purpose: str = "reply") -> str:
+    """
+    Call Azure OpenAI API with streaming.
+    Returns final text response (see stream_azure_api for stats, purpose and errors).
+    """
+    return "".join(stream_azure_api(messages, stats, purpose))
+
+
+async def call_azure_api_async(messages: list, stats: dict = None, purpose: str = "reply") -> str:
+    """
+    Async variant of call_azure_api using the shared async client.
+    Returns final text response.
+    """
+    return "".join([delta async for delta in stream_azure_api_async(messages, stats, purpose)])
+
+
+# ============================================
+# RESPONSE CACHE
+# ============================================
+
+
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    """
+    Process-wide reply cache shared by all sessions.
+    Configured via RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL and RESPONSE_CACHE_DIR.
+
+    Returns:
+        ResponseCache instance (use .stats() for hit rate and saved latency)
+    """
+    cache = ResponseCache(
+        max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+        ttl=RESPONSE_CACHE_TTL,
+        disk_dir=RESPONSE_CACHE_DIR
+    )
+    _metrics.register_collector("response_cache", cache.stats)
+    return cache
+
+
+def response_cache_key(qa_scores_json: dict, messages: list) -> str:
+    """
+    Cache key for the reply to the last message of messages: QA scores,
+    the normalized user message and a digest of the messages before it (all
+    of them, or the last RESPONSE_CACHE_HISTORY_MESSAGES if set). If the last message
+    is not a user message (the assistant opens the conversation), the user
+    message is empty.
+    """
+    history = [m for m in messages if m.get("role") in ("user", "assistant")]
+    user_message = ""
+    if history and history[-1]["role"] == "user":
+        user_message = history.pop()["content"]
+    return make_response_key(
+        qa_scores_json, user_message,
+        history_digest(history, RESPONSE_CACHE_HISTORY_MESSAGES),
+        model=MODEL, temperature=TEMPERATURE
+    )
 
 
 # ============================================
@@ -353,6 +920,147 @@ def init_session_state():
         st.session_state.conversation_started = False
     if "qa_scores_json" not in st.session_state:
         st.session_state.qa_scores_json = DEFAULT_QA_SCORES_JSON
+    if "turn_stats" not in st.session_state:
+        st.session_state.turn_stats = []
+    if "history_summary" not in st.session_state:
+        st.session_state.history_summary = {"text": "", "count": 0}
+
+
+def record_turn_stats(api_messages: Optional[list], stats: dict):
+    """Append prompt-token counts for one turn to session state (api_messages is None if nothing was sent)."""
+    st.session_state.turn_stats.append({
+        "turn": len(st.session_state.turn_stats) + 1,
+        "messages": len(api_messages) if api_messages is not None else 0,
+        "summarized": st.session_state.history_summary["count"],
+        "cache_hit": stats.get("cache_hit", False),
+        "local": stats.get("local"),
+        "error": stats.get("error"),
+        "prompt_tokens_est": count_message_tokens(api_messages) if api_messages is not None else None,
+        "prompt_tokens": stats.get("prompt_tokens"),
+        "cached_tokens": stats.get("cached_tokens"),
+        "completion_tokens": stats.get("completion_tokens"),
+        "ttft_ms": round(stats["time_to_first_token"] * 1000) if "time_to_first_token" in stats else None,
+        "ttlt_ms": round(stats["time_to_last_token"] * 1000) if "time_to_last_token" in stats else None,
+    })
+
+
+def chat_message_html(role: str, content: str) -> str:
+    """HTML for one chat bubble."""
+    if role == "user":
+        return f'''
+        <div class="chat-message user-message">
+            <strong>👤 User:</strong><br>{content}
+        </div>
+        '''
+    return f'''
+    <div class="chat-message assistant-message">
+        <strong>🤖 Assistant:</strong><br>{content}
+    </div>
+    '''
+
+
+def stream_reply(api_messages: list, stats: dict) -> Optional[str]:
+    """
+    Stream the assistant reply into the current container as it arrives.
+    Deltas are collected in a list and joined once; redraws are throttled
+    to STREAM_RENDER_INTERVAL. Returns the full reply, or None if the API
+    call failed (the error is kept in st.session_state.api_error).
+    """
+    placeholder = st.empty()
+    parts = []
+    last_render = 0.0
+
+    try:
+        for delta in stream_azure_api(api_messages, stats):
+            parts.append(delta)
+            now = time.perf_counter()
+            if now - last_render >= STREAM_RENDER_INTERVAL:
+                placeholder.markdown(chat_message_html(
+                    "assistant", "".join(parts) + " ▌"), unsafe_allow_html=True)
+                last_render = now
+    except LLMCallError as e:
+        placeholder.empty()
+        stats["error"] = str(e)
+        st.session_state.api_error = str(e)
+        return None
+
+    response = "".join(parts)
+    placeholder.markdown(chat_message_html(
+        "assistant", response), unsafe_allow_html=True)
+    return response
+
+
+@st.cache_resource
+def start_metrics_endpoint(host: str, port: int):
+    """Serve /metrics and /metrics.json once per process (see metrics.start_metrics_server)."""
+    return start_metrics_server(host, port)
+
+
+def stage_latency_rows() -> list:
+    """One row per stage and label set with call count and p50/p95 latency in milliseconds."""
+    rows = []
+    for stage, series in get_metrics().snapshot()["stages"].items():
+        for entry in series:
+            rows.append({
+                "stage": stage,
+                "labels": ", ".join(f"{k}={v}" for k, v in entry["labels"].items()),
+                "count": entry["count"],
+                "p50_ms": round(entry["p50"] * 1000, 1) if entry["p50"] is not None else None,
+                "p95_ms": round(entry["p95"] * 1000, 1) if entry["p95"] is not None else None,
+            })
+    return rows
+
+
+def get_score_index(qa_scores_json: dict) -> ScoreIndex:
+    """Score lookup index for the current conversation, rebuilt when its QA scores change."""
+    index = st.session_state.get("score_index")
+    if index is None or index.qa_scores_json is not qa_scores_json:
+        index = ScoreIndex(qa_scores_json)
+        st.session_state.score_index = index
+    return index
+
+
+def reply(qa_scores_json: dict, messages: list, build_messages: Callable[[], list],
+          stats: dict) -> Tuple[Optional[str], Optional[list]]:
+    """
+    Reply to the conversation: locally when SCORE_FAST_PATH is on and the
+    last user message is a plain score/feedback lookup (stats["local"] is
+    set to its intent), from the response cache when RESPONSE_CACHE is on
+    and the reply is cached (stats["cache_hit"] is set), otherwise streamed
+    from the API with stream_reply and stored in the cache.
+
+    build_messages() builds the API message list. It is only called when
+    the API is, since it may summarize older history with an LLM call.
+
+    Returns:
+        (reply or None if the API call failed, API messages or None if nothing was sent)
+    """
+    if SCORE_FAST_PATH and messages and messages[-1].get("role") == "user":
+        previous = [m["content"] for m in messages if m.get("role") == "assistant"]
+        local = get_score_index(qa_scores_json).answer(messages[-1]["content"], previous)
+        if local is not None:
+            stats["local"] = local["intent"]
+            st.markdown(chat_message_html("assistant", local["text"]), unsafe_allow_html=True)
+            return local["text"], None
+
+    if not RESPONSE_CACHE:
+        api_messages = build_messages()
+        return stream_reply(api_messages, stats), api_messages
+
+    cache = get_response_cache()
+    key = response_cache_key(qa_scores_json, messages)
+    cached = cache.get(key)
+    if cached is not None:
+        stats["cache_hit"] = True
+        st.markdown(chat_message_html("assistant", cached), unsafe_allow_html=True)
+        return cached, None
+
+    api_messages = build_messages()
+    start = time.perf_counter()
+    response = stream_reply(api_messages, stats)
+    if response:
+        cache.put(key, response, time.perf_counter() - start)
+    return response, api_messages
 
 
 def get_download_json() -> str:
@@ -360,11 +1068,7 @@ def get_download_json() -> str:
     # Rebuild system prompt with current data to ensure it contains all substituted values
     qa_scores_json = st.session_state.get(
         "qa_scores_json", DEFAULT_QA_SCORES_JSON)
-    conversation_history = [
-        {"role": m["role"], "content": m["content"]}
-        for m in st.session_state.messages
-    ]
-    current_prompt = build_system_prompt(qa_scores_json, conversation_history)
+    current_prompt = build_system_prompt(qa_scores_json)
 
     download_msgs = [
         {"role": "system", "content": current_prompt}
@@ -397,6 +1101,7 @@ def load_conversation_from_json(json_str: str) -> bool:
                 if m.get("role") in ("user", "assistant")
             ]
 
+        st.session_state.history_summary = {"text": "", "count": 0}
         st.session_state.conversation_started = True
         return True
     except json.JSONDecodeError as e:
@@ -525,6 +1230,14 @@ def main():
     # Initialize session state
     init_session_state()
 
+    # Opt-in background load + warm-up of STT/TTS models (AUDIO_PRELOAD=1)
+    if AUDIO_PRELOAD:
+        start_model_preload()
+
+    # Opt-in metrics endpoint (METRICS_PORT)
+    if METRICS_PORT:
+        start_metrics_endpoint(METRICS_HOST, METRICS_PORT)
+
     # Layout
     col_chat, col_side = st.columns([2, 1])
 
@@ -585,6 +1298,8 @@ def main():
                 st.session_state.system_prompt = ""
                 st.session_state.conversation_started = False
                 st.session_state.qa_scores_json = DEFAULT_QA_SCORES_JSON
+                st.session_state.turn_stats = []
+                st.session_state.history_summary = {"text": "", "count": 0}
                 st.rerun()
 
         # ---- Show system prompt ----
@@ -594,6 +1309,43 @@ def main():
                 st.text(
                     display_prompt[:1000] + "..." if len(display_prompt) > 1000 else display_prompt)
 
+        # ---- Voice model readiness ----
+        if AUDIO_PRELOAD:
+            readiness = get_model_readiness()
+            st.caption("🎙️ Voice models — " + ", ".join(
+                f"{name.upper()}: {state['status']}" for name, state in readiness.items()))
+
+        # ---- Prompt token usage per turn ----
+        if st.session_state.turn_stats:
+            with st.expander("📊 Prompt Tokens per Turn"):
+                st.dataframe(st.session_state.turn_stats,
+                             use_container_width=True)
+
+        # ---- Response cache ----
+        if RESPONSE_CACHE:
+            cache_stats = get_response_cache().stats()
+            st.caption(
+                f"🗄️ Response cache — hit rate {cache_stats['hit_rate']:.0%} "
+                f"({cache_stats['hits'] + cache_stats['disk_hits']} hits, {cache_stats['misses']} misses), "
+                f"{cache_stats['saved_seconds']:.1f}s of API time saved")
+
+        # ---- Per-stage latency ----
+        latency_rows = stage_latency_rows()
+        if latency_rows:
+            with st.expander("⏱️ Stage Latency"):
+                st.dataframe(latency_rows, use_container_width=True)
+
+        # ---- LLM call health ----
+        call_stats = get_llm_caller().stats()
+        if call_stats["calls"]:
+            with st.expander("🛡️ LLM Calls"):
+                latency = call_stats["latency"]
+                st.caption(
+                    f"Circuit {call_stats['circuit']} · {call_stats['succeeded']}/{call_stats['calls']} ok · "
+                    f"{call_stats['retries']} retries · {call_stats['hedges']} hedges · "
+                    f"first token p50 {latency['p50'] or 0:.2f}s, p95 {latency['p95'] or 0:.2f}s")
+                st.json(call_stats, expanded=False)
+
     # ---- LEFT COLUMN: Chat ----
     with col_chat:
         st.markdown(
@@ -618,52 +1370,41 @@ def main():
                     st.error(f"Invalid JSON in QA Scores: {e}")
                     st.stop()
 
-                conversation_history = []
-
-                prompt = build_system_prompt(
-                    qa_scores_json, conversation_history)
-                st.session_state.system_prompt = prompt
-
-                api_messages = [{"role": "system", "content": prompt}]
-
                 # Add first message from user if provided
                 if first_message.strip():
-                    api_messages.append({
-                        "role": "user",
-                        "content": first_message.strip()
-                    })
                     st.session_state.messages.append({
                         "role": "user",
                         "content": first_message.strip()
                     })
 
-                with st.spinner("Starting conversation..."):
-                    response = call_azure_api(api_messages)
+                st.session_state.system_prompt = build_system_prompt(qa_scores_json)
 
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": response
-                })
+                stats = {}
+                if first_message.strip():
+                    st.markdown(chat_message_html(
+                        "user", first_message.strip()), unsafe_allow_html=True)
+                response, api_messages = reply(
+                    qa_scores_json, st.session_state.messages,
+                    lambda: build_api_messages(qa_scores_json, st.session_state.messages), stats)
+                record_turn_stats(api_messages, stats)
+
+                if response is not None:
+                    st.session_state.messages.append({
+                        "role": "assistant",
+                        "content": response
+                    })
                 st.session_state.conversation_started = True
                 st.rerun()
 
         # Display chat messages (always show if there are messages)
-        if st.session_state.messages:
-            chat_container = st.container()
-            with chat_container:
-                for msg in st.session_state.messages:
-                    if msg["role"] == "user":
-                        st.markdown(f'''
-                        <div class="chat-message user-message">
-                            <strong>👤 User:</strong><br>{msg["content"]}
-                        </div>
-                        ''', unsafe_allow_html=True)
-                    elif msg["role"] == "assistant":
-                        st.markdown(f'''
-                        <div class="chat-message assistant-message">
-                            <strong>🤖 Assistant:</strong><br>{msg["content"]}
-                        </div>
-                        ''', unsafe_allow_html=True)
+        chat_container = st.container()
+        with chat_container:
+            for msg in st.session_state.messages:
+                if msg["role"] in ("user", "assistant"):
+                    st.markdown(chat_message_html(
+                        msg["role"], msg["content"]), unsafe_allow_html=True)
+            if st.session_state.get("api_error"):
+                st.error(f"⚠️ The assistant could not reply: {st.session_state.pop('api_error')}")
 
         # User input (only show when conversation has started)
         if st.session_state.conversation_started:
@@ -678,34 +1419,26 @@ def main():
                 qa_scores_json = st.session_state.get(
                     "qa_scores_json", DEFAULT_QA_SCORES_JSON)
 
-                # Build conversation history from messages
-                conversation_history = [
-                    {"role": m["role"], "content": m["content"]}
-                    for m in st.session_state.messages
-                ]
-
-                # Rebuild system prompt with updated conversation history
-                prompt = build_system_prompt(
-                    qa_scores_json, conversation_history)
                 # Update session state with current prompt
-                st.session_state.system_prompt = prompt
-
-                # Build full message list for API
-                api_messages = [
-                    {"role": "system", "content": prompt}
-                ]
-                api_messages.extend([
-                    {"role": m["role"], "content": m["content"]}
-                    for m in st.session_state.messages
-                ])
-
-                with st.spinner("Thinking..."):
-                    response = call_azure_api(api_messages)
-
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": response
-                })
+                st.session_state.system_prompt = build_system_prompt(qa_scores_json)
+
+                stats = {}
+                with chat_container:
+                    st.markdown(chat_message_html(
+                        "user", user_input), unsafe_allow_html=True)
+                    # Stable system prompt + running summary + recent history within the token budget
+                    response, api_messages = reply(
+                        qa_scores_json, st.session_state.messages,
+                        lambda: build_budgeted_messages(
+                            qa_scores_json, st.session_state.messages, st.session_state.history_summary),
+                        stats)
+                record_turn_stats(api_messages, stats)
+
+                if response is not None:
+                    st.session_state.messages.append({
+                        "role": "assistant",
+                        "content": response
+                    })
                 st.rerun()
 
 
@@ -2,39 +2,95 @@
 # AUDIO UTILITIES FOR STT AND TTS
 # ============================================
 import io
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from importlib.util import find_spec
+from math import gcd
 import numpy as np
 import soundfile as sf
 import streamlit as st
-from typing import Optional, Tuple
-import torch
+from typing import Iterator, List, Optional, Tuple
 
-# STT imports
-try:
-    from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
-    STT_AVAILABLE = True
-except ImportError:
-    STT_AVAILABLE = False
-    AutoModelForSpeechSeq2Seq = None
-    AutoProcessor = None
-    pipeline = None
-
-# TTS imports
-try:
-    from kokoro_onnx import Kokoro
+from inference_scheduler import (
+    PRIORITY_NORMAL, DeadlineExceeded, SchedulerFull, deadline_after, get_inference_scheduler
+)
+from metrics import get_metrics
+from micro_batching import MicroBatcher, SingleFlight
+from tts_cache import TTSCache, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Per-stage latency metrics (audio_decode, resample, stt, tts); see metrics.py
+_metrics = get_metrics()
+
+# Availability is probed without importing the libraries: torch, transformers
+# and kokoro are only imported on first STT/TTS use (see load_stt_model and
+# load_tts_model), so text-only sessions never pay for them.
+
+# STT availability
+STT_AVAILABLE = find_spec("transformers") is not None and find_spec("torch") is not None
+
+# TTS availability
+if find_spec("kokoro_onnx") is not None:
     TTS_AVAILABLE = True
     TTS_LIBRARY = "kokoro-onnx"
-    KPipeline = None
-except ImportError:
-    try:
-        from kokoro import KPipeline
-        TTS_AVAILABLE = True
-        TTS_LIBRARY = "kokoro"
-        Kokoro = None
-    except ImportError:
-        TTS_AVAILABLE = False
-        TTS_LIBRARY = None
-        Kokoro = None
-        KPipeline = None
+elif find_spec("kokoro") is not None:
+    TTS_AVAILABLE = True
+    TTS_LIBRARY = "kokoro"
+else:
+    TTS_AVAILABLE = False
+    TTS_LIBRARY = None
+
+# Long-form STT: clips longer than the threshold are split into overlapping
+# windows of STT_CHUNK_LENGTH_S seconds and decoded STT_BATCH_SIZE at a time
+STT_LONG_FORM_THRESHOLD_S = float(os.getenv("STT_LONG_FORM_THRESHOLD_S", "30"))
+STT_CHUNK_LENGTH_S = float(os.getenv("STT_CHUNK_LENGTH_S", "25"))
+STT_BATCH_SIZE = int(os.getenv("STT_BATCH_SIZE", "8"))
+
+# STT inference backend: "hf" (transformers), "int8" (dynamic int8 quantization)
+# or "onnx" (ONNX Runtime via optimum)
+STT_BACKENDS = ("hf", "int8", "onnx")
+STT_BACKEND = os.getenv("STT_BACKEND", "hf")
+STT_ONNX_CACHE_DIR = os.getenv(
+    "STT_ONNX_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "whisper-onnx"))
+
+# Cross-session micro-batching of short clips: requests arriving within
+# STT_MICROBATCH_MAX_WAIT_MS are decoded together, up to STT_MICROBATCH_MAX_SIZE
+# per forward pass (set STT_MICROBATCH=0 to run every clip on its own)
+STT_MICROBATCH_ENABLED = os.getenv("STT_MICROBATCH", "1") != "0"
+STT_MICROBATCH_MAX_SIZE = int(os.getenv("STT_MICROBATCH_MAX_SIZE", "8"))
+STT_MICROBATCH_MAX_WAIT_MS = float(os.getenv("STT_MICROBATCH_MAX_WAIT_MS", "10"))
+
+# Voice activity detection before STT (set STT_VAD=0 to disable)
+STT_VAD_ENABLED = os.getenv("STT_VAD", "1") != "0"
+
+# ONNX Runtime session options for Kokoro (kokoro-onnx backend). Unset values
+# keep the ONNX Runtime defaults; see get_tts_session_config.
+KOKORO_INTRA_OP_THREADS = int(os.getenv("KOKORO_INTRA_OP_THREADS", "0"))
+KOKORO_INTER_OP_THREADS = int(os.getenv("KOKORO_INTER_OP_THREADS", "0"))
+KOKORO_GRAPH_OPT_LEVEL = os.getenv("KOKORO_GRAPH_OPT_LEVEL", "all")
+KOKORO_EXECUTION_MODE = os.getenv("KOKORO_EXECUTION_MODE", "sequential")
+KOKORO_CPU_MEM_ARENA = os.getenv("KOKORO_CPU_MEM_ARENA", "1") == "1"
+KOKORO_MEM_PATTERN = os.getenv("KOKORO_MEM_PATTERN", "1") == "1"
+KOKORO_PROVIDERS = os.getenv("KOKORO_PROVIDERS", "CPUExecutionProvider")
+
+# Load and warm up STT/TTS models in the background at process start (opt-in)
+AUDIO_PRELOAD = os.getenv("AUDIO_PRELOAD", "0") == "1"
+
+# TTS segment cache (memory budget in bytes; set TTS_CACHE_DIR to persist across restarts)
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR") or None
+TTS_CACHE_DISK_MAX_BYTES = int(os.getenv("TTS_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Identical sentences requested by several sessions at once share one TTS job
+# (set TTS_SINGLE_FLIGHT=0 to schedule every request on its own)
+TTS_SINGLE_FLIGHT_ENABLED = os.getenv("TTS_SINGLE_FLIGHT", "1") != "0"
 
 
 # ============================================
@@ -42,14 +98,22 @@ except ImportError:
 # ============================================
 
 @st.cache_resource
-def load_stt_model(model_name: str = "distil-whisper/distil-large-v3", device: Optional[str] = None):
+def load_stt_model(model_name: str = "distil-whisper/distil-large-v3", device: Optional[str] = None,
+                   backend: str = STT_BACKEND):
     """
     Load Whisper model for speech-to-text transcription.
     Uses caching to avoid reloading the model on every call.
+
+    All backends return a transformers ASR pipeline, so transcribe_audio
+    works the same with each of them:
+        "hf"   - the Hugging Face model as-is (float16 on CUDA, float32 on CPU)
+        "int8" - dynamically int8-quantized Linear layers (CPU only)
+        "onnx" - ONNX Runtime export via optimum (exported once, then cached on disk)
     
     Args:
         model_name: Hugging Face model name (default: distil-whisper/distil-large-v3)
         device: Device to use ("cuda", "cpu", or None for auto-detection)
+        backend: "hf", "int8" or "onnx" (default: STT_BACKEND)
     
     Returns:
         Pipeline object for transcription
@@ -57,28 +121,47 @@ def load_stt_model(model_name: str = "distil-whisper/distil-large-v3", device: O
     if not STT_AVAILABLE:
         raise ImportError("transformers library is not installed. Please install it with: pip install transformers accelerate")
     
+    if backend not in STT_BACKENDS:
+        raise ValueError(f"Unknown STT backend '{backend}'. Expected one of: {', '.join(STT_BACKENDS)}")
+    
+    if backend == "onnx" and find_spec("optimum") is None:
+        raise ImportError("ONNX STT backend requires optimum. Please install it with: pip install optimum[onnxruntime]")
+    
+    import torch
+    from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
+    
     if device is None:
-        device = "cuda" if torch.cuda.is_available() else "cpu"
+        device = "cuda" if backend == "hf" and torch.cuda.is_available() else "cpu"
+    
+    if backend != "hf" and device != "cpu":
+        raise ValueError(f"STT backend '{backend}' only runs on CPU")
     
     try:
-        # Load model and processor
-        model = AutoModelForSpeechSeq2Seq.from_pretrained(
-            model_name,
-            dtype=torch.float16 if device == "cuda" else torch.float32,
-            low_cpu_mem_usage=True,
-            use_safetensors=True
-        )
-        model.to(device)
-        
         processor = AutoProcessor.from_pretrained(model_name)
         
+        # Load model
+        if backend == "onnx":
+            model = _load_onnx_stt_model(model_name)
+        else:
+            model = AutoModelForSpeechSeq2Seq.from_pretrained(
+                model_name,
+                dtype=torch.float16 if device == "cuda" else torch.float32,
+                low_cpu_mem_usage=True,
+                use_safetensors=True
+            )
+            if backend == "int8":
+                model = torch.ao.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8)
+            model.to(device)
+            model.eval()
+        
         # Create pipeline (dtype is already set in model, no need to specify again)
         pipe = pipeline(
             "automatic-speech-recognition",
             model=model,
             tokenizer=processor.tokenizer,
             feature_extractor=processor.feature_extractor,
-            device=device,
+            device=device if backend != "onnx" else None,
         )
         
         return pipe
@@ -86,9 +169,152 @@ def load_stt_model(model_name: str = "distil-whisper/distil-large-v3", device: O
         raise RuntimeError(f"Failed to load STT model: {str(e)}")
 
 
+def _load_onnx_stt_model(model_name: str):
+    """Load an ONNX Runtime Whisper model, exporting it on first use."""
+    from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+
+    export_dir = os.path.join(STT_ONNX_CACHE_DIR, model_name.replace("/", "--"))
+    if os.path.isdir(export_dir):
+        return ORTModelForSpeechSeq2Seq.from_pretrained(export_dir, provider="CPUExecutionProvider")
+
+    model = ORTModelForSpeechSeq2Seq.from_pretrained(
+        model_name, export=True, provider="CPUExecutionProvider")
+    model.save_pretrained(export_dir)
+    return model
+
+
+def get_stt_pipeline(model_name: str = "distil-whisper/distil-large-v3", backend: str = STT_BACKEND):
+    """
+    Return the cached STT pipeline for a model and backend.
+
+    load_stt_model is cached on the arguments exactly as passed, so every
+    caller goes through here to share one cache entry per (model, backend).
+    """
+    return load_stt_model(model_name, None, backend)
+
+
+@lru_cache(maxsize=32)
+def get_resample_filter(src_rate: int, dst_rate: int) -> Tuple[int, int, np.ndarray]:
+    """
+    Design (and cache) the polyphase anti-aliasing filter for a rate pair.
+
+    Args:
+        src_rate: Source sample rate
+        dst_rate: Target sample rate
+
+    Returns:
+        Tuple of (up, down, float32 FIR taps) for scipy.signal.resample_poly
+    """
+    from scipy import signal
+
+    g = gcd(int(src_rate), int(dst_rate))
+    up, down = int(dst_rate) // g, int(src_rate) // g
+    max_rate = max(up, down)
+    # Same linear-phase Kaiser design resample_poly uses by default
+    taps = signal.firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+    taps = taps.astype(np.float32)
+    taps.setflags(write=False)
+    return up, down, taps
+
+
+def resample_audio(audio_data: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """
+    Resample mono float32 audio with a rational polyphase filter.
+
+    Args:
+        audio_data: Mono audio samples (float32)
+        src_rate: Source sample rate
+        dst_rate: Target sample rate
+
+    Returns:
+        Resampled float32 audio (the input itself if the rates match)
+    """
+    if src_rate == dst_rate:
+        return audio_data
+
+    from scipy import signal
+
+    up, down, taps = get_resample_filter(int(src_rate), int(dst_rate))
+    with _metrics.timer("resample", backend="scipy"):
+        return signal.resample_poly(audio_data, up, down, window=taps).astype(np.float32, copy=False)
+
+
+class StreamResampler:
+    """
+    Frame-by-frame polyphase resampler with filter state carried across calls.
+
+    Uses the same filter as resample_audio, and the concatenated output of
+    process() + flush() matches resample_audio on the whole signal, so
+    frames of telephony audio (e.g. 20 ms) can be resampled as they arrive
+    without edge artifacts at frame boundaries.
+
+    Args:
+        src_rate: Source sample rate
+        dst_rate: Target sample rate
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int):
+        self.src_rate = int(src_rate)
+        self.dst_rate = int(dst_rate)
+        if self.src_rate == self.dst_rate:
+            self.up = self.down = 1
+            return
+        self.up, self.down, taps = get_resample_filter(self.src_rate, self.dst_rate)
+        self._delay = (len(taps) - 1) // 2
+        # Polyphase branches, reversed so each output is a dot product with a forward window
+        self._span = -(-len(taps) // self.up)
+        padded = np.zeros(self._span * self.up, dtype=np.float32)
+        padded[:len(taps)] = taps * self.up
+        self._branches = np.ascontiguousarray(padded.reshape(self._span, self.up).T[:, ::-1])
+        self._history = np.zeros(self._span - 1, dtype=np.float32)
+        self._consumed = 0
+        self._emitted = 0
+
+    def process(self, frame: np.ndarray) -> np.ndarray:
+        """Resample the next frame; returns every output sample that is now complete."""
+        frame = np.asarray(frame, dtype=np.float32).reshape(-1)
+        if self.up == self.down:
+            return frame
+        start = self._consumed
+        self._consumed += len(frame)
+        buffer = np.concatenate((self._history, frame))
+        # Output m needs input up to (m * down + delay) // up
+        last = (self._consumed * self.up - 1 - self._delay) // self.down
+        out = self._outputs(buffer, start, self._emitted, last + 1)
+        self._history = buffer[len(buffer) - (self._span - 1):] if self._span > 1 else buffer[:0]
+        return out
+
+    def flush(self) -> np.ndarray:
+        """Emit the remaining outputs (input is zero-padded past the end)."""
+        if self.up == self.down:
+            return np.zeros(0, dtype=np.float32)
+        total = -(-self._consumed * self.up // self.down)
+        padding = np.zeros(self._delay // self.up + 1, dtype=np.float32)
+        buffer = np.concatenate((self._history, padding))
+        out = self._outputs(buffer, self._consumed, self._emitted, total)
+        self._history = np.zeros(self._span - 1, dtype=np.float32)
+        self._consumed = 0
+        self._emitted = 0
+        return out
+
+    def _outputs(self, buffer: np.ndarray, start: int, first: int, stop: int) -> np.ndarray:
+        if stop <= first:
+            return np.zeros(0, dtype=np.float32)
+        self._emitted = stop
+        positions = np.arange(first, stop, dtype=np.int64) * self.down + self._delay
+        phases = positions % self.up
+        # buffer[0] is input sample start - (span - 1)
+        rows = positions // self.up - start
+        windows = np.lib.stride_tricks.sliding_window_view(buffer, self._span)
+        return np.einsum("mk,mk->m", windows[rows], self._branches[phases]).astype(np.float32, copy=False)
+
+
 def convert_audio_format(audio_bytes: bytes, target_sample_rate: int = 16000) -> Tuple[np.ndarray, int]:
     """
     Convert audio bytes to numpy array with target sample rate.
+
+    Decodes straight to float32 and resamples with a cached polyphase filter,
+    so no float64 copy of the clip is ever made.
     
     Args:
         audio_bytes: Raw audio bytes
@@ -98,42 +324,266 @@ def convert_audio_format(audio_bytes: bytes, target_sample_rate: int = 16000) ->
         Tuple of (audio_array, sample_rate)
     """
     try:
-        # Read audio from bytes
-        audio_data, sample_rate = sf.read(io.BytesIO(audio_bytes))
+        # Read audio from bytes (soundfile scales integer PCM to [-1, 1] float32)
+        with _metrics.timer("audio_decode", backend="soundfile"):
+            audio_data, sample_rate = sf.read(io.BytesIO(audio_bytes), dtype="float32")
         
         # Convert to mono if stereo
-        if len(audio_data.shape) > 1:
-            audio_data = np.mean(audio_data, axis=1)
+        if audio_data.ndim > 1:
+            if audio_data.shape[1] == 1:
+                audio_data = audio_data[:, 0]
+            else:
+                audio_data = audio_data.mean(axis=1, dtype=np.float32)
         
         # Resample if needed
         if sample_rate != target_sample_rate:
-            from scipy import signal
-            num_samples = int(len(audio_data) * target_sample_rate / sample_rate)
-            audio_data = signal.resample(audio_data, num_samples)
+            audio_data = resample_audio(audio_data, sample_rate, target_sample_rate)
             sample_rate = target_sample_rate
         
-        # Normalize audio
-        if audio_data.dtype != np.float32:
-            if audio_data.dtype == np.int16:
-                audio_data = audio_data.astype(np.float32) / 32768.0
-            elif audio_data.dtype == np.int32:
-                audio_data = audio_data.astype(np.float32) / 2147483648.0
-            else:
-                audio_data = audio_data.astype(np.float32)
-        
-        return audio_data, sample_rate
+        return np.ascontiguousarray(audio_data, dtype=np.float32), sample_rate
     except Exception as e:
         raise ValueError(f"Failed to convert audio format: {str(e)}")
 
 
-def transcribe_audio(audio_bytes: bytes, language: str = "de", model_name: str = "distil-whisper/distil-large-v3") -> str:
+# ============================================
+# VAD (Voice Activity Detection)
+# ============================================
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) indices of the True runs in a boolean array."""
+    edges = np.diff(np.concatenate(([False], mask, [False])).astype(np.int8))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def detect_speech(audio_data: np.ndarray, sample_rate: int, frame_ms: float = 30.0,
+                  min_threshold_db: float = -50.0, margin_db: float = 12.0,
+                  min_speech_ms: float = 120.0, min_silence_ms: float = 300.0,
+                  pad_ms: float = 200.0) -> List[Tuple[int, int]]:
+    """
+    Energy-based voice activity detection, vectorized over frames.
+
+    A frame counts as speech if its RMS level is above both min_threshold_db
+    (dBFS) and the estimated noise floor (10th percentile level) plus
+    margin_db; for clips with little level contrast the threshold is kept
+    margin_db below the loud (90th percentile) frames instead. Pauses
+    shorter than min_silence_ms are bridged, bursts shorter than
+    min_speech_ms are dropped and every region is padded by pad_ms.
+
+    Args:
+        audio_data: Mono float32 audio in [-1, 1]
+        sample_rate: Sample rate of the audio
+
+    Returns:
+        List of (start_sample, end_sample) speech regions
+    """
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = len(audio_data) // frame
+    if n_frames == 0:
+        return []
+
+    frames = audio_data[:n_frames * frame].reshape(n_frames, frame)
+    level_db = 10.0 * np.log10(np.einsum("ij,ij->i", frames, frames) / frame + 1e-10)
+    floor, peak = np.percentile(level_db, [10, 90])
+    # Mostly-voiced clips have little level contrast, so never put the
+    # threshold within margin_db of the loud frames
+    threshold = max(min_threshold_db, min(float(floor), float(peak) - 2 * margin_db) + margin_db)
+    speech = level_db > threshold
+
+    # Bridge short pauses inside speech
+    starts, ends = _runs(~speech)
+    short_gap = (ends - starts) * frame_ms < min_silence_ms
+    inner = (starts > 0) & (ends < n_frames)
+    for s, e in zip(starts[short_gap & inner], ends[short_gap & inner]):
+        speech[s:e] = True
+
+    # Drop short bursts (clicks, line noise)
+    starts, ends = _runs(speech)
+    keep = (ends - starts) * frame_ms >= min_speech_ms
+    starts, ends = starts[keep], ends[keep]
+    if len(starts) == 0:
+        return []
+
+    pad = int(sample_rate * pad_ms / 1000)
+    regions = []
+    for s, e in zip(starts * frame - pad, ends * frame + pad):
+        s, e = max(0, int(s)), min(len(audio_data), int(e))
+        if regions and s <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], e)
+        else:
+            regions.append((s, e))
+    return regions
+
+
+def trim_silence(audio_data: np.ndarray, sample_rate: int, detector=None) -> Tuple[np.ndarray, dict]:
+    """
+    Drop non-speech regions from audio before STT.
+
+    Args:
+        audio_data: Mono float32 audio from convert_audio_format
+        sample_rate: Sample rate of the audio
+        detector: Optional callable(audio, sample_rate) -> list of
+            (start_sample, end_sample) regions, e.g. wrapping a VAD model
+            (default: detect_speech)
+
+    Returns:
+        Tuple of (speech-only audio, stats) where stats has original_s,
+        kept_s, removed_s, removed_ratio and segments
+    """
+    regions = (detector or detect_speech)(audio_data, sample_rate)
+
+    if len(regions) == 1 and regions[0] == (0, len(audio_data)):
+        trimmed = audio_data
+    elif regions:
+        trimmed = np.concatenate([audio_data[s:e] for s, e in regions])
+    else:
+        trimmed = audio_data[:0]
+
+    original_s = len(audio_data) / sample_rate
+    kept_s = len(trimmed) / sample_rate
+    return trimmed, {
+        "original_s": original_s,
+        "kept_s": kept_s,
+        "removed_s": original_s - kept_s,
+        "removed_ratio": (original_s - kept_s) / original_s if original_s else 0.0,
+        "segments": len(regions),
+    }
+
+
+def untrim_timestamp(timestamp: Tuple[Optional[float], Optional[float]], regions: List[Tuple[int, int]],
+                     sample_rate: int) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Map a (start_s, end_s) timestamp in trimmed audio back to the original
+    recording, given the speech regions trim_silence kept. A time on the cut
+    between two regions maps to the end of the earlier region for end_s and
+    to the start of the later one for start_s.
+    """
+    if not regions:
+        return timestamp
+    lengths = np.array([e - s for s, e in regions]) / sample_rate
+    kept_ends = np.cumsum(lengths)
+
+    def restore(t, side):
+        if t is None:
+            return None
+        i = min(int(np.searchsorted(kept_ends, t, side=side)), len(regions) - 1)
+        return round(float(regions[i][0] / sample_rate + t - (kept_ends[i] - lengths[i])), 3)
+
+    start, end = timestamp
+    return restore(start, "right"), restore(end, "left")
+
+
+def _run_stt_pipeline(pipe, audio_array: np.ndarray, sample_rate: int, language: str,
+                      long_form: bool, chunk_length_s: Optional[float] = None,
+                      stride_length_s: Optional[float] = None, batch_size: Optional[int] = None,
+                      return_timestamps: bool = False) -> dict:
+    """
+    Run the Whisper pipeline on a float32 array.
+
+    In long-form mode the pipeline splits the audio into overlapping windows
+    (chunk_length_s, with stride_length_s of overlap on each side), decodes
+    them batch_size at a time and merges the overlaps back into one text.
+    """
+    kwargs = {"generate_kwargs": {"language": language, "task": "transcribe"}}
+    if long_form:
+        chunk_length_s = chunk_length_s or STT_CHUNK_LENGTH_S
+        kwargs["chunk_length_s"] = chunk_length_s
+        kwargs["stride_length_s"] = stride_length_s if stride_length_s is not None else chunk_length_s / 6
+        kwargs["batch_size"] = batch_size or STT_BATCH_SIZE
+    if return_timestamps:
+        kwargs["return_timestamps"] = True
+
+    return pipe({"raw": audio_array, "sampling_rate": sample_rate}, **kwargs)
+
+
+def _run_stt_batch(pipe, audio_arrays: List[np.ndarray], sample_rate: int, language: str) -> List[dict]:
+    """
+    Decode several short clips in one batched generate call.
+
+    The feature extractor pads every clip to Whisper's 30 s input window, so
+    clips of different lengths share one forward pass.
+    """
+    inputs = [{"raw": audio, "sampling_rate": sample_rate} for audio in audio_arrays]
+    results = pipe(inputs, batch_size=len(inputs),
+                   generate_kwargs={"language": language, "task": "transcribe"})
+    return list(results)
+
+
+@st.cache_resource
+def get_stt_batcher(model_name: str = "distil-whisper/distil-large-v3",
+                    backend: str = STT_BACKEND) -> MicroBatcher:
+    """
+    Process-wide micro-batcher in front of the STT pipeline of a model and backend.
+    Items are float32 clips; the batch key is (language, sample_rate).
+    Sized by STT_MICROBATCH_MAX_SIZE and STT_MICROBATCH_MAX_WAIT_MS.
+    """
+    pipe = get_stt_pipeline(model_name, backend)
+
+    def run_batch(key, audio_arrays):
+        language, sample_rate = key
+        return _run_stt_batch(pipe, audio_arrays, sample_rate, language)
+
+    return MicroBatcher(
+        run_batch,
+        max_batch=STT_MICROBATCH_MAX_SIZE,
+        max_wait_ms=STT_MICROBATCH_MAX_WAIT_MS,
+        name="stt-batcher"
+    )
+
+
+def _transcribe_short(audio_array: np.ndarray, sample_rate: int, language: str, model_name: str,
+                      backend: str, priority: int = PRIORITY_NORMAL,
+                      deadline: Optional[float] = None) -> dict:
+    """
+    Transcribe one short clip (up to Whisper's 30 s window) on the shared scheduler,
+    micro-batched with concurrent requests unless STT_MICROBATCH=0.
+    """
+    with _metrics.timer("stt", model=model_name, backend=backend, mode="short"):
+        if STT_MICROBATCH_ENABLED:
+            return get_stt_batcher(model_name, backend).run(
+                audio_array, key=(language, sample_rate), priority=priority, deadline=deadline)
+        return get_inference_scheduler().run(
+            _run_stt_pipeline, get_stt_pipeline(model_name, backend), audio_array, sample_rate,
+            language, False, priority=priority, deadline=deadline
+        )
+
+
+def _submit_short(audio_array: np.ndarray, sample_rate: int, language: str, model_name: str,
+                  backend: str, priority: int = PRIORITY_NORMAL) -> Future:
+    """
+    Non-blocking variant of _transcribe_short: queue the clip and return a
+    Future for the pipeline result.
+
+    Raises:
+        SchedulerFull: If the batch or inference queue is full
+    """
+    if STT_MICROBATCH_ENABLED:
+        return get_stt_batcher(model_name, backend).submit(
+            audio_array, key=(language, sample_rate), priority=priority)
+    return get_inference_scheduler().submit(
+        _run_stt_pipeline, get_stt_pipeline(model_name, backend), audio_array, sample_rate,
+        language, False, priority=priority
+    )
+
+
+def transcribe_audio(audio_bytes: bytes, language: str = "de", model_name: str = "distil-whisper/distil-large-v3",
+                     vad: Optional[bool] = None, vad_stats: Optional[dict] = None,
+                     backend: str = STT_BACKEND, priority: int = PRIORITY_NORMAL,
+                     deadline_s: Optional[float] = None) -> str:
     """
     Transcribe audio bytes to text using Whisper model.
+    Clips longer than STT_LONG_FORM_THRESHOLD_S are transcribed in
+    long-form mode (see transcribe_audio_long).
     
     Args:
         audio_bytes: Raw audio bytes from microphone or file
         language: Language code (default: "de" for German)
         model_name: Model name to use
+        vad: Trim non-speech before inference (default: STT_VAD_ENABLED);
+            all-silent input returns "" without running the model
+        vad_stats: If given, filled with the trim_silence stats
+        backend: STT backend, see load_stt_model (default: STT_BACKEND)
+        priority: Scheduling priority on the shared inference scheduler
+        deadline_s: Give up if inference has not finished within this many seconds
     
     Returns:
         Transcribed text
@@ -142,6 +592,8 @@ def transcribe_audio(audio_bytes: bytes, language: str = "de", model_name: str =
         ImportError: If STT libraries are not available
         RuntimeError: If transcription fails
         ValueError: If audio format is invalid
+        SchedulerFull: If the inference queue is full (caller should back off)
+        DeadlineExceeded: If deadline_s passed before inference finished
     """
     if not STT_AVAILABLE:
         raise ImportError("STT functionality is not available. Please install transformers library: pip install transformers accelerate")
@@ -149,10 +601,8 @@ def transcribe_audio(audio_bytes: bytes, language: str = "de", model_name: str =
     if not audio_bytes or len(audio_bytes) == 0:
         raise ValueError("Audio bytes are empty")
     
+    deadline = deadline_after(deadline_s)
     try:
-        # Load model (cached)
-        pipe = load_stt_model(model_name)
-        
         # Convert audio format
         audio_array, sample_rate = convert_audio_format(audio_bytes)
         
@@ -160,15 +610,107 @@ def transcribe_audio(audio_bytes: bytes, language: str = "de", model_name: str =
         if len(audio_array) == 0:
             raise ValueError("Audio array is empty after conversion")
         
-        # Transcribe
-        result = pipe(
-            {"raw": audio_array, "sampling_rate": sample_rate},
-            generate_kwargs={"language": language, "task": "transcribe"}
-        )
+        # Drop silence; skip inference entirely if nothing is left
+        if STT_VAD_ENABLED if vad is None else vad:
+            audio_array, stats = trim_silence(audio_array, sample_rate)
+            if vad_stats is not None:
+                vad_stats.update(stats)
+            if len(audio_array) == 0:
+                return ""
+        
+        # Transcribe (bounded, prioritized across all sessions; short clips are micro-batched)
+        if len(audio_array) / sample_rate > STT_LONG_FORM_THRESHOLD_S:
+            with _metrics.timer("stt", model=model_name, backend=backend, mode="long"):
+                result = get_inference_scheduler().run(
+                    _run_stt_pipeline, get_stt_pipeline(model_name, backend), audio_array,
+                    sample_rate, language, True, priority=priority, deadline=deadline
+                )
+        else:
+            result = _transcribe_short(
+                audio_array, sample_rate, language, model_name, backend, priority, deadline)
         
         transcribed_text = result.get("text", "").strip()
         return transcribed_text if transcribed_text else ""
-    except ImportError:
+    except (ImportError, SchedulerFull, DeadlineExceeded):
+        raise
+    except ValueError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Failed to transcribe audio: {str(e)}")
+
+
+def transcribe_audio_long(audio_bytes: bytes, language: str = "de", model_name: str = "distil-whisper/distil-large-v3",
+                          chunk_length_s: Optional[float] = None, stride_length_s: Optional[float] = None,
+                          batch_size: Optional[int] = None, vad: Optional[bool] = None,
+                          backend: str = STT_BACKEND, priority: int = PRIORITY_NORMAL,
+                          deadline_s: Optional[float] = None) -> dict:
+    """
+    Transcribe long audio (e.g. voicemails) in overlapping, batched windows.
+    
+    Args:
+        audio_bytes: Raw audio bytes from microphone or file
+        language: Language code (default: "de" for German)
+        model_name: Model name to use
+        chunk_length_s: Window length in seconds (default: STT_CHUNK_LENGTH_S)
+        stride_length_s: Overlap on each side of a window (default: chunk_length_s / 6)
+        batch_size: Windows decoded per forward pass (default: STT_BATCH_SIZE)
+        vad: Trim non-speech before inference (default: STT_VAD_ENABLED);
+            chunk timestamps are mapped back to the original recording
+        backend: STT backend, see load_stt_model (default: STT_BACKEND)
+        priority: Scheduling priority on the shared inference scheduler
+        deadline_s: Give up if inference has not finished within this many seconds
+    
+    Returns:
+        Dictionary with "text" (stitched transcript), "chunks", a list of
+        {"text": str, "timestamp": (start_s, end_s)} segments, and "vad"
+        (trim_silence stats, or None if VAD was off)
+    
+    Raises:
+        ImportError: If STT libraries are not available
+        RuntimeError: If transcription fails
+        ValueError: If audio format is invalid
+        SchedulerFull: If the inference queue is full (caller should back off)
+        DeadlineExceeded: If deadline_s passed before inference finished
+    """
+    if not STT_AVAILABLE:
+        raise ImportError("STT functionality is not available. Please install transformers library: pip install transformers accelerate")
+    
+    if not audio_bytes or len(audio_bytes) == 0:
+        raise ValueError("Audio bytes are empty")
+    
+    deadline = deadline_after(deadline_s)
+    try:
+        audio_array, sample_rate = convert_audio_format(audio_bytes)
+        
+        if len(audio_array) == 0:
+            raise ValueError("Audio array is empty after conversion")
+        
+        vad_stats, regions = None, None
+        if STT_VAD_ENABLED if vad is None else vad:
+            regions = detect_speech(audio_array, sample_rate)
+            audio_array, vad_stats = trim_silence(audio_array, sample_rate, detector=lambda *_: regions)
+            if len(audio_array) == 0:
+                return {"text": "", "chunks": [], "vad": vad_stats}
+        
+        pipe = get_stt_pipeline(model_name, backend)
+        with _metrics.timer("stt", model=model_name, backend=backend, mode="long"):
+            result = get_inference_scheduler().run(
+                _run_stt_pipeline, pipe, audio_array, sample_rate, language, long_form=True,
+                chunk_length_s=chunk_length_s, stride_length_s=stride_length_s,
+                batch_size=batch_size, return_timestamps=True,
+                priority=priority, deadline=deadline
+            )
+        
+        return {
+            "text": result.get("text", "").strip(),
+            "chunks": [
+                {"text": c.get("text", "").strip(),
+                 "timestamp": untrim_timestamp(tuple(c.get("timestamp") or (None, None)), regions, sample_rate)}
+                for c in result.get("chunks", [])
+            ],
+            "vad": vad_stats
+        }
+    except (ImportError, SchedulerFull, DeadlineExceeded):
         raise
     except ValueError:
         raise
@@ -180,8 +722,77 @@ def transcribe_audio(audio_bytes: bytes, language: str = "de", model_name: str =
 # TTS (Text-to-Speech) Functions
 # ============================================
 
+def get_tts_session_config(overrides: Optional[dict] = None) -> dict:
+    """
+    ONNX Runtime session settings for Kokoro, from KOKORO_* environment variables.
+
+    Keys: intra_op_threads and inter_op_threads (0 = ONNX Runtime default),
+    graph_opt_level ("disable", "basic", "extended", "all"), execution_mode
+    ("sequential", "parallel"), cpu_mem_arena, mem_pattern (bools) and
+    providers (list of execution provider names).
+
+    Args:
+        overrides: Values replacing the environment configuration
+
+    Returns:
+        Session configuration dictionary
+    """
+    config = {
+        "intra_op_threads": KOKORO_INTRA_OP_THREADS,
+        "inter_op_threads": KOKORO_INTER_OP_THREADS,
+        "graph_opt_level": KOKORO_GRAPH_OPT_LEVEL,
+        "execution_mode": KOKORO_EXECUTION_MODE,
+        "cpu_mem_arena": KOKORO_CPU_MEM_ARENA,
+        "mem_pattern": KOKORO_MEM_PATTERN,
+        "providers": [p.strip() for p in KOKORO_PROVIDERS.split(",") if p.strip()],
+    }
+    config.update(overrides or {})
+    return config
+
+
+def build_tts_session(model_path: str, config: dict):
+    """
+    Create the ONNX Runtime InferenceSession for Kokoro with the given settings.
+
+    Args:
+        model_path: Path to kokoro-v1.0.onnx
+        config: Settings from get_tts_session_config
+
+    Returns:
+        onnxruntime.InferenceSession
+    """
+    import onnxruntime as ort
+
+    graph_levels = {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
+    execution_modes = {
+        "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+        "parallel": ort.ExecutionMode.ORT_PARALLEL,
+    }
+    if config["graph_opt_level"] not in graph_levels:
+        raise ValueError(f"Unknown graph_opt_level '{config['graph_opt_level']}'")
+    if config["execution_mode"] not in execution_modes:
+        raise ValueError(f"Unknown execution_mode '{config['execution_mode']}'")
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = int(config["intra_op_threads"])
+    options.inter_op_num_threads = int(config["inter_op_threads"])
+    options.graph_optimization_level = graph_levels[config["graph_opt_level"]]
+    options.execution_mode = execution_modes[config["execution_mode"]]
+    options.enable_cpu_mem_arena = bool(config["cpu_mem_arena"])
+    options.enable_mem_pattern = bool(config["mem_pattern"])
+
+    available = set(ort.get_available_providers())
+    providers = [p for p in config["providers"] if p in available] or ["CPUExecutionProvider"]
+    return ort.InferenceSession(model_path, sess_options=options, providers=providers)
+
+
 @st.cache_resource
-def load_tts_model(model_path: str = None, voices_path: str = None):
+def load_tts_model(model_path: str = None, voices_path: str = None, session_config: Optional[dict] = None):
     """
     Load Kokoro TTS model.
     Uses caching to avoid reloading the model on every call.
@@ -189,6 +800,8 @@ def load_tts_model(model_path: str = None, voices_path: str = None):
     Args:
         model_path: Path to kokoro-v1.0.onnx file (if None, will try to download)
         voices_path: Path to voices-v1.0.bin file (if None, will try to download)
+        session_config: ONNX Runtime settings overriding the KOKORO_* environment
+            configuration (kokoro-onnx only, see get_tts_session_config)
     
     Returns:
         Tuple of (TTS model object, library_type)
@@ -199,7 +812,6 @@ def load_tts_model(model_path: str = None, voices_path: str = None):
     try:
         if TTS_LIBRARY == "kokoro-onnx":
             # kokoro-onnx requires model files
-            import os
             import urllib.request
             
             # Default paths in cache directory
@@ -226,32 +838,359 @@ def load_tts_model(model_path: str = None, voices_path: str = None):
                     except Exception as e:
                         raise RuntimeError(f"Failed to download voices file. Please download manually from {voices_url} and place at {voices_path}. Error: {str(e)}")
             
-            model = Kokoro(model_path, voices_path)
+            from kokoro_onnx import Kokoro
+            if hasattr(Kokoro, "from_session"):
+                session = build_tts_session(model_path, get_tts_session_config(session_config))
+                model = Kokoro.from_session(session, voices_path)
+            else:
+                # Older kokoro-onnx releases build their own session
+                logger.warning("kokoro-onnx has no Kokoro.from_session; ONNX Runtime session options are ignored")
+                model = Kokoro(model_path, voices_path)
             return model, "kokoro-onnx"
         else:
             # Fallback to kokoro (if available)
+            from kokoro import KPipeline
             model = KPipeline(lang_code='a')  # 'a' for American English, 'b' for British
             return model, "kokoro"
     except Exception as e:
         raise RuntimeError(f"Failed to load TTS model: {str(e)}")
 
 
-def text_to_speech(text: str, language: str = "de", speed: float = 1.0) -> bytes:
+# Sentence end (with optional closing quotes/brackets) followed by whitespace, or a line break
+_SENTENCE_BOUNDARY = re.compile(r'[.!?…]+["\')\]»“”]*\s+|\n+')
+# Clause boundaries used to break up overly long sentences
+_CLAUSE_BOUNDARY = re.compile(r'[,;:–—]\s+')
+
+
+class SentenceSplitter:
+    """
+    Incrementally split streamed text into sentences for TTS.
+
+    Feed text deltas as they arrive (e.g. from an LLM stream); complete
+    sentences are returned as soon as their boundary is seen. Sentences
+    longer than max_chars are split at a clause boundary or whitespace.
+    """
+
+    def __init__(self, min_chars: int = 12, max_chars: int = 250):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+        self._scan_pos = 0
+
+    def feed(self, text: str) -> List[str]:
+        """Add a text delta and return the sentences it completed."""
+        self._buffer += text
+        return self._drain()
+
+    def flush(self) -> List[str]:
+        """Return whatever text remains as the final sentence(s)."""
+        sentences = self._drain()
+        rest = self._buffer.strip()
+        self._buffer = ""
+        self._scan_pos = 0
+        if rest:
+            sentences.append(rest)
+        return sentences
+
+    def _find_cut(self) -> Optional[int]:
+        buf = self._buffer
+        pos = self._scan_pos
+        while True:
+            match = _SENTENCE_BOUNDARY.search(buf, pos)
+            if match is None:
+                break
+            if match.end() >= self.min_chars:
+                return match.end()
+            pos = match.end()
+
+        if len(buf) > self.max_chars:
+            window = buf[:self.max_chars]
+            clauses = list(_CLAUSE_BOUNDARY.finditer(window))
+            if clauses:
+                return clauses[-1].end()
+            space = window.rfind(" ")
+            return space + 1 if space > 0 else self.max_chars
+
+        # Boundary punctuation may be completed by the next delta; rescan the tail
+        self._scan_pos = max(0, len(buf) - 8)
+        return None
+
+    def _drain(self) -> List[str]:
+        sentences = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                return sentences
+            sentence = self._buffer[:cut].strip()
+            self._buffer = self._buffer[cut:]
+            self._scan_pos = 0
+            if sentence:
+                sentences.append(sentence)
+
+
+def split_sentences(text: str, min_chars: int = 12, max_chars: int = 250) -> List[str]:
+    """Split complete text into TTS-sized sentences (see SentenceSplitter)."""
+    splitter = SentenceSplitter(min_chars=min_chars, max_chars=max_chars)
+    return splitter.feed(text) + splitter.flush()
+
+
+# Map language codes to kokoro-onnx supported languages
+# Supported: en-us, en-gb, es, fr-fr, hi, it, pt-br, ja, zh
+# German (de) is NOT supported - fallback to English
+KOKORO_ONNX_LANG_MAP = {
+    "en": "en-us",
+    "fr": "fr-fr",
+    "es": "es",
+    "it": "it",
+    "hi": "hi",
+    "pt": "pt-br",
+    "ja": "ja",
+    "zh": "zh",
+    "de": "en-us"  # German not supported, fallback to English
+}
+
+
+def _tts_voice_and_lang(model, library_type: str, language: str) -> Tuple[str, str]:
+    """Resolve the backend voice name and language code used for synthesis."""
+    if library_type != "kokoro-onnx":
+        return "default", language.lower()
+
+    lang_code = KOKORO_ONNX_LANG_MAP.get(language.lower(), "en-us")
+
+    # Get available voices and use first one (or default)
+    try:
+        voices = model.get_voices()
+        voice_name = voices[0] if voices else "af_sarah"  # Default voice
+    except:
+        voice_name = "af_sarah"  # Default fallback
+    return voice_name, lang_code
+
+
+def _synthesize(model, library_type: str, text: str, language: str, speed: float) -> Tuple[np.ndarray, int]:
+    """Run one synthesis call on the loaded backend and return (float32 audio, sample_rate)."""
+    if library_type == "kokoro-onnx":
+        # kokoro-onnx API: use create() method with default voice
+        voice_name, lang_code = _tts_voice_and_lang(model, library_type, language)
+        audio_array, sample_rate = model.create(
+            text=text,
+            voice=voice_name,
+            speed=speed,
+            lang=lang_code
+        )
+    else:
+        # kokoro API
+        audio_array = model.generate(text)
+        sample_rate = 22050  # Default for kokoro
+
+    if audio_array is None:
+        return np.zeros(0, dtype=np.float32), sample_rate
+    return np.asarray(audio_array, dtype=np.float32).reshape(-1), sample_rate
+
+
+@st.cache_resource
+def get_tts_single_flight() -> SingleFlight:
+    """
+    Process-wide in-flight dedupe for sentence-level TTS jobs.
+    Kokoro has no batched forward pass, so distinct sentences run as separate
+    jobs on the scheduler's workers; only identical requests are shared.
+    """
+    flight = SingleFlight()
+    _metrics.register_collector("tts_single_flight", flight.metrics)
+    return flight
+
+
+def _synthesize_scheduled(model, library_type: str, text: str, language: str, speed: float,
+                          priority: int = PRIORITY_NORMAL,
+                          deadline: Optional[float] = None) -> Tuple[np.ndarray, int]:
+    """
+    _synthesize on the shared inference scheduler (bounded concurrency across
+    sessions), sharing the job of an identical request already in flight
+    unless TTS_SINGLE_FLIGHT=0.
+    """
+    with _metrics.timer("tts", model="kokoro", backend=library_type):
+        if TTS_SINGLE_FLIGHT_ENABLED:
+            voice_name, lang_code = _tts_voice_and_lang(model, library_type, language)
+            key = (id(model), text, voice_name, float(speed), lang_code)
+            return get_tts_single_flight().run(
+                key, _synthesize, model, library_type, text, language, speed,
+                priority=priority, deadline=deadline
+            )
+        return get_inference_scheduler().run(
+            _synthesize, model, library_type, text, language, speed,
+            priority=priority, deadline=deadline
+        )
+
+
+def _synthesize_cached(model, library_type: str, text: str, language: str, speed: float,
+                       cache: Optional[TTSCache], priority: int = PRIORITY_NORMAL,
+                       deadline: Optional[float] = None) -> Tuple[np.ndarray, int]:
+    """_synthesize_scheduled with a lookup in the segment cache first."""
+    if cache is None:
+        return _synthesize_scheduled(model, library_type, text, language, speed, priority, deadline)
+
+    voice_name, lang_code = _tts_voice_and_lang(model, library_type, language)
+    key = make_cache_key(text, voice_name, speed, lang_code, backend=library_type)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    audio_array, sample_rate = _synthesize_scheduled(
+        model, library_type, text, language, speed, priority, deadline)
+    if len(audio_array) > 0:
+        cache.put(key, audio_array, sample_rate)
+    return audio_array, sample_rate
+
+
+@st.cache_resource
+def get_tts_cache() -> TTSCache:
+    """
+    Process-wide TTS segment cache shared by all sessions.
+    Configured via TTS_CACHE_MAX_BYTES, TTS_CACHE_DIR and TTS_CACHE_DISK_MAX_BYTES.
+
+    Returns:
+        TTSCache instance (use .stats() for hit/miss metrics)
+    """
+    cache = TTSCache(
+        max_bytes=TTS_CACHE_MAX_BYTES,
+        disk_dir=TTS_CACHE_DIR,
+        disk_max_bytes=TTS_CACHE_DISK_MAX_BYTES
+    )
+    _metrics.register_collector("tts_cache", cache.stats)
+    return cache
+
+
+def _smooth_chunk_edges(audio: np.ndarray, sample_rate: int, trim_start: bool, trim_end: bool,
+                        edge_silence_ms: float = 40.0, fade_ms: float = 5.0,
+                        threshold: float = 1e-3) -> np.ndarray:
+    """
+    Prepare a synthesized segment for gapless, click-free concatenation.
+
+    Silence at inner chunk edges is trimmed to edge_silence_ms (so sentence
+    joins sound like natural pauses instead of gaps) and a short raised-cosine
+    fade is applied where a chunk meets its neighbour so that no waveform
+    discontinuity (click) is produced.
+    """
+    voiced = np.flatnonzero(np.abs(audio) > threshold)
+    if len(voiced) == 0:
+        return audio[:0]
+
+    keep = int(sample_rate * edge_silence_ms / 1000)
+    begin = max(0, voiced[0] - keep) if trim_start else 0
+    end = min(len(audio), voiced[-1] + 1 + keep) if trim_end else len(audio)
+    audio = audio[begin:end].copy()
+
+    fade = min(int(sample_rate * fade_ms / 1000), len(audio) // 2)
+    if fade > 0:
+        ramp = (0.5 - 0.5 * np.cos(np.linspace(0.0, np.pi, fade, dtype=np.float32)))
+        if trim_start:
+            audio[:fade] *= ramp
+        if trim_end:
+            audio[-fade:] *= ramp[::-1]
+    return audio
+
+
+def text_to_speech_stream(text: str, language: str = "de", speed: float = 1.0,
+                          max_chars: int = 250, use_cache: bool = True, priority: int = PRIORITY_NORMAL,
+                          deadline_s: Optional[float] = None) -> Iterator[Tuple[np.ndarray, int]]:
+    """
+    Convert text to speech incrementally, one sentence (or clause) at a time.
+
+    Text is segmented with split_sentences and every segment is synthesized
+    on its own, so playback can start after the first chunk instead of after
+    the whole reply. Chunk edges are trimmed and faded so the chunks can be
+    played back-to-back without clicks or gaps. Works with both the
+    kokoro-onnx and kokoro (KPipeline) backends.
+
+    Args:
+        text: Text to convert to speech
+        language: Language code (default: "de" for German)
+        speed: Speech speed multiplier (default: 1.0)
+        max_chars: Maximum characters per synthesized segment
+        use_cache: Reuse previously synthesized segments (see get_tts_cache)
+        priority: Scheduling priority on the shared inference scheduler
+        deadline_s: Give up if the whole text is not synthesized within this many seconds
+
+    Yields:
+        Tuples of (float32 PCM array, sample_rate)
+
+    Raises:
+        ImportError: If TTS libraries are not available
+        RuntimeError: If TTS generation fails
+        ValueError: If text is empty
+        SchedulerFull: If the inference queue is full (caller should back off)
+        DeadlineExceeded: If deadline_s passed before synthesis finished
+    """
+    if not TTS_AVAILABLE:
+        raise ImportError("TTS functionality is not available. Please install kokoro-onnx library: pip install kokoro-onnx")
+
+    if not text or not text.strip():
+        raise ValueError("Text is empty")
+
+    segments = split_sentences(text, max_chars=max_chars)
+    deadline = deadline_after(deadline_s)
+
+    try:
+        # Load model (cached)
+        model, library_type = load_tts_model()
+    except Exception as e:
+        raise RuntimeError(f"Failed to generate speech: {str(e)}")
+
+    cache = get_tts_cache() if use_cache else None
+    yield from _synthesize_segments(
+        model, library_type, segments, language, speed, cache, priority, deadline)
+
+
+def _synthesize_segments(model, library_type: str, segments: List[str], language: str, speed: float,
+                         cache: Optional[TTSCache], priority: int = PRIORITY_NORMAL,
+                         deadline: Optional[float] = None) -> Iterator[Tuple[np.ndarray, int]]:
+    """Synthesize segments in order, yielding edge-smoothed chunks ready for concatenation."""
+    for i, segment in enumerate(segments):
+        try:
+            audio_array, sample_rate = _synthesize_cached(
+                model, library_type, segment, language, speed, cache, priority, deadline)
+        except (SchedulerFull, DeadlineExceeded):
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate speech: {str(e)}")
+
+        audio_array = _smooth_chunk_edges(
+            audio_array, sample_rate,
+            trim_start=i > 0,
+            trim_end=i < len(segments) - 1
+        )
+        if len(audio_array) > 0:
+            yield audio_array, sample_rate
+
+
+def text_to_speech_pcm(text: str, language: str = "de", speed: float = 1.0, use_cache: bool = True,
+                       priority: int = PRIORITY_NORMAL, deadline_s: Optional[float] = None,
+                       dtype=np.float32) -> Tuple[np.ndarray, int]:
     """
-    Convert text to speech audio using Kokoro model.
+    Convert text to raw PCM using Kokoro model.
+
+    With use_cache, the text is synthesized sentence by sentence through the
+    process-wide segment cache, so repeated sentences (openers, closers,
+    stock answers) are not re-synthesized even inside otherwise new replies.
     
     Args:
         text: Text to convert to speech
         language: Language code (default: "de" for German)
-        speed: Speech speed multiplier (default: 1.0, currently not used)
+        speed: Speech speed multiplier (default: 1.0)
+        use_cache: Reuse previously synthesized sentences (see get_tts_cache)
+        priority: Scheduling priority on the shared inference scheduler
+        deadline_s: Give up if synthesis has not finished within this many seconds
+        dtype: np.float32 (samples in [-1, 1]) or np.int16
     
     Returns:
-        Audio bytes in WAV format
+        Tuple of (mono PCM array, sample_rate); use pcm_buffer() for a
+        memoryview over the samples
     
     Raises:
         ImportError: If TTS libraries are not available
         RuntimeError: If TTS generation fails
         ValueError: If text is empty
+        SchedulerFull: If the inference queue is full (caller should back off)
+        DeadlineExceeded: If deadline_s passed before synthesis finished
     """
     if not TTS_AVAILABLE:
         raise ImportError("TTS functionality is not available. Please install kokoro-onnx library: pip install kokoro-onnx")
@@ -259,58 +1198,33 @@ def text_to_speech(text: str, language: str = "de", speed: float = 1.0) -> bytes
     if not text or not text.strip():
         raise ValueError("Text is empty")
     
+    deadline = deadline_after(deadline_s)
     try:
         # Load model (cached)
         model, library_type = load_tts_model()
         
         # Generate speech
-        if library_type == "kokoro-onnx":
-            # kokoro-onnx API: use create() method with default voice
-            # Map language codes to kokoro-onnx supported languages
-            # Supported: en-us, en-gb, es, fr-fr, hi, it, pt-br, ja, zh
-            # German (de) is NOT supported - fallback to English
-            lang_map = {
-                "en": "en-us",
-                "fr": "fr-fr",
-                "es": "es",
-                "it": "it",
-                "hi": "hi",
-                "pt": "pt-br",
-                "ja": "ja",
-                "zh": "zh",
-                "de": "en-us"  # German not supported, fallback to English
-            }
-            lang_code = lang_map.get(language.lower(), "en-us")
-            
-            # Get available voices and use first one (or default)
-            try:
-                voices = model.get_voices()
-                voice_name = voices[0] if voices else "af_sarah"  # Default voice
-            except:
-                voice_name = "af_sarah"  # Default fallback
-            
-            audio_array, sample_rate = model.create(
-                text=text,
-                voice=voice_name,
-                speed=speed,
-                lang=lang_code
-            )
+        if use_cache:
+            chunks = list(_synthesize_segments(
+                model, library_type, split_sentences(text), language, speed, get_tts_cache(),
+                priority, deadline))
+            sample_rate = chunks[0][1] if chunks else 24000
+            if len(chunks) == 1:
+                audio_array = chunks[0][0]
+            else:
+                audio_array = np.concatenate([c for c, _ in chunks]) if chunks else None
         else:
-            # kokoro API
-            audio_array = model.generate(text)
-            sample_rate = 22050  # Default for kokoro
+            audio_array, sample_rate = _synthesize_scheduled(
+                model, library_type, text, language, speed, priority, deadline)
         
         # Validate audio array
         if audio_array is None or len(audio_array) == 0:
             raise ValueError("Generated audio array is empty")
         
-        # Convert to bytes
-        audio_bytes_io = io.BytesIO()
-        sf.write(audio_bytes_io, audio_array, sample_rate, format='WAV')
-        audio_bytes_io.seek(0)
-        
-        return audio_bytes_io.read()
-    except ImportError:
+        if np.dtype(dtype) == np.int16:
+            audio_array = to_pcm16(audio_array)
+        return audio_array, sample_rate
+    except (ImportError, SchedulerFull, DeadlineExceeded):
         raise
     except ValueError:
         raise
@@ -318,6 +1232,54 @@ def text_to_speech(text: str, language: str = "de", speed: float = 1.0) -> bytes
         raise RuntimeError(f"Failed to generate speech: {str(e)}")
 
 
+def text_to_speech(text: str, language: str = "de", speed: float = 1.0, use_cache: bool = True,
+                   priority: int = PRIORITY_NORMAL, deadline_s: Optional[float] = None) -> bytes:
+    """
+    Convert text to speech audio in WAV format (see text_to_speech_pcm for
+    the arguments and errors). Consumers that play or re-encode the audio
+    should use text_to_speech_pcm and skip the WAV container.
+
+    Returns:
+        Audio bytes in WAV format
+    """
+    audio_array, sample_rate = text_to_speech_pcm(
+        text, language, speed, use_cache=use_cache, priority=priority, deadline_s=deadline_s)
+    return encode_wav(audio_array, sample_rate)
+
+
+def to_pcm16(audio_array: np.ndarray) -> np.ndarray:
+    """Float samples in [-1, 1] to int16 PCM (int16 input is returned as-is)."""
+    if audio_array.dtype == np.int16:
+        return audio_array
+    return (np.clip(audio_array, -1.0, 1.0) * 32767.0).astype(np.int16)
+
+
+def pcm_buffer(audio_array: np.ndarray) -> memoryview:
+    """Byte memoryview over a PCM array (no copy for contiguous arrays)."""
+    return memoryview(np.ascontiguousarray(audio_array)).cast("B")
+
+
+def encode_wav(audio_array: np.ndarray, sample_rate: int) -> bytes:
+    """Wrap PCM in a WAV container and return it as bytes."""
+    audio_bytes_io = io.BytesIO()
+    sf.write(audio_bytes_io, audio_array, sample_rate, format='WAV')
+    # getvalue() hands over the internal buffer instead of copying it like seek(0) + read()
+    return audio_bytes_io.getvalue()
+
+
+def encode_wav_view(audio_array: np.ndarray, sample_rate: int) -> memoryview:
+    """
+    Wrap PCM in a WAV container and return a view of the buffer it was written
+    to (BytesIO.getbuffer) instead of a bytes object.
+
+    For consumers that accept any buffer (sockets, file writes). The view
+    keeps the BytesIO alive; release() it when done. Not accepted by st.audio.
+    """
+    audio_bytes_io = io.BytesIO()
+    sf.write(audio_bytes_io, audio_array, sample_rate, format='WAV')
+    return audio_bytes_io.getbuffer()
+
+
 def get_audio_bytes(audio_array: np.ndarray, sample_rate: int = 22050) -> bytes:
     """
     Convert audio numpy array to bytes for Streamlit.
@@ -330,21 +1292,139 @@ def get_audio_bytes(audio_array: np.ndarray, sample_rate: int = 22050) -> bytes:
         Audio bytes in WAV format
     """
     try:
-        audio_bytes_io = io.BytesIO()
-        sf.write(audio_bytes_io, audio_array, sample_rate, format='WAV')
-        audio_bytes_io.seek(0)
-        return audio_bytes_io.read()
+        return encode_wav(audio_array, sample_rate)
     except Exception as e:
         raise ValueError(f"Failed to convert audio array to bytes: {str(e)}")
 
 
+# ============================================
+# Model Preload and Warm-up
+# ============================================
+
+_readiness_lock = threading.Lock()
+_readiness = {
+    "stt": {"status": "not_started"},
+    "tts": {"status": "not_started"},
+}
+
+
+def _set_readiness(model: str, **fields):
+    with _readiness_lock:
+        _readiness[model].update(fields)
+
+
+def get_model_readiness() -> dict:
+    """
+    Readiness of the STT and TTS models for a UI badge or health endpoint.
+
+    Returns:
+        Dictionary {"stt": {...}, "tts": {...}} where each entry has a
+        "status" of not_started, loading, warming, ready, unavailable or
+        failed, plus load_s / warmup_s / ready_s timings and error once known
+    """
+    with _readiness_lock:
+        return {name: dict(state) for name, state in _readiness.items()}
+
+
+def models_ready(models: Tuple[str, ...] = ("stt", "tts")) -> bool:
+    """True once every requested model is warmed up (or not installed at all)."""
+    state = get_model_readiness()
+    return all(state[m]["status"] in ("ready", "unavailable") for m in models)
+
+
+def _preload_model(name: str, available: bool, load, warm_up):
+    if not available:
+        _set_readiness(name, status="unavailable")
+        return
+    start = time.perf_counter()
+    try:
+        _set_readiness(name, status="loading")
+        loaded = load()
+        load_s = time.perf_counter() - start
+        _set_readiness(name, status="warming", load_s=load_s)
+        warm_up(loaded)
+        ready_s = time.perf_counter() - start
+        _set_readiness(name, status="ready", warmup_s=ready_s - load_s, ready_s=ready_s)
+        logger.info("%s model ready in %.2fs (load %.2fs, warm-up %.2fs)",
+                    name.upper(), ready_s, load_s, ready_s - load_s)
+    except Exception as e:
+        _set_readiness(name, status="failed", error=str(e))
+        logger.warning("%s model preload failed: %s", name.upper(), e)
+
+
+def _warm_up_stt(pipe):
+    # One second of faint noise runs the feature extractor, encoder and decoder once
+    noise = (np.random.default_rng(0).standard_normal(16000) * 1e-3).astype(np.float32)
+    _run_stt_pipeline(pipe, noise, 16000, "en", long_form=False)
+
+
+def _warm_up_tts(loaded):
+    model, library_type = loaded
+    _synthesize(model, library_type, "Hello.", "en", 1.0)
+
+
+@st.cache_resource
+def start_model_preload(stt: bool = True, tts: bool = True) -> List[threading.Thread]:
+    """
+    Load and warm up the STT and TTS models in background threads.
+    Cached, so the threads are started once per process; later calls to
+    get_stt_pipeline / load_tts_model with default arguments hit the cache.
+
+    Args:
+        stt: Preload the STT model
+        tts: Preload the TTS model
+
+    Returns:
+        List of the started daemon threads
+    """
+    threads = []
+    if stt:
+        threads.append(threading.Thread(
+            target=_preload_model, name="preload-stt",
+            args=("stt", STT_AVAILABLE, get_stt_pipeline, _warm_up_stt), daemon=True))
+    if tts:
+        threads.append(threading.Thread(
+            target=_preload_model, name="preload-tts",
+            args=("tts", TTS_AVAILABLE, load_tts_model, _warm_up_tts), daemon=True))
+    for thread in threads:
+        thread.start()
+    return threads
+
+
 # ============================================
 # Helper Functions
 # ============================================
 
+def cuda_available() -> bool:
+    """
+    Check for a usable CUDA device without importing torch.
+
+    Uses torch if it is already loaded; otherwise asks the CUDA driver
+    directly (cuInit + cuDeviceGetCount), which costs milliseconds instead
+    of a full torch import.
+    """
+    if "torch" in sys.modules:
+        return sys.modules["torch"].cuda.is_available()
+    if os.environ.get("CUDA_VISIBLE_DEVICES", None) in ("", "-1"):
+        return False
+
+    import ctypes
+    for name in ("libcuda.so.1", "libcuda.so", "libcuda.dylib", "nvcuda.dll"):
+        try:
+            libcuda = ctypes.CDLL(name)
+        except OSError:
+            continue
+        count = ctypes.c_int(0)
+        if libcuda.cuInit(0) != 0:
+            return False
+        return libcuda.cuDeviceGetCount(ctypes.byref(count)) == 0 and count.value > 0
+    return False
+
+
 def check_audio_support() -> dict:
     """
     Check which audio features are available.
+    Does not import torch, transformers or kokoro.
     
     Returns:
         Dictionary with availability status for STT and TTS
@@ -352,5 +1432,5 @@ def check_audio_support() -> dict:
     return {
         "stt_available": STT_AVAILABLE,
         "tts_available": TTS_AVAILABLE,
-        "cuda_available": torch.cuda.is_available() if torch else False
+        "cuda_available": cuda_available()
     }
@@ -0,0 +1,73 @@
+"""
+Benchmark: new AzureOpenAI client per turn vs. the shared pooled client.
+
+Runs against a local fake endpoint that sleeps --handshake-delay per new
+connection to stand in for DNS/TCP/TLS setup to a remote region. Fails if
+the shared client opens more than one connection for sequential turns.
+
+    python benchmarks/bench_azure_client.py --turns 50 --handshake-delay 0.05
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import AzureOpenAI  # noqa: E402
+
+import app  # noqa: E402
+from benchmarks.fake_azure import FakeAzureServer  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "What should I improve?"}]
+
+
+def fresh_client() -> AzureOpenAI:
+    """The old behaviour: a new client (and connection pool) per call."""
+    return AzureOpenAI(api_key=app.AZURE_API_KEY, api_version=app.AZURE_API_VERSION,
+                       azure_endpoint=app.AZURE_ENDPOINT)
+
+
+def run(server: FakeAzureServer, get_client, turns: int) -> dict:
+    """Time `turns` streamed calls and count the connections they opened."""
+    app.get_azure_client = get_client
+    connections_before = server.connections
+    latencies = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        app.call_azure_api(MESSAGES)
+        latencies.append(time.perf_counter() - start)
+    return {
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "connections": server.connections - connections_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--handshake-delay", type=float, default=0.05,
+                        help="seconds slept per new connection (emulated TLS setup)")
+    args = parser.parse_args()
+
+    with FakeAzureServer(handshake_delay=args.handshake_delay) as server:
+        app.AZURE_API_KEY = "bench"
+        app.AZURE_ENDPOINT = server.url
+        shared = app.get_azure_client
+        results = {
+            "client per call": run(server, fresh_client, args.turns),
+            "shared pooled client": run(server, shared, args.turns),
+        }
+
+    print(f"{'mode':<22}{'mean ms':>10}{'p50 ms':>10}{'connections':>13}")
+    for name, r in results.items():
+        print(f"{name:<22}{r['mean_ms']:>10.2f}{r['p50_ms']:>10.2f}{r['connections']:>13}")
+
+    reused = results["shared pooled client"]["connections"]
+    assert reused == 1, f"shared client opened {reused} connections for {args.turns} turns (expected 1)"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Per-frame CPU cost of the telephony audio path.
+
+Inbound: a 20 ms G.711 frame (8 kHz) to 16 kHz float32 for Whisper, via a
+WAV container + convert_audio_format (old path) vs. G711Decoder.
+Outbound: 20 ms of 24 kHz TTS audio to 8 kHz G.711, via a WAV blob +
+soundfile re-encode (old path) vs. G711Encoder.
+
+    python benchmarks/bench_g711.py --frames 2000
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_utils import convert_audio_format, resample_audio  # noqa: E402
+from g711 import G711_LAWS, G711Decoder, G711Encoder, g711_decode, g711_encode  # noqa: E402
+
+SUBTYPES = {"ulaw": "ULAW", "alaw": "ALAW"}
+
+
+def per_frame_us(func, frames: list) -> float:
+    start = time.perf_counter()
+    for frame in frames:
+        func(frame)
+    return (time.perf_counter() - start) / len(frames) * 1e6
+
+
+def old_inbound(frame: bytes, law: str) -> np.ndarray:
+    buffer = io.BytesIO()
+    pcm = g711_decode(frame, law)
+    sf.write(buffer, pcm, 8000, format="WAV", subtype=SUBTYPES[law])
+    return convert_audio_format(buffer.getvalue())[0]
+
+
+def old_outbound(audio: np.ndarray, law: str) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, 24000, format="WAV")
+    buffer.seek(0)
+    decoded, sample_rate = sf.read(io.BytesIO(buffer.read()), dtype="float32")
+    out = io.BytesIO()
+    sf.write(out, resample_audio(decoded, sample_rate, 8000), 8000, format="RAW", subtype=SUBTYPES[law])
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--frame-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    in_samples = int(8000 * args.frame_ms / 1000)
+    out_samples = int(24000 * args.frame_ms / 1000)
+
+    print(f"{args.frame_ms:.0f} ms frames, {args.frames} frames per measurement (microseconds per frame)")
+    print(f"{'law':<6}{'direction':<10}{'old us':>10}{'new us':>10}{'speedup':>9}")
+    for law in G711_LAWS:
+        speech = (rng.standard_normal(in_samples * args.frames) * 0.1).astype(np.float32)
+        payload = g711_encode(speech, law)
+        frames_in = [payload[i:i + in_samples] for i in range(0, len(payload), in_samples)]
+        decoder = G711Decoder(law, sample_rate=16000)
+        old = per_frame_us(lambda f: old_inbound(f, law), frames_in)
+        new = per_frame_us(decoder.decode, frames_in)
+        print(f"{law:<6}{'in':<10}{old:>10.1f}{new:>10.1f}{old / new:>8.1f}x")
+
+        tts = (rng.standard_normal(out_samples * args.frames) * 0.1).astype(np.float32)
+        frames_out = [tts[i:i + out_samples] for i in range(0, len(tts), out_samples)]
+        encoder = G711Encoder(law, sample_rate=24000, frame_ms=args.frame_ms)
+        old = per_frame_us(lambda a: old_outbound(a, law), frames_out)
+        new = per_frame_us(encoder.encode, frames_out)
+        print(f"{law:<6}{'out':<10}{old:>10.1f}{new:>10.1f}{old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
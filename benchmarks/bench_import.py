@@ -0,0 +1,61 @@
+"""
+Startup cost of importing audio_utils: wall time and peak RSS.
+
+"eager" imports the heavy STT/TTS libraries up front, as audio_utils used
+to at module import time; "lazy" imports audio_utils alone, as a text-only
+session does now. Each variant runs in a fresh interpreter.
+
+    python benchmarks/bench_import.py --repeat 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{imports}
+import audio_utils
+audio_utils.check_audio_support()
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024
+print(json.dumps({{"seconds": elapsed, "rss_mb": rss_kb / 1024,
+                  "torch_loaded": "torch" in sys.modules}}))
+"""
+
+EAGER_IMPORTS = """
+for name in ("torch", "transformers", "kokoro_onnx", "kokoro"):
+    try:
+        __import__(name)
+    except ImportError:
+        pass
+"""
+
+
+def measure(imports: str) -> dict:
+    code = PROBE.format(root=ROOT, imports=imports)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'seconds':>10}{'rss MB':>10}{'torch':>8}")
+    for name, imports in (("eager", EAGER_IMPORTS), ("lazy", "")):
+        runs = [measure(imports) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["seconds"])
+        print(f"{name:<8}{best['seconds']:>10.3f}{best['rss_mb']:>10.1f}{str(best['torch_loaded']):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: overhead of the per-stage instrumentation.
+
+Times an empty block, the same block inside MetricsRegistry.timer (enabled
+and disabled), observe() and count(), and how long a Prometheus / JSON
+render of a populated registry takes. Compare the per-call cost with the
+millisecond-scale stages it measures.
+
+    python benchmarks/bench_metrics.py --calls 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import MetricsRegistry  # noqa: E402
+
+
+def per_call_ns(fn, calls: int) -> float:
+    start = time.perf_counter()
+    fn(calls)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--series", type=int, default=40, help="label sets in the rendered registry")
+    args = parser.parse_args()
+
+    enabled = MetricsRegistry(enabled=True)
+    disabled = MetricsRegistry(enabled=False)
+
+    def bare(n):
+        for _ in range(n):
+            pass
+
+    def timed(registry):
+        def run(n):
+            for _ in range(n):
+                with registry.timer("stt", model="distil-large-v3", backend="hf"):
+                    pass
+        return run
+
+    def observe(n):
+        for _ in range(n):
+            enabled.observe("llm_ttft", 0.25, model="gpt-4o", backend="azure")
+
+    def count(n):
+        for _ in range(n):
+            enabled.count("stage_errors", stage="tts")
+
+    results = {
+        "empty block": per_call_ns(bare, args.calls),
+        "timer (enabled)": per_call_ns(timed(enabled), args.calls),
+        "timer (METRICS=0)": per_call_ns(timed(disabled), args.calls),
+        "observe": per_call_ns(observe, args.calls),
+        "count": per_call_ns(count, args.calls),
+    }
+
+    registry = MetricsRegistry(enabled=True)
+    for i in range(args.series):
+        for _ in range(2048):
+            registry.observe(f"stage{i % 6}", 0.01 * (i + 1), model=f"m{i}", backend="b")
+    start = time.perf_counter()
+    text = registry.prometheus_text()
+    prometheus_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    registry.to_json()
+    json_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{'operation':<22}{'ns/call':>10}")
+    for name, ns in results.items():
+        print(f"{name:<22}{ns:>10.0f}")
+    print(f"render {args.series} series: prometheus {prometheus_ms:.2f} ms "
+          f"({len(text.splitlines())} lines), json {json_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
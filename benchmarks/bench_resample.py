@@ -0,0 +1,55 @@
+"""
+Micro-benchmark: FFT resampling (old convert_audio_format path) vs. the
+cached polyphase resampler, for typical browser and telephony rates.
+
+    python benchmarks/bench_resample.py --seconds 30
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import signal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_utils import resample_audio  # noqa: E402
+
+RATE_PAIRS = [(48000, 16000), (44100, 16000), (22050, 16000), (8000, 16000), (24000, 8000)]
+
+
+def old_path(audio: np.ndarray, src: int, dst: int) -> np.ndarray:
+    """float64 FFT resample, then float32 conversion (previous behaviour)."""
+    audio = audio.astype(np.float64)
+    resampled = signal.resample(audio, int(len(audio) * dst / src))
+    return resampled.astype(np.float32)
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=30.0, help="clip length")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'rates':<16}{'fft ms':>10}{'poly ms':>10}{'speedup':>9}")
+    for src, dst in RATE_PAIRS:
+        audio = (rng.standard_normal(int(src * args.seconds)) * 0.1).astype(np.float32)
+        resample_audio(audio[:src], src, dst)  # filter design is cached after this
+        fft = best_of(lambda: old_path(audio, src, dst), args.repeat)
+        poly = best_of(lambda: resample_audio(audio, src, dst), args.repeat)
+        print(f"{src}->{dst:<10}{fft * 1000:>10.1f}{poly * 1000:>10.1f}{fft / poly:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark: tail latency and error rate of call_azure_api under injected faults.
+
+Sends --requests streamed calls from --concurrency threads to a local fake
+endpoint that fails a share of requests (503, or 429 with Retry-After) and
+delays another share by --slow-delay seconds (a slow region). Compares a
+single attempt per call with the resilient layer (retries, and hedging
+after the p95 time to first token), then shows the circuit breaker failing
+fast during a full outage and recovering after a cancelled half-open probe
+(a barge-in during the probe must not leave the circuit stuck).
+
+    python benchmarks/bench_resilience.py --requests 300 --error-rate 0.1 --slow-rate 0.05
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from benchmarks.fake_azure import FakeAzureServer  # noqa: E402
+from resilient_call import CircuitBreaker, LLMCallError, ResilientCaller  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "What should I improve?"}]
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def run(server: FakeAzureServer, caller: ResilientCaller, requests: int, concurrency: int) -> dict:
+    """Send requests through caller; return latency percentiles and the error rate."""
+    app.get_llm_caller = lambda: caller
+    requests_before = server.requests
+
+    def one(_):
+        start = time.perf_counter()
+        try:
+            app.call_azure_api(MESSAGES)
+            ok = True
+        except LLMCallError:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    latencies = [seconds for ok, seconds in results if ok]
+    stats = caller.stats()
+    return {
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": (statistics.mean(latencies) if latencies else 0.0) * 1000,
+        "error_rate": 1 - len(latencies) / requests,
+        "upstream": server.requests - requests_before,
+        "retries": stats["retries"],
+        "hedges": stats["hedges"],
+    }
+
+
+async def cancelled_probe(reset_timeout: float = 0.2) -> str:
+    """Open a breaker, cancel its half-open probe, then report how the next calls fare."""
+    caller = ResilientCaller(attempt_timeout=5, total_timeout=5, max_attempts=1,
+                             breaker=CircuitBreaker(failure_threshold=1, reset_timeout=reset_timeout))
+
+    async def fail(timeout):
+        raise ConnectionError("down")
+
+    async def hang(timeout):
+        await asyncio.sleep(timeout)
+
+    async def ok(timeout):
+        return "ok"
+
+    try:
+        await caller.call_async(fail)
+    except LLMCallError:
+        pass
+    await asyncio.sleep(reset_timeout)
+    probe = asyncio.ensure_future(caller.call_async(hang))
+    await asyncio.sleep(0.01)
+    probe.cancel()
+    await asyncio.gather(probe, return_exceptions=True)
+    outcomes = []
+    for _ in range(3):
+        try:
+            outcomes.append(await caller.call_async(ok))
+        except LLMCallError as e:
+            outcomes.append(type(e).__name__)
+    return f"{', '.join(outcomes)} (circuit {caller.breaker.state})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--error-rate", type=float, default=0.1, help="share of 503 / 429 responses")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="share of slow requests")
+    parser.add_argument("--slow-delay", type=float, default=2.0, help="seconds a slow request takes")
+    parser.add_argument("--token-delay", type=float, default=0.05, help="normal time to first token")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    def fault(index):
+        draw = rng.random()
+        if draw < args.error_rate / 2:
+            return 503, {}
+        if draw < args.error_rate:
+            return 429, {"Retry-After": "0.2"}
+        return None
+
+    def delay(index):
+        return args.slow_delay if rng.random() < args.slow_rate else 0.0
+
+    def single():
+        return ResilientCaller(attempt_timeout=30, total_timeout=30, max_attempts=1,
+                               breaker=CircuitBreaker(failure_threshold=0), retryable=app.is_retryable_error)
+
+    def resilient(hedge):
+        return ResilientCaller(attempt_timeout=5, total_timeout=15, max_attempts=3, backoff_base=0.05,
+                               hedge=hedge, hedge_min_samples=20,
+                               breaker=CircuitBreaker(failure_threshold=20, reset_timeout=1.0),
+                               retryable=app.is_retryable_error)
+
+    results = {}
+    with FakeAzureServer(token_delay=args.token_delay) as server:
+        app.AZURE_API_KEY = "bench"
+        app.AZURE_ENDPOINT = server.url
+        server.fault, server.delay = fault, delay
+        results["single attempt"] = run(server, single(), args.requests, args.concurrency)
+        results["retries"] = run(server, resilient(False), args.requests, args.concurrency)
+        results["retries + hedging"] = run(server, resilient(True), args.requests, args.concurrency)
+
+        # Full outage: the breaker opens and later calls fail without reaching the server
+        server.fault, server.delay = (lambda index: (503, {})), None
+        outage = resilient(False)
+        outage.breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+        results["outage + breaker"] = run(server, outage, 50, 1)
+        opened = outage.stats()["circuit"]
+
+    print(f"{'mode':<20}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>9}{'upstream':>10}{'retries':>9}{'hedges':>8}")
+    for name, r in results.items():
+        print(f"{name:<20}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['error_rate']:>9.1%}"
+              f"{r['upstream']:>10}{r['retries']:>9}{r['hedges']:>8}")
+    print(f"circuit after outage: {opened}")
+    print(f"calls after a cancelled probe: {asyncio.run(cancelled_probe())}")
+
+
+if __name__ == "__main__":
+    main()
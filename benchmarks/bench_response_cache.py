@@ -0,0 +1,90 @@
+"""
+Benchmark: opening questions with and without the response cache.
+
+Replays --sessions sessions that each open with one of a few common
+questions (with varying case, punctuation and whitespace) against the same
+QA scores. Calls go to a local fake endpoint that waits --token-delay
+seconds before replying. Reports hit rate, mean latency and saved API time.
+
+    python benchmarks/bench_response_cache.py --sessions 200 --token-delay 0.3
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from benchmarks.fake_azure import FakeAzureServer  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+
+OPENERS = [
+    "What should I improve?",
+    "What should I improve first?",
+    "Explain my scores",
+    "How good is my portrait?",
+    "What is my weakest category?",
+]
+
+
+def variant(rng: random.Random, text: str) -> str:
+    """Near-duplicate spelling of text: case, trailing punctuation, spaces."""
+    text = rng.choice([text, text.lower(), text.upper()])
+    text = text.rstrip("?!.") + rng.choice(["", "?", "??", "!", " ?"])
+    return rng.choice(["", " "]) + text.replace(" ", rng.choice([" ", "  "]))
+
+
+def run(server: FakeAzureServer, questions: list, cache) -> dict:
+    """Answer every opening question, through the cache if one is given."""
+    requests_before = server.requests
+    latencies = []
+    for question in questions:
+        messages = [{"role": "user", "content": question}]
+        api_messages = app.build_api_messages(app.DEFAULT_QA_SCORES_JSON, messages)
+        start = time.perf_counter()
+        key = app.response_cache_key(app.DEFAULT_QA_SCORES_JSON, messages) if cache else None
+        reply = cache.get(key) if cache else None
+        if reply is None:
+            reply = app.call_azure_api(api_messages)
+            if cache:
+                cache.put(key, reply, time.perf_counter() - start)
+        latencies.append(time.perf_counter() - start)
+    return {
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "api_calls": server.requests - requests_before,
+        "stats": cache.stats() if cache else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--token-delay", type=float, default=0.3,
+                        help="seconds the fake endpoint waits before replying")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    questions = [variant(rng, rng.choice(OPENERS)) for _ in range(args.sessions)]
+
+    with FakeAzureServer(token_delay=args.token_delay) as server:
+        app.AZURE_API_KEY = "bench"
+        app.AZURE_ENDPOINT = server.url
+        results = {
+            "no cache": run(server, questions, None),
+            "response cache": run(server, questions, ResponseCache()),
+        }
+
+    print(f"{'mode':<16}{'mean ms':>10}{'p50 ms':>10}{'api calls':>11}{'hit rate':>10}{'saved s':>10}")
+    for name, r in results.items():
+        s = r["stats"] or {"hit_rate": 0.0, "saved_seconds": 0.0}
+        print(f"{name:<16}{r['mean_ms']:>10.2f}{r['p50_ms']:>10.2f}{r['api_calls']:>11}"
+              f"{s['hit_rate']:>10.1%}{s['saved_seconds']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
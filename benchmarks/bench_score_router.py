@@ -0,0 +1,117 @@
+"""
+Benchmark: precision, coverage and latency of the local score-lookup router.
+
+Runs ScoreIndex.answer over a labeled set of user messages (English, German,
+Ukrainian) against DEFAULT_QA_SCORES_JSON. Each label is the expected
+(intent, category) for a local answer, or None where the turn must go to
+the LLM. Precision counts local answers that match their label; coverage
+is the share of answerable lookups that were answered locally.
+
+    python benchmarks/bench_score_router.py
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from score_lookup import ScoreIndex  # noqa: E402
+
+LIGHT = "Use of Light and Shadow"
+COMPOSITION = "Composition and Design"
+PROPORTIONS = "Proportions and Anatomy"
+COLOR = "Color Theory and Application"
+DETAIL = "Attention to Detail"
+
+LABELED = [
+    # Score lookups
+    ("What was my score for light and shadow?", ("score", LIGHT)),
+    ("whats my composition score", ("score", COMPOSITION)),
+    ("Score for proportions?", ("score", PROPORTIONS)),
+    ("What's my rating for color?", ("score", COLOR)),
+    ("How many points did I get for details?", ("score", DETAIL)),
+    ("my depth score please", ("score", "Perspective and Depth")),
+    ("What is the score for brushwork", ("score", "Brushwork and Technique")),
+    ("Tell me my expression score", ("score", "Expression and Emotion")),
+    ("overall impact score?", ("score", "Overall Impact")),
+    ("creativity score", ("score", "Creativity and Originality")),
+    ("Wie viele Punkte habe ich für Komposition?", ("score", COMPOSITION)),
+    ("Welche Note hab ich bei Licht und Schatten?", ("score", LIGHT)),
+    ("Meine Bewertung für Farbe?", ("score", COLOR)),
+    ("Punktzahl für Proportionen", ("score", PROPORTIONS)),
+    ("Яка моя оцінка за світло і тінь?", ("score", LIGHT)),
+    ("Скільки балів за композицію?", ("score", COMPOSITION)),
+    ("Оцінка за пропорції", ("score", PROPORTIONS)),
+    ("яку оцінку я отримав за деталі", ("score", DETAIL)),
+    # Feedback lookups
+    ("What's the feedback on proportions?", ("feedback", PROPORTIONS)),
+    ("Show me the feedback for light and shadow", ("feedback", LIGHT)),
+    ("composition feedback", ("feedback", COMPOSITION)),
+    # All scores
+    ("Show me all my scores", ("all", None)),
+    ("What are all my scores?", ("all", None)),
+    ("Alle Noten bitte", ("all", None)),
+    ("Покажи всі мої оцінки", ("all", None)),
+    # Must go to the LLM
+    ("How can I improve my light score?", None),
+    ("Why is my light score so low?", None),
+    ("What should I improve?", None),
+    ("Explain my composition score", None),
+    ("score for light and color", None),
+    ("What's my lowest score?", None),
+    ("What is my overall score?", None),
+    ("Is my proportion score good compared to my color score?", None),
+    ("Hi!", None),
+    ("Thanks, that helps", None),
+    ("Was bedeutet meine Note für Licht?", None),
+    ("Wie kann ich meine Komposition verbessern?", None),
+    ("Чому така низька оцінка за світло?", None),
+    ("Як мені покращити композицію?", None),
+    ("What does the feedback on proportions mean?", None),
+    ("Was ist das Feedback zu Farbe?", None),
+    ("Tell me more about the shadows", None),
+    ("Which category has the highest score?", None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=1000,
+                        help="timing repetitions per message")
+    parser.add_argument("--verbose", action="store_true", help="print every routing decision")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = ScoreIndex(app.DEFAULT_QA_SCORES_JSON)
+    build_us = (time.perf_counter() - start) * 1e6
+
+    answered = correct = answerable = covered = 0
+    latencies = []
+    for message, label in LABELED:
+        result = index.answer(message)
+        got = (result["intent"], result["category"]) if result else None
+        answered += got is not None
+        correct += got is not None and got == label
+        answerable += label is not None
+        covered += label is not None and got == label
+        if args.verbose or got != label:
+            mark = "ok  " if got == label else "MISS" if got is None else "WRONG"
+            print(f"{mark} {message!r} -> {got} (expected {label})")
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            index.answer(message)
+        latencies.append((time.perf_counter() - start) / args.repeat * 1e6)
+
+    print(f"{len(LABELED)} labeled messages, {answerable} answerable locally")
+    print(f"precision {correct / answered if answered else 0.0:.1%} ({correct}/{answered} local answers correct)")
+    print(f"coverage  {covered / answerable if answerable else 0.0:.1%} ({covered}/{answerable} lookups answered locally)")
+    print(f"index build {build_us:.0f} us, answer mean {statistics.mean(latencies):.1f} us, "
+          f"max {max(latencies):.1f} us")
+
+
+if __name__ == "__main__":
+    main()
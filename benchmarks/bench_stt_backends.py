@@ -0,0 +1,126 @@
+"""
+Compare STT backends (hf, int8, onnx) on a fixed local test set.
+
+The test set is a directory of audio files, each with a reference
+transcript next to it (clip.wav + clip.txt). Every backend runs in a fresh
+interpreter so memory numbers are not polluted by the other backends.
+Reports real-time factor (processing s / audio s), RSS growth from loading
+the model, and word error rate against the references.
+
+    python benchmarks/bench_stt_backends.py --test-set ./stt_testset --language de
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".mp3")
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux /proc, falls back to peak RSS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def normalize_words(text: str) -> list:
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_errors(reference: str, hypothesis: str) -> tuple:
+    """(edit distance in words, reference word count)."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def load_test_set(directory: str) -> list:
+    items = []
+    for path in sorted(glob.glob(os.path.join(directory, "*"))):
+        base, ext = os.path.splitext(path)
+        if ext.lower() in AUDIO_EXTENSIONS and os.path.exists(base + ".txt"):
+            with open(base + ".txt", encoding="utf-8") as f:
+                items.append((path, f.read().strip()))
+    return items
+
+
+def run_backend(backend: str, test_set: str, model: str, language: str) -> dict:
+    """Worker: load one backend and transcribe the whole test set."""
+    import audio_utils
+
+    items = load_test_set(test_set)
+    base_rss = rss_mb()
+    start = time.perf_counter()
+    pipe = audio_utils.load_stt_model(model, "cpu", backend)
+    load_s = time.perf_counter() - start
+    model_rss = rss_mb() - base_rss
+
+    audio_s = processing_s = 0.0
+    errors = words = 0
+    for path, reference in items:
+        with open(path, "rb") as f:
+            audio, sample_rate = audio_utils.convert_audio_format(f.read())
+        long_form = len(audio) / sample_rate > audio_utils.STT_LONG_FORM_THRESHOLD_S
+        t0 = time.perf_counter()
+        result = audio_utils._run_stt_pipeline(pipe, audio, sample_rate, language, long_form)
+        processing_s += time.perf_counter() - t0
+        audio_s += len(audio) / sample_rate
+        e, n = word_errors(reference, result.get("text", ""))
+        errors += e
+        words += n
+
+    return {
+        "backend": backend,
+        "clips": len(items),
+        "load_s": load_s,
+        "rtf": processing_s / audio_s if audio_s else 0.0,
+        "model_rss_mb": model_rss,
+        "peak_rss_mb": rss_mb(),
+        "wer": errors / words if words else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--test-set", required=True, help="directory of clip.wav + clip.txt pairs")
+    parser.add_argument("--model", default="distil-whisper/distil-large-v3")
+    parser.add_argument("--language", default="de")
+    parser.add_argument("--backends", nargs="+", default=["hf", "int8", "onnx"])
+    parser.add_argument("--worker", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.test_set, args.model, args.language)))
+        return
+
+    print(f"{'backend':<9}{'clips':>6}{'load s':>9}{'RTF':>8}{'model MB':>10}{'WER':>8}")
+    for backend in args.backends:
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker", backend,
+               "--test-set", args.test_set, "--model", args.model, "--language", args.language]
+        out = subprocess.run(cmd, capture_output=True, text=True)
+        if out.returncode != 0:
+            print(f"{backend:<9} failed: {out.stderr.strip().splitlines()[-1] if out.stderr else out.returncode}")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{r['backend']:<9}{r['clips']:>6}{r['load_s']:>9.1f}{r['rtf']:>8.3f}"
+              f"{r['model_rss_mb']:>10.0f}{r['wer']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
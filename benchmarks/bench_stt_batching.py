@@ -0,0 +1,92 @@
+"""
+Throughput of concurrent short-clip transcription with and without micro-batching.
+
+--callers threads each transcribe --requests clips of --seconds of audio at
+the same time (simulating callers who finish speaking together). Every
+configuration in --batch-sizes runs the same load through a MicroBatcher
+on one InferenceScheduler; batch size 1 is the unbatched baseline.
+
+    python benchmarks/bench_stt_batching.py --callers 16 --batch-sizes 1 4 8 --max-wait-ms 10
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audio_utils  # noqa: E402
+from inference_scheduler import InferenceScheduler  # noqa: E402
+from micro_batching import MicroBatcher  # noqa: E402
+
+
+def synthetic_clip(seconds: float, seed: int, sample_rate: int = 16000) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    audio = 0.1 * np.sin(2 * np.pi * (180 + 10 * seed) * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    audio += 0.01 * np.random.default_rng(seed).standard_normal(len(t)).astype(np.float32)
+    return audio.astype(np.float32)
+
+
+def run_load(batcher: MicroBatcher, clips, requests: int, language: str, sample_rate: int):
+    latencies = []
+    lock = threading.Lock()
+
+    def caller(clip):
+        for _ in range(requests):
+            start = time.perf_counter()
+            batcher.run(clip, key=(language, sample_rate))
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=caller, args=(clip,)) for clip in clips]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="distil-whisper/distil-large-v3")
+    parser.add_argument("--backend", default=audio_utils.STT_BACKEND, choices=audio_utils.STT_BACKENDS)
+    parser.add_argument("--language", default="de")
+    parser.add_argument("--callers", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2, help="Clips per caller")
+    parser.add_argument("--seconds", type=float, default=4.0, help="Clip length")
+    parser.add_argument("--workers", type=int, default=audio_utils.get_inference_scheduler().workers)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--max-wait-ms", type=float, default=audio_utils.STT_MICROBATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    sample_rate = 16000
+    pipe = audio_utils.get_stt_pipeline(args.model, args.backend)
+    clips = [synthetic_clip(args.seconds, seed) for seed in range(args.callers)]
+    audio_utils._run_stt_batch(pipe, clips[:2], sample_rate, args.language)  # warm-up
+
+    total = args.callers * args.requests
+    print(f"{args.callers} callers x {args.requests} clips of {args.seconds:.1f}s, "
+          f"{args.workers} workers, max_wait={args.max_wait_ms:.0f}ms")
+    print(f"{'batch':>6}{'seconds':>10}{'clips/s':>9}{'audio s/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'mean bs':>9}")
+    for max_batch in args.batch_sizes:
+        scheduler = InferenceScheduler(workers=args.workers, max_queue=total, name="bench")
+        batcher = MicroBatcher(
+            lambda key, items: audio_utils._run_stt_batch(pipe, items, key[1], key[0]),
+            max_batch=max_batch, max_wait_ms=args.max_wait_ms, max_pending=total, scheduler=scheduler)
+        elapsed, latencies = run_load(batcher, clips, args.requests, args.language, sample_rate)
+        metrics = batcher.metrics()
+        batcher.shutdown()
+        scheduler.shutdown()
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+        print(f"{max_batch:>6}{elapsed:>10.2f}{total / elapsed:>9.2f}"
+              f"{total * args.seconds / elapsed:>11.2f}{p50:>9.0f}{p95:>9.0f}"
+              f"{metrics['mean_batch_size']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
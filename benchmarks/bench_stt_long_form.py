@@ -0,0 +1,62 @@
+"""
+CPU throughput of long-form transcription for several batch sizes.
+
+Reports the real-time factor (processing seconds per audio second; lower is
+better). Uses --audio if given, otherwise a synthetic clip of --seconds.
+
+    python benchmarks/bench_stt_long_form.py --audio voicemail.wav --batch-sizes 1 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audio_utils  # noqa: E402
+
+
+def load_audio(path: str, seconds: float):
+    if path:
+        with open(path, "rb") as f:
+            return audio_utils.convert_audio_format(f.read())
+    sample_rate = 16000
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    # Amplitude-modulated tone with noise, roughly speech-like in energy
+    audio = 0.1 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    audio += 0.01 * np.random.default_rng(0).standard_normal(len(t)).astype(np.float32)
+    return audio.astype(np.float32), sample_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--audio", default="", help="WAV/FLAC file to transcribe")
+    parser.add_argument("--seconds", type=float, default=120.0)
+    parser.add_argument("--model", default="distil-whisper/distil-large-v3")
+    parser.add_argument("--language", default="de")
+    parser.add_argument("--chunk-length", type=float, default=audio_utils.STT_CHUNK_LENGTH_S)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    audio, sample_rate = load_audio(args.audio, args.seconds)
+    duration = len(audio) / sample_rate
+    pipe = audio_utils.load_stt_model(args.model, device="cpu")
+
+    # Warm-up so the first measured run does not include one-off allocations
+    audio_utils._run_stt_pipeline(pipe, audio[:sample_rate * 5], sample_rate, args.language, long_form=False)
+
+    print(f"audio: {duration:.1f}s, chunk_length_s={args.chunk_length}")
+    print(f"{'batch':>6}{'seconds':>10}{'RTF':>8}")
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        audio_utils._run_stt_pipeline(
+            pipe, audio, sample_rate, args.language, long_form=True,
+            chunk_length_s=args.chunk_length, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"{batch_size:>6}{elapsed:>10.2f}{elapsed / duration:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark: prompt size and build latency with and without the token budget.
+
+Replays a synthetic --turns turn conversation through build_api_messages
+(everything, every turn) and build_budgeted_messages (sliding window +
+running summary). Summaries use extractive_summary by default; pass
+--llm-summary to fold through call_azure_api against the local fake
+endpoint, with --token-delay standing in for the summary call latency.
+
+    python benchmarks/bench_token_budget.py --turns 60 --budget 8000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from benchmarks.fake_azure import FakeAzureServer  # noqa: E402
+
+QUESTIONS = [
+    "What should I improve first?",
+    "Why is my score for light and shadow so low?",
+    "How can I make the proportions of the face more accurate?",
+    "Can you explain what the composition feedback means in practice?",
+    "Which exercise would help me with contrast?",
+    "Is the background distracting from the subject?",
+]
+
+ADVICE = [
+    "Darken the shadows under the nose and along the jaw to separate the planes of the face.",
+    "Measure the distance between the eyes against the width of one eye before refining details.",
+    "Leave more negative space on the side the subject is looking towards.",
+    "Push the darkest value next to the lightest one at the focal point to increase contrast.",
+    "Soften the edges in the background so they do not compete with the face.",
+    "Practice quick value studies with only three tones before starting a full portrait.",
+]
+
+
+def synthetic_conversation(turns: int, seed: int = 0) -> list:
+    """User/assistant pairs with assistant replies of a few hundred tokens."""
+    rng = random.Random(seed)
+    messages = []
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"({turn}) {rng.choice(QUESTIONS)}"})
+        reply = " ".join(rng.choice(ADVICE) for _ in range(rng.randint(6, 14)))
+        messages.append({"role": "assistant", "content": reply})
+    return messages
+
+
+def run(conversation: list, build) -> dict:
+    """Build the prompt for every turn, as the chat loop does before each API call."""
+    tokens, latencies = [], []
+    for end in range(1, len(conversation), 2):
+        start = time.perf_counter()
+        api_messages = build(conversation[:end])
+        latencies.append(time.perf_counter() - start)
+        tokens.append(app.count_message_tokens(api_messages))
+    return {
+        "mean_tokens": statistics.mean(tokens),
+        "last_tokens": tokens[-1],
+        "max_tokens": max(tokens),
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--budget", type=int, default=app.PROMPT_TOKEN_BUDGET)
+    parser.add_argument("--llm-summary", action="store_true",
+                        help="summarize through call_azure_api on the fake endpoint")
+    parser.add_argument("--token-delay", type=float, default=0.3,
+                        help="seconds the fake endpoint waits before replying")
+    args = parser.parse_args()
+
+    conversation = synthetic_conversation(args.turns)
+    qa_scores = app.DEFAULT_QA_SCORES_JSON
+    summaries = []
+
+    def extractive(summary, messages):
+        summaries.append(len(messages))
+        return app.extractive_summary(summary, messages)
+
+    def llm(summary, messages):
+        summaries.append(len(messages))
+        return app.summarize_history(summary, messages)
+
+    def budgeted(state, summarize):
+        return lambda messages: app.build_budgeted_messages(
+            qa_scores, messages, state, budget=args.budget, summarize=summarize)
+
+    results = {"full history": run(conversation, lambda m: app.build_api_messages(qa_scores, m))}
+    if args.llm_summary:
+        with FakeAzureServer(reply="The user asked about contrast and proportions.",
+                             token_delay=args.token_delay) as server:
+            app.AZURE_API_KEY = "bench"
+            app.AZURE_ENDPOINT = server.url
+            results["budget + llm summary"] = run(conversation, budgeted({"text": "", "count": 0}, llm))
+    else:
+        results["budget + extractive"] = run(conversation, budgeted({"text": "", "count": 0}, extractive))
+
+    print(f"{args.turns} turns, budget {args.budget} tokens, "
+          f"{len(summaries)} summarizations folding {sum(summaries)} messages")
+    print(f"{'mode':<24}{'mean tok':>10}{'last tok':>10}{'max tok':>10}{'mean ms':>10}{'max ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<24}{r['mean_tokens']:>10.0f}{r['last_tokens']:>10}{r['max_tokens']:>10}"
+              f"{r['mean_ms']:>10.2f}{r['max_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
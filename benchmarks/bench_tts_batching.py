@@ -0,0 +1,134 @@
+"""
+Aggregate TTS throughput of concurrent callers with and without single-flight.
+
+--concurrency callers each synthesize a short reply sentence by sentence at
+the same time on one InferenceScheduler. Replies are built from distinct
+sentences; --opener-share of them start with one of two stock openers, the
+only text concurrent callers really share. "per request" schedules every
+sentence on its own; "single-flight" shares the job of an identical sentence
+already in flight. Reports audio seconds per wall-clock second, per-sentence
+latency and time to first audio.
+
+    python benchmarks/bench_tts_batching.py --concurrency 8 --opener-share 0.25
+    python benchmarks/bench_tts_batching.py --fake-ms 50   # without Kokoro
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audio_utils  # noqa: E402
+from inference_scheduler import InferenceScheduler  # noqa: E402
+from micro_batching import SingleFlight  # noqa: E402
+
+OPENERS = [
+    "Thanks for sharing your portrait.",
+    "Let's look at your portrait together.",
+]
+
+SENTENCES = [
+    "The shadows are still a bit soft.",
+    "Make them a bit darker under the nose.",
+    "Then you'll see the shape better.",
+    "The background feels a bit empty.",
+    "Try a warmer tone on the left cheek.",
+    "The eyes sit at a good height.",
+    "Your line work around the jaw is confident.",
+    "The ear could move slightly back.",
+    "Soften the edge where the hair meets the forehead.",
+    "The lips need a little more volume.",
+    "Keep the highlights on the nose small.",
+    "What part of your portrait are you most curious about?",
+]
+
+
+def make_replies(callers: int, length: int, opener_share: float) -> list:
+    """Replies with no sentence in common; every 1/opener_share-th one starts with a stock opener."""
+    every = round(1 / opener_share) if opener_share > 0 else 0
+    replies = []
+    for i in range(callers):
+        # The portrait number keeps sentences unique across callers
+        reply = [f"{SENTENCES[(i + k) % len(SENTENCES)]} Portrait {i + 1}." for k in range(length)]
+        if every and i % every == 0:
+            reply[0] = OPENERS[(i // every) % len(OPENERS)]
+        replies.append(reply)
+    return replies
+
+
+def run(synthesize, single_flight: bool, workers: int, replies: list) -> dict:
+    scheduler = InferenceScheduler(workers=workers, max_queue=len(replies) * 4, name="bench")
+    flight = SingleFlight(scheduler) if single_flight else None
+    latencies, first_audio = [], []
+
+    def caller(reply):
+        audio_s = 0.0
+        started = time.perf_counter()
+        for n, sentence in enumerate(reply):
+            start = time.perf_counter()
+            if flight is not None:
+                audio, sample_rate = flight.run(sentence, synthesize, sentence)
+            else:
+                audio, sample_rate = scheduler.run(synthesize, sentence)
+            latencies.append(time.perf_counter() - start)
+            if n == 0:
+                first_audio.append(time.perf_counter() - started)
+            audio_s += len(audio) / sample_rate
+        return audio_s
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(replies)) as pool:
+        audio_s = sum(pool.map(caller, replies))
+    wall = time.perf_counter() - start
+    shared = flight.metrics()["shared"] if flight is not None else 0
+    scheduler.shutdown()
+    latencies.sort()
+    return {
+        "audio_per_s": audio_s / wall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "first_audio_ms": statistics.median(first_audio) * 1000,
+        "shared": shared,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=audio_utils.get_inference_scheduler().workers)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--sentences", type=int, default=5, help="sentences per reply")
+    parser.add_argument("--opener-share", type=float, default=0.25,
+                        help="share of replies that start with a stock opener")
+    parser.add_argument("--fake-ms", type=float, default=0.0,
+                        help="use a fake model that sleeps this long per sentence (no Kokoro needed)")
+    args = parser.parse_args()
+
+    if args.fake_ms > 0:
+        def synthesize(text):
+            time.sleep(args.fake_ms / 1000)
+            return np.zeros(24000 * len(text) // 15, dtype=np.float32), 24000
+    else:
+        if not audio_utils.TTS_AVAILABLE:
+            sys.exit("kokoro-onnx or kokoro is required for this benchmark (or pass --fake-ms)")
+        model, library_type = audio_utils.load_tts_model()
+        audio_utils._synthesize(model, library_type, "Warm up.", "en", 1.0)
+
+        def synthesize(text):
+            return audio_utils._synthesize(model, library_type, text, "en", 1.0)
+
+    replies = make_replies(args.concurrency, args.sentences, args.opener_share)
+    print(f"concurrency={args.concurrency}, workers={args.workers}, opener share={args.opener_share:.0%}")
+    print(f"{'mode':<15}{'audio s/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'first ms':>10}{'shared':>8}")
+    for name, single_flight in (("per request", False), ("single-flight", True)):
+        r = run(synthesize, single_flight, args.workers, replies)
+        print(f"{name:<15}{r['audio_per_s']:>11.2f}{r['p50_ms']:>9.0f}{r['p95_ms']:>9.0f}"
+              f"{r['first_audio_ms']:>10.0f}{r['shared']:>8}")
+
+
+if __name__ == "__main__":
+    main()
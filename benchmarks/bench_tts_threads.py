@@ -0,0 +1,81 @@
+"""
+Kokoro (kokoro-onnx) synthesis throughput across ONNX Runtime thread settings.
+
+For every intra-op thread count, --concurrency callers synthesize the test
+sentences at the same time (as concurrent sessions would). Reports
+aggregate audio seconds produced per wall-clock second and p95 latency.
+
+    python benchmarks/bench_tts_threads.py --threads 1 2 4 8 --concurrency 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audio_utils  # noqa: E402
+
+SENTENCES = [
+    "The shadows are still a bit soft.",
+    "Make them a bit darker under the nose.",
+    "Then you'll see the shape better.",
+    "The background feels a bit empty.",
+    "What part of your portrait are you most curious about?",
+]
+
+
+def run(config: dict, concurrency: int, rounds: int) -> dict:
+    model, library_type = audio_utils.load_tts_model(None, None, config)
+    audio_utils._synthesize(model, library_type, "Warm up.", "en", 1.0)
+
+    latencies = []
+
+    def job(sentence):
+        start = time.perf_counter()
+        audio, sample_rate = audio_utils._synthesize(model, library_type, sentence, "en", 1.0)
+        latencies.append(time.perf_counter() - start)
+        return len(audio) / sample_rate
+
+    jobs = SENTENCES * rounds
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        audio_s = sum(pool.map(job, jobs))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "audio_per_s": audio_s / wall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 0],
+                        help="intra-op thread counts (0 = ONNX Runtime default)")
+    parser.add_argument("--inter-threads", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--graph-opt-level", default="all")
+    args = parser.parse_args()
+
+    if audio_utils.TTS_LIBRARY != "kokoro-onnx":
+        sys.exit("kokoro-onnx is required for this benchmark")
+
+    print(f"concurrency={args.concurrency}, inter_op_threads={args.inter_threads}")
+    print(f"{'intra':>6}{'audio s/s':>11}{'p50 ms':>9}{'p95 ms':>9}")
+    for threads in args.threads:
+        config = audio_utils.get_tts_session_config({
+            "intra_op_threads": threads,
+            "inter_op_threads": args.inter_threads,
+            "graph_opt_level": args.graph_opt_level,
+        })
+        r = run(config, args.concurrency, args.rounds)
+        print(f"{threads:>6}{r['audio_per_s']:>11.2f}{r['p50_ms']:>9.0f}{r['p95_ms']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Local fake Azure OpenAI endpoint for benchmarks.
+
+Serves streamed chat completions (SSE) over HTTP/1.1 with keep-alive and
+counts how many TCP connections were opened. handshake_delay is slept once
+per new connection to emulate DNS/TCP/TLS setup cost of a remote region.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def sse_body(text: str, prompt_tokens: int = 100) -> bytes:
+    """Build an SSE chat completion stream that yields text word by word."""
+    lines = []
+    words = text.split(" ")
+    for i, word in enumerate(words):
+        piece = word if i == 0 else " " + word
+        chunk = {
+            "id": "chatcmpl-fake", "object": "chat.completion.chunk",
+            "created": 0, "model": "gpt-4o",
+            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+        }
+        lines.append("data: " + json.dumps(chunk))
+    usage = {
+        "id": "chatcmpl-fake", "object": "chat.completion.chunk",
+        "created": 0, "model": "gpt-4o", "choices": [],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                  "total_tokens": prompt_tokens + len(words)}
+    }
+    lines.append("data: " + json.dumps(usage))
+    lines.append("data: [DONE]")
+    return ("\n\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class FakeAzureServer:
+    """Threaded fake endpoint; use as a context manager."""
+
+    def __init__(self, reply: str = "Make the shadows a bit darker under the nose.",
+                 handshake_delay: float = 0.0, token_delay: float = 0.0):
+        self.reply = reply
+        self.handshake_delay = handshake_delay
+        self.token_delay = token_delay
+        self.connections = 0
+        self.requests = 0
+        # Optional hook(request_index) -> (status, headers) | None for fault injection
+        self.fault = None
+        # Optional hook(request_index) -> extra seconds before replying (slow requests)
+        self.delay = None
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+                if fake.handshake_delay:
+                    time.sleep(fake.handshake_delay)
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                with fake._lock:
+                    fake.requests += 1
+                    index = fake.requests
+                extra_delay = fake.delay(index) if fake.delay else 0.0
+                if extra_delay:
+                    time.sleep(extra_delay)
+                fault = fake.fault(index) if fake.fault else None
+                if fault is not None:
+                    status, headers = fault
+                    body = json.dumps({"error": {"message": f"injected {status}"}}).encode()
+                    self.send_response(status)
+                    for key, value in headers.items():
+                        self.send_header(key, value)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                if fake.token_delay:
+                    time.sleep(fake.token_delay)
+                body = sse_body(fake.reply)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
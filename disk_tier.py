@@ -0,0 +1,127 @@
+# ============================================
+# SIZE-BOUNDED DISK TIER FOR CACHES
+# ============================================
+import os
+import threading
+from typing import Any, Callable, Optional
+
+
+class DiskTier:
+    """
+    Directory of cache files, one per key, bounded in total bytes and/or
+    number of files and pruned least recently used first.
+
+    Files are written atomically (temp file + rename), so concurrent
+    processes sharing the directory never read a partial entry. Reads touch
+    the file's mtime, which is the LRU order used for pruning.
+
+    Args:
+        directory: Directory holding the files (created if missing)
+        suffix: File name suffix, e.g. ".npz"
+        max_bytes: Size budget in bytes (None = unbounded)
+        max_files: Budget in number of files (None = unbounded)
+    """
+
+    def __init__(self, directory: str, suffix: str, max_bytes: Optional[int] = None,
+                 max_files: Optional[int] = None):
+        self.directory = directory
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        files = self._scan()
+        self.bytes = sum(size for _, size, _ in files)
+        self.files = len(files)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def read(self, key: str, load: Callable[[str], Any]):
+        """load(path) for key, or None if the file is missing or unreadable."""
+        path = self.path(key)
+        try:
+            value = load(path)
+            os.utime(path)
+        except (OSError, KeyError, ValueError, TypeError):
+            return None
+        return value
+
+    def write(self, key: str, dump: Callable[[Any], None]):
+        """Write key's file with dump(binary file), then prune if over budget."""
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                dump(f)
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = None
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            if old_size is None:
+                self.files += 1
+            else:
+                self.bytes -= old_size
+            self.bytes += size
+            over_budget = self._over_budget(self.bytes, self.files)
+        if over_budget:
+            self._prune()
+
+    def remove(self, key: str):
+        path = self.path(key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self.bytes -= size
+            self.files -= 1
+
+    def _over_budget(self, total_bytes: int, files: int, share: float = 1.0) -> bool:
+        return ((self.max_bytes is not None and total_bytes > self.max_bytes * share)
+                or (self.max_files is not None and files > self.max_files * share))
+
+    def _scan(self) -> list:
+        """(path, size, mtime) of every cache file in the directory."""
+        files = []
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return files
+        for entry in entries:
+            if not entry.name.endswith(self.suffix):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _prune(self):
+        files = self._scan()
+        total_bytes = sum(size for _, size, _ in files)
+        count = len(files)
+        # Prune to 90% of the budget so we do not rescan on every write
+        for path, size, _ in sorted(files, key=lambda f: f[2]):
+            if not self._over_budget(total_bytes, count, 0.9):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_bytes -= size
+            count -= 1
+        with self._lock:
+            self.bytes = total_bytes
+            self.files = count
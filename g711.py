@@ -0,0 +1,176 @@
+# ============================================
+# G.711 (μ-LAW / A-LAW) CODECS FOR 8 KHZ TELEPHONY AUDIO
+# ============================================
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from audio_utils import StreamResampler
+
+TELEPHONY_SAMPLE_RATE = 8000
+ULAW = "ulaw"
+ALAW = "alaw"
+G711_LAWS = (ULAW, ALAW)
+
+# Codes for digital silence, used to pad the last frame
+_SILENCE_CODE = {ULAW: 0xFF, ALAW: 0xD5}
+
+
+def _build_ulaw_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """ITU-T G.711 μ-law: 256-entry decode table and 65536-entry encode table."""
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    magnitude = (((codes & 0x0F) << 3) + 0x84) << ((codes & 0x70) >> 4)
+    decode = np.where(codes & 0x80, 0x84 - magnitude, magnitude - 0x84).astype(np.int16)
+
+    # Encoding works on 14-bit magnitudes, as in the ITU reference code
+    pcm = np.arange(-32768, 32768, dtype=np.int32) >> 2
+    sign = np.where(pcm < 0, 0x80, 0)
+    biased = np.minimum(np.abs(pcm), 8159) + 0x21
+    exponent = np.floor(np.log2(np.maximum(biased >> 5, 1))).astype(np.int32)
+    mantissa = (biased >> (exponent + 1)) & 0x0F
+    # Full-scale magnitudes saturate to the largest code
+    mantissa = np.where(exponent > 7, 0x0F, mantissa)
+    exponent = np.minimum(exponent, 7)
+    encode = (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+    return decode, _index_by_uint16(encode)
+
+
+def _build_alaw_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """ITU-T G.711 A-law: 256-entry decode table and 65536-entry encode table."""
+    codes = np.arange(256, dtype=np.int32) ^ 0x55
+    segment = (codes & 0x70) >> 4
+    magnitude = (codes & 0x0F) << 4
+    magnitude = np.where(segment == 0, magnitude + 8, (magnitude + 0x108) << np.maximum(segment - 1, 0))
+    decode = np.where(codes & 0x80, magnitude, -magnitude).astype(np.int16)
+
+    pcm = np.arange(-32768, 32768, dtype=np.int32) >> 3
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    pcm = np.where(pcm >= 0, pcm, -pcm - 1)
+    segment = np.searchsorted(np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF]), pcm)
+    shift = np.where(segment < 2, 1, segment)
+    value = (segment << 4) | ((pcm >> shift) & 0x0F)
+    encode = (np.where(segment >= 8, 0x7F, value) ^ mask).astype(np.uint8)
+    return decode, _index_by_uint16(encode)
+
+
+def _index_by_uint16(table: np.ndarray) -> np.ndarray:
+    """Reorder a table built for -32768..32767 so int16 samples viewed as uint16 index it."""
+    return np.roll(table, -32768)
+
+
+_DECODE = {}
+_ENCODE = {}
+for _law, _build in ((ULAW, _build_ulaw_tables), (ALAW, _build_alaw_tables)):
+    _DECODE[_law], _ENCODE[_law] = _build()
+    _DECODE[_law].setflags(write=False)
+    _ENCODE[_law].setflags(write=False)
+_DECODE_FLOAT = {law: (table / 32768.0).astype(np.float32) for law, table in _DECODE.items()}
+
+
+def _check_law(law: str):
+    if law not in G711_LAWS:
+        raise ValueError(f"Unknown G.711 law '{law}'. Expected one of: {', '.join(G711_LAWS)}")
+
+
+def g711_decode(payload: Union[bytes, bytearray, memoryview, np.ndarray], law: str = ULAW,
+                dtype=np.float32) -> np.ndarray:
+    """
+    Decode G.711 bytes with a 256-entry lookup table.
+
+    Args:
+        payload: Encoded bytes (one byte per sample)
+        law: "ulaw" or "alaw"
+        dtype: np.float32 (scaled to [-1, 1]) or np.int16
+
+    Returns:
+        Decoded samples
+    """
+    _check_law(law)
+    codes = np.frombuffer(payload, dtype=np.uint8) if not isinstance(payload, np.ndarray) else payload
+    table = _DECODE[law] if np.dtype(dtype) == np.int16 else _DECODE_FLOAT[law]
+    return table[codes]
+
+
+def g711_encode(audio: np.ndarray, law: str = ULAW) -> bytes:
+    """
+    Encode samples with a 65536-entry lookup table.
+
+    Args:
+        audio: int16 samples, or float samples in [-1, 1]
+        law: "ulaw" or "alaw"
+
+    Returns:
+        Encoded bytes (one byte per sample)
+    """
+    _check_law(law)
+    audio = np.asarray(audio)
+    if audio.dtype != np.int16:
+        audio = (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+    return _ENCODE[law][audio.view(np.uint16)].tobytes()
+
+
+class G711Decoder:
+    """
+    Decode incoming G.711 frames to float32 at sample_rate (16 kHz for Whisper).
+
+    Frames can have any length; resampler state is carried across frames,
+    so the output is continuous.
+
+    Args:
+        law: "ulaw" or "alaw"
+        sample_rate: Output sample rate
+    """
+
+    def __init__(self, law: str = ULAW, sample_rate: int = 16000):
+        _check_law(law)
+        self.law = law
+        self.sample_rate = sample_rate
+        self._resampler = StreamResampler(TELEPHONY_SAMPLE_RATE, sample_rate)
+
+    def decode(self, payload: Union[bytes, bytearray, memoryview]) -> np.ndarray:
+        return self._resampler.process(g711_decode(payload, self.law))
+
+    def flush(self) -> np.ndarray:
+        return self._resampler.flush()
+
+
+class G711Encoder:
+    """
+    Encode outgoing float32 audio at sample_rate (e.g. 24 kHz TTS output) into
+    fixed-size 8 kHz G.711 frames.
+
+    Audio can be pushed in chunks of any length; only whole frames of
+    frame_ms are returned and the remainder waits for the next call.
+
+    Args:
+        law: "ulaw" or "alaw"
+        sample_rate: Rate of the audio passed to encode()
+        frame_ms: Frame duration (20 ms = 160 bytes is the RTP default)
+    """
+
+    def __init__(self, law: str = ULAW, sample_rate: int = 24000, frame_ms: float = 20.0):
+        _check_law(law)
+        self.law = law
+        self.sample_rate = sample_rate
+        self.frame_bytes = int(TELEPHONY_SAMPLE_RATE * frame_ms / 1000)
+        self._resampler = StreamResampler(sample_rate, TELEPHONY_SAMPLE_RATE)
+        self._pending = b""
+
+    def encode(self, audio: np.ndarray) -> List[bytes]:
+        """Encode a chunk and return the frames that are complete."""
+        return self._frames(self._resampler.process(audio))
+
+    def flush(self) -> List[bytes]:
+        """Encode what is left; the last frame is padded with silence."""
+        frames = self._frames(self._resampler.flush())
+        if self._pending:
+            padding = bytes([_SILENCE_CODE[self.law]]) * (self.frame_bytes - len(self._pending))
+            frames.append(self._pending + padding)
+            self._pending = b""
+        return frames
+
+    def _frames(self, audio: np.ndarray) -> List[bytes]:
+        data = self._pending + g711_encode(audio, self.law)
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = data[usable:]
+        return [data[i:i + self.frame_bytes] for i in range(0, usable, self.frame_bytes)]
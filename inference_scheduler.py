@@ -0,0 +1,209 @@
+# ============================================
+# BOUNDED INFERENCE SCHEDULER FOR STT/TTS
+# ============================================
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Optional
+
+import streamlit as st
+
+from metrics import get_metrics
+
+# Lower value runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# Process-wide scheduler size (override via environment)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(max(1, (os.cpu_count() or 2) // 4))))
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", "32"))
+
+
+class SchedulerFull(RuntimeError):
+    """Raised when a request is rejected because the queue is full."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request's deadline passed before it could run or finish."""
+
+
+def deadline_after(seconds: Optional[float]) -> Optional[float]:
+    """Absolute deadline (time.monotonic) for a relative timeout, or None."""
+    return None if seconds is None else time.monotonic() + seconds
+
+
+class InferenceScheduler:
+    """
+    Bounded worker pool with a priority queue for model inference.
+
+    Requests beyond max_queue waiting jobs are rejected immediately with
+    SchedulerFull (backpressure) instead of piling up. Each request may
+    carry an absolute deadline (time.monotonic); jobs whose deadline has
+    passed when a worker picks them up are failed with DeadlineExceeded
+    without running, so stale work never occupies a core.
+
+    Args:
+        workers: Number of inference threads (concurrent model calls)
+        max_queue: Maximum number of waiting (not yet running) requests
+        name: Thread name prefix
+    """
+
+    def __init__(self, workers: int = INFERENCE_WORKERS, max_queue: int = INFERENCE_MAX_QUEUE,
+                 name: str = "inference"):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._in_flight = 0
+        self._waits = deque(maxlen=2048)
+        self._runs = deque(maxlen=2048)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.expired = 0
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn: Callable, *args, priority: int = PRIORITY_NORMAL,
+               deadline: Optional[float] = None, **kwargs) -> Future:
+        """
+        Queue fn(*args, **kwargs) and return a Future for its result.
+
+        Raises:
+            SchedulerFull: If max_queue requests are already waiting
+            DeadlineExceeded: If the deadline has already passed
+        """
+        if deadline is not None and time.monotonic() >= deadline:
+            with self._cond:
+                self.expired += 1
+            raise DeadlineExceeded("Deadline passed before the request was queued")
+
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Inference scheduler is shut down")
+            if len(self._heap) >= self.max_queue:
+                self.rejected += 1
+                raise SchedulerFull(f"Inference queue is full ({self.max_queue} waiting)")
+            job = (fn, args, kwargs, future, deadline, time.monotonic())
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self.submitted += 1
+            self._cond.notify()
+        return future
+
+    def run(self, fn: Callable, *args, priority: int = PRIORITY_NORMAL,
+            deadline: Optional[float] = None, **kwargs):
+        """
+        Submit fn and block until it finishes (or the deadline passes).
+
+        Raises:
+            SchedulerFull: If the queue is full
+            DeadlineExceeded: If the deadline passes while queued or running
+        """
+        future = self.submit(fn, *args, priority=priority, deadline=deadline, **kwargs)
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError as e:
+            if isinstance(e, DeadlineExceeded):
+                raise
+            # Still queued: drop it; already running: let it finish, ignore the result
+            future.cancel()
+            raise DeadlineExceeded("Deadline passed while waiting for inference") from None
+
+    def metrics(self) -> dict:
+        """Queue depth, counters and wait/run time percentiles (milliseconds)."""
+        with self._cond:
+            waits = sorted(self._waits)
+            runs = sorted(self._runs)
+            return {
+                "workers": self.workers,
+                "queue_depth": len(self._heap),
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "expired": self.expired,
+                "wait_ms_p50": _percentile(waits, 0.50) * 1000,
+                "wait_ms_p95": _percentile(waits, 0.95) * 1000,
+                "wait_ms_max": (waits[-1] if waits else 0.0) * 1000,
+                "run_ms_p50": _percentile(runs, 0.50) * 1000,
+                "run_ms_p95": _percentile(runs, 0.95) * 1000,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work; queued jobs are still run before workers exit."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._heap and not self._closed:
+                    self._cond.wait()
+                if not self._heap:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+                fn, args, kwargs, future, deadline, queued_at = job
+                now = time.monotonic()
+                self._waits.append(now - queued_at)
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if deadline is not None and now >= deadline:
+                    self.expired += 1
+                    future.set_exception(DeadlineExceeded("Deadline passed while queued"))
+                    continue
+                self._in_flight += 1
+
+            started = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+                ok = False
+            else:
+                future.set_result(result)
+                ok = True
+            with self._cond:
+                self._in_flight -= 1
+                self._runs.append(time.monotonic() - started)
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+@st.cache_resource
+def get_inference_scheduler() -> InferenceScheduler:
+    """
+    Process-wide scheduler shared by all sessions for STT/TTS inference.
+    Sized by INFERENCE_WORKERS and INFERENCE_MAX_QUEUE.
+    """
+    scheduler = InferenceScheduler(workers=INFERENCE_WORKERS, max_queue=INFERENCE_MAX_QUEUE)
+    get_metrics().register_collector("inference", scheduler.metrics)
+    return scheduler
@@ -0,0 +1,301 @@
+# ============================================
+# PER-STAGE LATENCY METRICS AND EXPORTER
+# ============================================
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+# Set METRICS=0 to turn timers and counters into no-ops
+METRICS_ENABLED = os.getenv("METRICS", "1") != "0"
+
+# Latency histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class LatencyHistogram:
+    """
+    Cumulative latency histogram (fixed buckets, Prometheus style) plus a
+    window of recent samples for quantiles.
+
+    Args:
+        buckets: Bucket upper bounds in seconds
+        window: Number of recent samples kept for quantiles
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS, window: int = 2048):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self._recent.append(seconds)
+            self.count += 1
+            self.sum += seconds
+
+    def quantile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """q-quantile of the recent samples, or None with fewer than min_samples."""
+        with self._lock:
+            if len(self._recent) < max(1, min_samples):
+                return None
+            ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> dict:
+        """Cumulative bucket counts ("le" bounds, "+Inf" last), count, sum and p50/p95/p99."""
+        with self._lock:
+            counts = list(self._counts)
+            count, total = self.count, self.sum
+            ordered = sorted(self._recent)
+
+        def quantile(q):
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+        cumulative, running = {}, 0
+        for bound, n in zip([f"{b:g}" for b in self.buckets] + ["+Inf"], counts):
+            running += n
+            cumulative[bound] = running
+        return {
+            "buckets": cumulative,
+            "count": count,
+            "sum": total,
+            "p50": quantile(0.5),
+            "p95": quantile(0.95),
+            "p99": quantile(0.99),
+        }
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+class _Timer:
+    """Context manager returned by MetricsRegistry.timer (a class, not a generator, to stay cheap)."""
+
+    __slots__ = ("_registry", "_stage", "_key", "_start")
+
+    def __init__(self, registry, stage: str, key: tuple):
+        self._registry = registry
+        self._stage = stage
+        self._key = key
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._registry._observe(self._stage, self._key, time.perf_counter() - self._start)
+        if exc_type is not None:
+            self._registry._count("stage_errors", _label_key({"stage": self._stage, **dict(self._key)}), 1)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """
+    Per-stage latency histograms and counters, tagged with labels such as
+    model and backend, rendered as Prometheus text or JSON.
+
+    Stages are names like "audio_decode", "stt", "prompt_build", "llm_ttft",
+    "llm_total" or "tts". Collectors registered with register_collector are
+    called on every render and may add gauges (e.g. cache or circuit state).
+
+    Args:
+        enabled: Record anything at all (False makes every call a no-op)
+        prefix: Prefix of the exported metric names
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, prefix: str = "assistant"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._histograms = {}
+        self._counters = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def timer(self, stage: str, **labels):
+        """Context manager that records the time spent in the block for stage (and errors raised in it)."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage, _label_key(labels))
+
+    def timed(self, stage: str, **labels) -> Callable:
+        """Decorator form of timer."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, stage: str, seconds: float, **labels):
+        """Record a duration measured elsewhere (e.g. time to first token)."""
+        if self.enabled:
+            self._observe(stage, _label_key(labels), seconds)
+
+    def count(self, name: str, n: int = 1, **labels):
+        """Increase counter name by n."""
+        if self.enabled:
+            self._count(name, _label_key(labels), n)
+
+    def register_collector(self, name: str, collect: Callable[[], dict]):
+        """Add collect() -> {metric: number} as gauges named <prefix>_<name>_<metric> to every render."""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def _observe(self, stage: str, key: tuple, seconds: float):
+        histogram = self._histograms.get((stage, key))
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault((stage, key), LatencyHistogram())
+        histogram.observe(seconds)
+
+    def _count(self, name: str, key: tuple, n: int):
+        with self._lock:
+            self._counters[(name, key)] = self._counters.get((name, key), 0) + n
+
+    def _collect(self) -> dict:
+        with self._lock:
+            collectors = dict(self._collectors)
+        gauges = {}
+        for name, collect in collectors.items():
+            try:
+                values = collect() or {}
+            except Exception:
+                continue
+            for metric, value in values.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, (int, float)):
+                    gauges[f"{name}_{metric}"] = value
+        return gauges
+
+    def snapshot(self) -> dict:
+        """JSON-serializable view: stages (per label set), counters and gauges."""
+        with self._lock:
+            histograms = list(self._histograms.items())
+            counters = list(self._counters.items())
+        stages = {}
+        for (stage, key), histogram in sorted(histograms, key=lambda item: item[0]):
+            stages.setdefault(stage, []).append({"labels": dict(key), **histogram.snapshot()})
+        return {
+            "stages": stages,
+            "counters": [{"name": name, "labels": dict(key), "value": value}
+                         for (name, key), value in sorted(counters)],
+            "gauges": self._collect(),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot())
+
+    def prometheus_text(self) -> str:
+        """Render all metrics in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            counters = sorted(self._counters.items())
+        lines = []
+        name = f"{self.prefix}_stage_latency_seconds"
+        lines.append(f"# HELP {name} Time spent per pipeline stage.")
+        lines.append(f"# TYPE {name} histogram")
+        for (stage, key), histogram in histograms:
+            base = (("stage", stage),) + key
+            snap = histogram.snapshot()
+            for bound, count in snap["buckets"].items():
+                lines.append(f"{name}_bucket{_format_labels(base + (('le', bound),))} {count}")
+            lines.append(f"{name}_sum{_format_labels(base)} {snap['sum']:.6f}")
+            lines.append(f"{name}_count{_format_labels(base)} {snap['count']}")
+        typed = set()
+        for (counter, key), value in counters:
+            metric = f"{self.prefix}_{counter}_total"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_format_labels(key)} {value}")
+        for gauge, value in sorted(self._collect().items()):
+            metric = f"{self.prefix}_{gauge}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop all recorded histograms and counters (collectors are kept)."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+_REGISTRY = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return _REGISTRY
+
+
+def start_metrics_server(host: str = "127.0.0.1", port: int = 9108,
+                         registry: Optional[MetricsRegistry] = None) -> ThreadingHTTPServer:
+    """
+    Serve GET /metrics (Prometheus text) and /metrics.json from a daemon thread.
+
+    Returns:
+        The running server (call .shutdown() to stop it)
+    """
+    registry = registry or get_metrics()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                body, content_type = registry.prometheus_text(), "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/metrics.json":
+                body, content_type = registry.to_json(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
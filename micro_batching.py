@@ -0,0 +1,251 @@
+# ============================================
+# DYNAMIC MICRO-BATCHING FOR MODEL INFERENCE
+# ============================================
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Hashable, List, Optional
+
+from inference_scheduler import (
+    PRIORITY_NORMAL, DeadlineExceeded, InferenceScheduler, SchedulerFull, get_inference_scheduler
+)
+
+
+class MicroBatcher:
+    """
+    Collect concurrent single-item requests into small batches.
+
+    Requests are grouped by key (only items with the same key can share a
+    forward pass, e.g. same language or voice). A group is dispatched as
+    soon as it holds max_batch items or its oldest item has waited
+    max_wait_ms, whichever comes first. Each batch is one job on the
+    inference scheduler, so batches still respect its worker limit and
+    backpressure; results are fanned back to the individual callers.
+
+    Args:
+        run_batch: Callable(key, items) -> list of results, one per item, in order
+        max_batch: Maximum items per batch
+        max_wait_ms: Maximum time the first item of a group waits for company
+        max_pending: Maximum waiting items across all groups (SchedulerFull beyond)
+        scheduler: Scheduler that runs the batches (default: get_inference_scheduler())
+        name: Collector thread name
+    """
+
+    def __init__(self, run_batch: Callable[[Hashable, list], list], max_batch: int = 8,
+                 max_wait_ms: float = 10.0, max_pending: int = 256,
+                 scheduler: Optional[InferenceScheduler] = None, name: str = "batcher"):
+        self.run_batch = run_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.max_pending = max_pending
+        self.scheduler = scheduler
+        self._groups = {}
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._batch_sizes = Counter()
+        self._thread = threading.Thread(target=self._collect, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item, key: Hashable = None, priority: int = PRIORITY_NORMAL,
+               deadline: Optional[float] = None) -> Future:
+        """
+        Queue one item and return a Future for its result.
+
+        Raises:
+            SchedulerFull: If max_pending items are already waiting
+            DeadlineExceeded: If the deadline has already passed
+        """
+        if deadline is not None and time.monotonic() >= deadline:
+            raise DeadlineExceeded("Deadline passed before the request was queued")
+
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Batcher is shut down")
+            if self._pending >= self.max_pending:
+                raise SchedulerFull(f"Batch queue is full ({self.max_pending} waiting)")
+            self._groups.setdefault(key, []).append((item, future, priority, deadline, time.monotonic()))
+            self._pending += 1
+            self._cond.notify()
+        return future
+
+    def run(self, item, key: Hashable = None, priority: int = PRIORITY_NORMAL,
+            deadline: Optional[float] = None):
+        """
+        Submit one item and block until its batch has run (or the deadline passes).
+
+        Raises:
+            SchedulerFull: If the batch or inference queue is full
+            DeadlineExceeded: If the deadline passes while queued or running
+        """
+        future = self.submit(item, key=key, priority=priority, deadline=deadline)
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError as e:
+            if isinstance(e, DeadlineExceeded):
+                raise
+            future.cancel()
+            raise DeadlineExceeded("Deadline passed while waiting for a batch") from None
+
+    def metrics(self) -> dict:
+        """Batch counters and the batch size histogram."""
+        with self._cond:
+            batches = sum(self._batch_sizes.values())
+            items = sum(size * n for size, n in self._batch_sizes.items())
+            return {
+                "pending": self._pending,
+                "batches": batches,
+                "items": items,
+                "mean_batch_size": items / batches if batches else 0.0,
+                "batch_sizes": dict(sorted(self._batch_sizes.items())),
+            }
+
+    def shutdown(self):
+        """Dispatch whatever is waiting and stop the collector thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _collect(self):
+        while True:
+            with self._cond:
+                while True:
+                    ready, wait = self._next_ready()
+                    if ready is not None or (self._closed and not self._groups):
+                        break
+                    self._cond.wait(wait)
+                if ready is None:
+                    return
+                key, batch = ready
+            self._dispatch(key, batch)
+
+    def _next_ready(self):
+        """Pop a group that is full or has waited long enough; else the time to wait."""
+        now = time.monotonic()
+        wait = None
+        for key, group in self._groups.items():
+            age = now - group[0][4]
+            if len(group) >= self.max_batch or age >= self.max_wait or self._closed:
+                batch = group[:self.max_batch]
+                del group[:self.max_batch]
+                if not group:
+                    del self._groups[key]
+                self._pending -= len(batch)
+                return (key, batch), None
+            remaining = self.max_wait - age
+            wait = remaining if wait is None else min(wait, remaining)
+        return None, wait
+
+    def _dispatch(self, key: Hashable, batch: list):
+        now = time.monotonic()
+        live = []
+        for entry in batch:
+            _, future, _, deadline, _ = entry
+            if not future.set_running_or_notify_cancel():
+                continue
+            if deadline is not None and now >= deadline:
+                future.set_exception(DeadlineExceeded("Deadline passed while batching"))
+            else:
+                live.append(entry)
+        if not live:
+            return
+
+        scheduler = self.scheduler or get_inference_scheduler()
+        try:
+            scheduler.submit(self._execute, key, live, priority=min(e[2] for e in live))
+        except Exception as e:
+            for entry in live:
+                entry[1].set_exception(e)
+
+    def _execute(self, key: Hashable, batch: List[tuple]):
+        with self._cond:
+            self._batch_sizes[len(batch)] += 1
+        try:
+            results = self.run_batch(key, [entry[0] for entry in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Batch returned {len(results)} results for {len(batch)} items")
+        except BaseException as e:
+            for entry in batch:
+                entry[1].set_exception(e)
+            return
+        for entry, result in zip(batch, results):
+            entry[1].set_result(result)
+
+
+class SingleFlight:
+    """
+    Share one in-flight inference job between concurrent identical requests.
+
+    The first caller for a key submits the job to the inference scheduler;
+    callers arriving with the same key while it is queued or running wait
+    for that job's result instead of queueing a duplicate. Different keys
+    are independent jobs, so the scheduler's workers run them in parallel.
+
+    Args:
+        scheduler: Scheduler that runs the jobs (default: get_inference_scheduler())
+    """
+
+    def __init__(self, scheduler: Optional[InferenceScheduler] = None):
+        self.scheduler = scheduler
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._jobs = 0
+        self._shared = 0
+
+    def run(self, key: Hashable, fn: Callable, *args, priority: int = PRIORITY_NORMAL,
+            deadline: Optional[float] = None):
+        """
+        Run fn(*args) on the scheduler, or join the identical job already in flight.
+
+        Raises:
+            SchedulerFull: If the inference queue is full
+            DeadlineExceeded: If the deadline passes while queued or running
+        """
+        while True:
+            future, leader = self._join(key, fn, args, priority, deadline)
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeoutError as e:
+                if not isinstance(e, DeadlineExceeded):
+                    # Others may still be waiting for the job: leave it running
+                    raise DeadlineExceeded("Deadline passed while waiting for inference") from None
+                if leader or (deadline is not None and time.monotonic() >= deadline):
+                    raise
+                # The job was dropped under its first caller's deadline, not ours: resubmit
+
+    def metrics(self) -> dict:
+        """Jobs submitted, requests that joined an in-flight job, and jobs in flight now."""
+        with self._lock:
+            requests = self._jobs + self._shared
+            return {
+                "inflight": len(self._inflight),
+                "jobs": self._jobs,
+                "shared": self._shared,
+                "shared_rate": self._shared / requests if requests else 0.0,
+            }
+
+    def _join(self, key: Hashable, fn: Callable, args: tuple, priority: int,
+              deadline: Optional[float]):
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self._shared += 1
+                return future, False
+            scheduler = self.scheduler or get_inference_scheduler()
+            future = scheduler.submit(fn, *args, priority=priority, deadline=deadline)
+            self._inflight[key] = future
+            self._jobs += 1
+        # Outside the lock: the callback runs at once if the job already finished
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future, True
+
+    def _forget(self, key: Hashable, future: Future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
@@ -0,0 +1,418 @@
+# ============================================
+# RESILIENT CALLS: DEADLINES, RETRIES, HEDGING, CIRCUIT BREAKER
+# ============================================
+import asyncio
+import email.utils
+import inspect
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+from metrics import LatencyHistogram
+
+# HTTP statuses worth retrying (timeouts, conflicts, throttling, server errors)
+RETRY_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class LLMCallError(RuntimeError):
+    """Raised when a call failed after all retries or its total deadline passed."""
+
+    def __init__(self, message: str, attempts: int = 0, status: Optional[int] = None):
+        super().__init__(message)
+        self.attempts = attempts
+        self.status = status
+
+
+class CircuitOpenError(LLMCallError):
+    """Raised without calling the service while the circuit breaker is open."""
+
+
+class AttemptTimeout(TimeoutError):
+    """Raised when one attempt missed its per-attempt deadline."""
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of an API error (openai.APIStatusError and similar), or None."""
+    status = getattr(error, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def default_retryable(error: BaseException) -> bool:
+    """Retry throttling, server errors, timeouts and connection errors."""
+    status = status_code(error)
+    if status is not None:
+        return status in RETRY_STATUSES
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Delay requested by the server (retry-after-ms / Retry-After headers), or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return max(0.0, float(headers.get("retry-after-ms")) / 1000)
+    except ValueError:
+        pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def error_kind(error: BaseException) -> str:
+    """Short label for error counters: HTTP status, "timeout", "connection" or the type name."""
+    status = status_code(error)
+    if status is not None:
+        return str(status)
+    if isinstance(error, TimeoutError) or "Timeout" in type(error).__name__:
+        return "timeout"
+    if isinstance(error, ConnectionError) or "Connection" in type(error).__name__:
+        return "connection"
+    return type(error).__name__
+
+
+class CircuitBreaker:
+    """
+    Fail fast while a service is down.
+
+    The circuit opens after failure_threshold consecutive failures. While
+    open, allow() returns False for reset_timeout seconds; after that the
+    circuit is half-open and lets a single probe call through. A success
+    closes the circuit, a failure opens it again; a probe that ends without
+    a verdict (e.g. cancelled) hands the slot back with release_probe().
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit (0 = never open)
+        reset_timeout: Seconds the circuit stays open before a probe
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "open" if now - self._opened_at < self.reset_timeout else "half_open"
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (reserves the probe when half-open)."""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release_probe(self):
+        """Free the half-open probe slot without recording a result."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or (self.failure_threshold and self._failures >= self.failure_threshold):
+                if self._opened_at is None or self._probing:
+                    self.opened += 1
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+class ResilientCaller:
+    """
+    Run calls to a remote service with deadlines, retries, optional hedging
+    and a circuit breaker, and record latency and error metrics.
+
+    A call is a function attempt(timeout) that performs one request and
+    returns its result (for streamed replies: the opened stream up to the
+    first token). Each attempt gets min(attempt_timeout, time left before
+    total_timeout). Retryable failures are retried up to max_attempts with
+    full-jitter exponential backoff; a server-sent Retry-After is honoured
+    as the minimum delay. With hedge on, a second identical request is
+    started when an attempt is slower than the hedge_quantile of recent
+    attempt latencies and the first result wins; the loser is cancelled
+    (async) or passed to cleanup (sync) so its connection is released.
+
+    Args:
+        attempt_timeout: Seconds one attempt may take
+        total_timeout: Seconds a call may take, including retries and backoff
+        max_attempts: Attempts per call (1 = no retries)
+        backoff_base: Backoff scale in seconds (delay <= base * 2**retry)
+        backoff_max: Upper bound of one backoff delay
+        hedge: Start a hedged request after the hedge_quantile latency
+        hedge_quantile: Latency quantile that triggers the hedge
+        hedge_min_samples: Attempts observed before hedging starts
+        breaker: Circuit breaker (default: CircuitBreaker())
+        retryable: Callable(error) -> bool (default: default_retryable)
+        max_workers: Threads for sync attempts
+    """
+
+    def __init__(self, attempt_timeout: float = 20.0, total_timeout: float = 60.0, max_attempts: int = 3,
+                 backoff_base: float = 0.25, backoff_max: float = 8.0, hedge: bool = False,
+                 hedge_quantile: float = 0.95, hedge_min_samples: int = 20,
+                 breaker: Optional[CircuitBreaker] = None,
+                 retryable: Callable[[BaseException], bool] = default_retryable, max_workers: int = 32):
+        self.attempt_timeout = attempt_timeout
+        self.total_timeout = total_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self.retryable = retryable
+        self.latency = LatencyHistogram()
+        self.attempt_latency = LatencyHistogram()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="resilient-call")
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "succeeded": 0, "failed": 0, "rejected": 0, "attempts": 0,
+                          "retries": 0, "hedges": 0, "hedge_wins": 0}
+        self._errors = {}
+
+    # ---- sync ----
+
+    def call(self, attempt: Callable[[float], object], cleanup: Optional[Callable[[object], None]] = None):
+        """
+        Run attempt(timeout) with retries and return its result.
+
+        Args:
+            attempt: Callable(timeout) -> result, one request
+            cleanup: Callable(result) for results of abandoned hedged/timed-out attempts
+
+        Raises:
+            CircuitOpenError: The circuit is open (no request was sent)
+            LLMCallError: All attempts failed or the total deadline passed
+        """
+        start = self._begin()
+        deadline = start + self.total_timeout
+        attempts = 0
+        while True:
+            timeout = min(self.attempt_timeout, deadline - time.monotonic())
+            attempts += 1
+            try:
+                result = self._run_attempt(attempt, timeout, cleanup)
+            except Exception as e:
+                delay = self._after_failure(e, attempts, deadline)
+                if delay is None:
+                    raise self._give_up(e, attempts) from e
+                time.sleep(delay)
+            except BaseException:
+                self.breaker.release_probe()
+                raise
+            else:
+                return self._succeed(result, start)
+
+    def _run_attempt(self, attempt, timeout: float, cleanup):
+        started = time.monotonic()
+        end = started + timeout
+        hedge_at = self._hedge_delay()
+        first = self._submit(attempt, timeout)
+        pending, hedge, error = {first}, None, None
+        while pending:
+            now = time.monotonic()
+            if now >= end:
+                break
+            wait_for = end - now
+            if hedge is None and hedge_at is not None:
+                wait_for = min(wait_for, max(0.0, started + hedge_at - now))
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._abandon(pending, cleanup)
+                    self._finish_attempt(started, hedged=future is hedge)
+                    return future.result()
+                error = future.exception()
+            if pending and hedge is None and hedge_at is not None and time.monotonic() >= started + hedge_at:
+                hedge = self._submit(attempt, max(0.0, end - time.monotonic()))
+                pending.add(hedge)
+                self._count("hedges")
+        if pending:
+            self._abandon(pending, cleanup)
+            raise AttemptTimeout(f"No response within {timeout:.1f}s")
+        raise error
+
+    def _submit(self, attempt, timeout: float):
+        self._count("attempts")
+        return self._executor.submit(attempt, timeout)
+
+    @staticmethod
+    def _abandon(pending, cleanup):
+        """Release results of attempts nobody waits for any more."""
+        def release(future):
+            if cleanup is not None and not future.cancelled() and future.exception() is None:
+                try:
+                    cleanup(future.result())
+                except Exception:
+                    pass
+        for future in pending:
+            future.cancel()
+            future.add_done_callback(release)
+
+    # ---- async ----
+
+    async def call_async(self, attempt: Callable[[float], object], cleanup: Optional[Callable[[object], object]] = None):
+        """
+        Async variant of call: attempt(timeout) returns an awaitable.
+        Abandoned attempts are cancelled; cleanup (may be async) gets the
+        results of attempts that finished anyway.
+        """
+        start = self._begin()
+        deadline = start + self.total_timeout
+        attempts = 0
+        while True:
+            timeout = min(self.attempt_timeout, deadline - time.monotonic())
+            attempts += 1
+            try:
+                result = await self._run_attempt_async(attempt, timeout, cleanup)
+            except asyncio.CancelledError:
+                # Barge-in cancels the turn; that says nothing about the service
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                delay = self._after_failure(e, attempts, deadline)
+                if delay is None:
+                    raise self._give_up(e, attempts) from e
+                await asyncio.sleep(delay)
+            else:
+                return self._succeed(result, start)
+
+    async def _run_attempt_async(self, attempt, timeout: float, cleanup):
+        started = time.monotonic()
+        end = started + timeout
+        hedge_at = self._hedge_delay()
+        self._count("attempts")
+        pending, hedge, error = {asyncio.ensure_future(attempt(timeout))}, None, None
+        try:
+            while pending:
+                now = time.monotonic()
+                if now >= end:
+                    break
+                wait_for = end - now
+                if hedge is None and hedge_at is not None:
+                    wait_for = min(wait_for, max(0.0, started + hedge_at - now))
+                done, pending = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._finish_attempt(started, hedged=task is hedge)
+                        return task.result()
+                    error = task.exception()
+                if pending and hedge is None and hedge_at is not None and time.monotonic() >= started + hedge_at:
+                    self._count("attempts")
+                    self._count("hedges")
+                    hedge = asyncio.ensure_future(attempt(max(0.0, end - time.monotonic())))
+                    pending.add(hedge)
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(lambda t: self._release_async(t, cleanup))
+        if pending:
+            raise AttemptTimeout(f"No response within {timeout:.1f}s")
+        raise error
+
+    @staticmethod
+    def _release_async(task, cleanup):
+        if cleanup is None or task.cancelled() or task.exception() is not None:
+            return
+        try:
+            result = cleanup(task.result())
+            if inspect.isawaitable(result):
+                asyncio.ensure_future(result)
+        except Exception:
+            pass
+
+    # ---- shared bookkeeping ----
+
+    def _begin(self) -> float:
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError("Service unavailable: circuit breaker is open")
+        return time.monotonic()
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge:
+            return None
+        return self.attempt_latency.quantile(self.hedge_quantile, self.hedge_min_samples)
+
+    def _finish_attempt(self, started: float, hedged: bool):
+        self.attempt_latency.observe(time.monotonic() - started)
+        if hedged:
+            self._count("hedge_wins")
+
+    def _succeed(self, result, start: float):
+        self.breaker.record_success()
+        self.latency.observe(time.monotonic() - start)
+        self._count("succeeded")
+        return result
+
+    def _after_failure(self, error: BaseException, attempts: int, deadline: float) -> Optional[float]:
+        """Record a failed attempt; return the backoff before the next one, or None to give up."""
+        with self._lock:
+            kind = error_kind(error)
+            self._errors[kind] = self._errors.get(kind, 0) + 1
+        if not (isinstance(error, AttemptTimeout) or self.retryable(error)):
+            # The service answered; the request itself is bad
+            self.breaker.record_success()
+            return None
+        self.breaker.record_failure()
+        if attempts >= self.max_attempts or self.breaker.state == "open":
+            return None
+        delay = random.uniform(0.0, min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1)))
+        delay = max(delay, retry_after_seconds(error) or 0.0)
+        if time.monotonic() + delay >= deadline:
+            return None
+        self._count("retries")
+        return delay
+
+    def _give_up(self, error: BaseException, attempts: int) -> LLMCallError:
+        self._count("failed")
+        return LLMCallError(f"Request failed after {attempts} attempt(s): {error}", attempts, status_code(error))
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] += n
+
+    def stats(self) -> dict:
+        """Call counters, errors by kind, circuit state and latency histograms (seconds)."""
+        with self._lock:
+            counters = dict(self._counters)
+            errors = dict(self._errors)
+        return {
+            **counters,
+            "errors": errors,
+            "circuit": self.breaker.state,
+            "circuit_opened": self.breaker.opened,
+            "latency": self.latency.snapshot(),
+            "attempt_latency": self.attempt_latency.snapshot(),
+        }
@@ -0,0 +1,169 @@
+# ============================================
+# LLM RESPONSE CACHE (MEMORY LRU + TTL + OPTIONAL DISK TIER)
+# ============================================
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from disk_tier import DiskTier
+
+
+def normalize_user_message(text: str) -> str:
+    """
+    Normalize a user message for cache keys, so near-duplicates share a key:
+    Unicode NFKC, case-folded, punctuation dropped, whitespace collapsed.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def history_digest(messages: list, last_n: Optional[int] = None) -> str:
+    """
+    Digest of the user/assistant messages, or of the last_n of them (the
+    context a reply to the next user message depends on). Empty history -> "".
+    """
+    history = [m for m in messages if m.get("role") in ("user", "assistant")]
+    if last_n is not None:
+        history = history[-last_n:] if last_n > 0 else []
+    if not history:
+        return ""
+    raw = "\x1e".join(f"{m['role']}\x1f{normalize_user_message(m['content'])}" for m in history)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def make_response_key(qa_scores_json: dict, user_message: str, history: str = "",
+                      model: str = "", temperature: float = 0.0) -> str:
+    """Stable cache key for one assistant reply."""
+    scores = json.dumps(qa_scores_json, sort_keys=True, ensure_ascii=False)
+    raw = "\x1f".join([model, f"{float(temperature):.3f}",
+                       hashlib.sha256(scores.encode("utf-8")).hexdigest(),
+                       history, normalize_user_message(user_message)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    LRU cache of assistant replies with a time-to-live.
+
+    Entries are reply strings keyed by make_response_key, stored together
+    with the latency of the API call that produced them so hits can report
+    the time they saved. When disk_dir is set, every entry is also written
+    there as .json so it survives restarts and is shared between processes;
+    memory misses fall back to the disk tier before reporting a miss. The
+    disk tier is pruned (least recently used first) to disk_max_entries.
+
+    Args:
+        max_entries: Number of replies kept in memory
+        ttl: Seconds an entry stays valid (0 = no expiry)
+        disk_dir: Directory for the persistent tier (None to disable)
+        disk_max_entries: Number of replies kept on disk
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 24 * 3600,
+                 disk_dir: Optional[str] = None, disk_max_entries: int = 50_000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.disk_max_entries = disk_max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+        self._disk = DiskTier(disk_dir, ".json", max_files=disk_max_entries) if disk_dir else None
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached reply for key, or None on a miss."""
+        now = time.time()
+        expired = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_fresh(entry, now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.saved_seconds += entry["latency"]
+                    return entry["response"]
+                del self._entries[key]
+                expired = True
+
+        entry = self._read_disk(key)
+        if entry is not None and not self._is_fresh(entry, now):
+            self._remove_disk(key)
+            entry, expired = None, True
+        with self._lock:
+            if entry is None:
+                self.expired += expired
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self.saved_seconds += entry["latency"]
+            self._insert(key, entry)
+        return entry["response"]
+
+    def put(self, key: str, response: str, latency: float = 0.0):
+        """Store a reply (and the seconds it took to produce) in memory and on disk."""
+        entry = {"response": response, "latency": float(latency), "created": time.time()}
+        with self._lock:
+            self._insert(key, entry)
+        self._write_disk(key, entry)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and the API time saved by hits."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "saved_seconds": self.saved_seconds,
+            }
+
+    def clear(self):
+        """Drop all in-memory entries (the disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def _is_fresh(self, entry: dict, now: float) -> bool:
+        return not self.ttl or now - entry["created"] < self.ttl
+
+    def _insert(self, key: str, entry: dict):
+        if self.max_entries <= 0:
+            return
+        self._entries.pop(key, None)
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read_disk(self, key: str) -> Optional[dict]:
+        return self._disk.read(key, _load_json_entry) if self._disk is not None else None
+
+    def _remove_disk(self, key: str):
+        if self._disk is not None:
+            self._disk.remove(key)
+
+    def _write_disk(self, key: str, entry: dict):
+        if self._disk is not None:
+            data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+            self._disk.write(key, lambda f: f.write(data))
+
+
+def _load_json_entry(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        entry = json.load(f)
+    return {"response": str(entry["response"]), "latency": float(entry["latency"]),
+            "created": float(entry["created"])}
@@ -0,0 +1,306 @@
+# ============================================
+# LOCAL FAST PATH FOR SCORE / FEEDBACK LOOKUPS
+# ============================================
+import re
+import unicodedata
+from typing import Iterable, Optional
+
+# Aliases per QA category (English, German, Ukrainian). Category names that
+# are not listed here are matched by their own name only.
+CATEGORY_ALIASES = {
+    "Composition and Design": [
+        "composition and design", "composition", "design", "layout",
+        "komposition", "bildaufbau", "gestaltung",
+        "композиція", "композиції", "композицію", "дизайн",
+    ],
+    "Proportions and Anatomy": [
+        "proportions and anatomy", "proportions", "proportion", "anatomy",
+        "proportionen", "anatomie",
+        "пропорції", "пропорцій", "анатомія", "анатомії",
+    ],
+    "Perspective and Depth": [
+        "perspective and depth", "perspective", "depth",
+        "perspektive", "tiefe", "räumlichkeit",
+        "перспектива", "перспективи", "перспективу", "глибина", "глибини",
+    ],
+    "Use of Light and Shadow": [
+        "use of light and shadow", "light and shadow", "lighting", "light", "shadows", "shadow", "shading",
+        "licht und schatten", "licht", "schatten", "beleuchtung",
+        "світло і тінь", "світла і тіні", "світло", "світла", "тіні", "тінь", "освітлення",
+    ],
+    "Color Theory and Application": [
+        "color theory and application", "color theory", "colors", "colours", "color", "colour",
+        "farbe", "farben", "farbgebung",
+        "колір", "кольори", "кольору", "кольорів",
+    ],
+    "Brushwork and Technique": [
+        "brushwork and technique", "brushwork", "brush strokes", "technique",
+        "pinselführung", "pinselstrich", "technik",
+        "мазки", "мазків", "техніка", "техніку", "техніки",
+    ],
+    "Expression and Emotion": [
+        "expression and emotion", "expression", "emotion", "emotions",
+        "ausdruck", "emotion", "gefühl",
+        "вираз", "виразу", "емоція", "емоції", "емоцій",
+    ],
+    "Creativity and Originality": [
+        "creativity and originality", "creativity", "originality",
+        "kreativität", "originalität",
+        "креативність", "креативності", "оригінальність", "оригінальності",
+    ],
+    "Attention to Detail": [
+        "attention to detail", "details", "detail",
+        "details", "detailtreue", "genauigkeit",
+        "деталі", "деталей", "деталізація",
+    ],
+    "Overall Impact": [
+        "overall impact", "overall impression", "general impression",
+        "gesamteindruck", "gesamtwirkung",
+        "загальне враження", "загального враження",
+    ],
+}
+
+# Words that mark a score or feedback lookup, per language
+SCORE_WORDS = {
+    "en": ["score", "scores", "rating", "rated", "points", "grade", "mark"],
+    "de": ["punkte", "punktzahl", "note", "noten", "bewertung", "wertung"],
+    "uk": ["оцінка", "оцінку", "оцінки", "бал", "бали", "балів"],
+}
+FEEDBACK_WORDS = {
+    "en": ["feedback", "comment", "comments", "review", "remarks"],
+    "de": ["feedback", "rückmeldung", "kommentar"],
+    "uk": ["відгук", "коментар", "фідбек"],
+}
+ALL_WORDS = {
+    "en": ["all", "every", "each"],
+    "de": ["alle", "allen", "jede"],
+    "uk": ["всі", "усі", "всіх", "усіх"],
+}
+# Turns that ask for advice or explanation need the LLM, even if they name a category
+LLM_WORDS = [
+    "why", "how can", "how do", "how to", "improve", "better", "fix", "explain", "mean", "should", "help", "tip",
+    "warum", "wieso", "weshalb", "wie kann", "verbessern", "besser", "erklär", "bedeutet", "soll", "tipp",
+    "чому", "як можна", "як мені", "покращ", "краще", "виправ", "поясни", "означає", "порад",
+]
+# Only these words may appear besides category aliases and intent words, so that
+# anything with extra content (comparisons, conditions, ...) goes to the LLM
+FILLER_WORDS = {
+    "en": "what whats what's is was are my the for in of on me tell show give can you please i got get did "
+          "a an and about your it its how much many high low current list",
+    "de": "was ist sind war meine mein meinen meiner die der das den für im in bei zu mir zeig zeige sag "
+          "sage gib kannst du bitte ich habe hab bekommen wie hoch viele welche von über und zu zum zur",
+    "uk": "яка який яку які що моя мій мою мої за в у по мені скажи покажи дай можеш будь ласка я отримав "
+          "отримала яка скільки про і та й",
+}
+# Replies are plain prose (no lists or labels), like the LLM's, and end with a follow-up question
+REPLIES = {
+    "en": {"score": "Your score for {name} is {score} out of 10.", "all": "You got {items}.",
+           "item": "{score} for {name}", "and": "and",
+           "feedback": "Here's what the review says about {name}. {feedback}"},
+    "de": {"score": "Deine Punktzahl für {name} ist {score} von 10.", "all": "Du hast {items} bekommen.",
+           "item": "{score} für {name}", "and": "und"},
+    "uk": {"score": "Твоя оцінка за {name} — {score} з 10.", "all": "Ось твої оцінки: {items}.",
+           "item": "{score} за {name}", "and": "і"},
+}
+# Follow-up questions, used in order; each is asked at most once per conversation
+FOLLOW_UPS = {
+    "en": [
+        "Which category would you like to look at next?",
+        "Is there a score you'd like me to explain?",
+        "Want a tip for one of your categories?",
+        "What else would you like to know?",
+        "Curious about the feedback behind a score?",
+    ],
+    "de": [
+        "Welchen Bereich möchtest du dir als Nächstes anschauen?",
+        "Soll ich dir eine Punktzahl genauer erklären?",
+        "Möchtest du einen Tipp für einen Bereich?",
+        "Was möchtest du noch wissen?",
+        "Interessiert dich das Feedback hinter einer Punktzahl?",
+    ],
+    "uk": [
+        "Яку категорію хочеш розглянути далі?",
+        "Пояснити тобі якусь оцінку детальніше?",
+        "Хочеш пораду для якоїсь категорії?",
+        "Що ще хочеш дізнатися?",
+        "Цікаво, що стоїть за якоюсь оцінкою?",
+    ],
+}
+CATEGORY_NAMES = {
+    "de": {
+        "Composition and Design": "Komposition und Gestaltung",
+        "Proportions and Anatomy": "Proportionen und Anatomie",
+        "Perspective and Depth": "Perspektive und Tiefe",
+        "Use of Light and Shadow": "Licht und Schatten",
+        "Color Theory and Application": "Farbe",
+        "Brushwork and Technique": "Pinselführung und Technik",
+        "Expression and Emotion": "Ausdruck und Emotion",
+        "Creativity and Originality": "Kreativität und Originalität",
+        "Attention to Detail": "Details",
+        "Overall Impact": "Gesamteindruck",
+    },
+    "uk": {
+        "Composition and Design": "композицію і дизайн",
+        "Proportions and Anatomy": "пропорції та анатомію",
+        "Perspective and Depth": "перспективу і глибину",
+        "Use of Light and Shadow": "світло і тінь",
+        "Color Theory and Application": "колір",
+        "Brushwork and Technique": "техніку",
+        "Expression and Emotion": "вираз і емоції",
+        "Creativity and Originality": "креативність і оригінальність",
+        "Attention to Detail": "деталі",
+        "Overall Impact": "загальне враження",
+    },
+}
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, NFKC, punctuation (except apostrophes) to spaces, collapsed whitespace."""
+    text = unicodedata.normalize("NFKC", text).casefold().replace("’", "'")
+    text = re.sub(r"[^\w\s']", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _format_score(score) -> str:
+    return f"{score:g}" if isinstance(score, (int, float)) else str(score)
+
+
+class ScoreIndex:
+    """
+    Per-conversation index over the categories of one qa_scores_json, plus
+    an intent matcher that answers unambiguous score and feedback lookups
+    without the LLM.
+
+    answer() returns None (use the LLM) unless the message names exactly
+    one category (or asks for all scores), contains a score/feedback word,
+    no advice/explanation word and nothing beyond filler words. Feedback
+    lookups are answered locally only in English, the language the
+    feedback text is written in; scores are answered in en/de/uk.
+    Replies are prose ending with a follow-up question that was not asked
+    earlier in the conversation (None once all of them have been used).
+
+    Args:
+        qa_scores_json: QA scores ({category: {"score", "feedback", ...}})
+    """
+
+    def __init__(self, qa_scores_json: dict):
+        self.qa_scores_json = qa_scores_json
+        self.scores = {name: entry for name, entry in qa_scores_json.items() if isinstance(entry, dict)}
+        # Normalized alias -> category, longest aliases first so phrases win over single words
+        aliases = {}
+        for name in self.scores:
+            for alias in [name] + CATEGORY_ALIASES.get(name, []):
+                aliases.setdefault(normalize_query(alias), name)
+        self._aliases = sorted(aliases.items(), key=lambda item: -len(item[0]))
+        # Word -> (intents, languages) it marks; filler words mark a language only
+        self._words = {}
+        for intent, table in (("score", SCORE_WORDS), ("feedback", FEEDBACK_WORDS), ("all", ALL_WORDS)):
+            for lang, words in table.items():
+                for word in words:
+                    intents, langs = self._words.setdefault(word, (set(), set()))
+                    intents.add(intent)
+                    langs.add(lang)
+        for lang, words in FILLER_WORDS.items():
+            for word in words.split():
+                self._words.setdefault(word, (set(), set()))[1].add(lang)
+        self._llm_pattern = re.compile(r"(?:^|\s)(?:" + "|".join(re.escape(w) for w in LLM_WORDS) + ")")
+
+    def match_categories(self, text: str) -> tuple:
+        """Return (categories named in text, text with the aliases removed)."""
+        padded = f" {text} "
+        found = []
+        for alias, name in self._aliases:
+            needle = f" {alias} "
+            if needle in padded:
+                padded = padded.replace(needle, " ")
+                if name not in found:
+                    found.append(name)
+        return found, padded.split()
+
+    def answer(self, message: str, previous_replies: Iterable[str] = ()) -> Optional[dict]:
+        """
+        Answer message locally if it is an unambiguous lookup.
+
+        Args:
+            message: The user message
+            previous_replies: Earlier assistant messages of the conversation
+
+        Returns:
+            {"intent": "score" | "feedback" | "all", "category": str | None,
+             "language": str, "text": str}, or None to fall back to the LLM
+        """
+        text = normalize_query(message)
+        if not text or self._llm_pattern.search(text):
+            return None
+        categories, rest = self.match_categories(text)
+
+        intents, votes = set(), {}
+        for word in rest:
+            marks = self._words.get(word)
+            if marks is None:
+                return None
+            intents.update(marks[0])
+            for lang in marks[1]:
+                votes[lang] = votes.get(lang, 0) + 1
+
+        language = self._language(message, votes)
+        if "all" in intents and "score" in intents and not categories and "feedback" not in intents:
+            intent, name, text = "all", None, self._all_scores(language)
+        elif len(categories) != 1 or "all" in intents:
+            return None
+        else:
+            intent, name = next(iter(intents), None), categories[0]
+            text = self._category_reply(intents, name, language)
+        if text is None:
+            return None
+        follow_up = self._follow_up(language, previous_replies)
+        if follow_up is None:
+            return None
+        return {"intent": intent, "category": name, "language": language, "text": f"{text} {follow_up}"}
+
+    def _category_reply(self, intents: set, name: str, language: str) -> Optional[str]:
+        entry = self.scores[name]
+        replies = REPLIES[language]
+        if intents == {"score"} and "score" in entry:
+            return replies["score"].format(name=self._display_name(name, language),
+                                           score=_format_score(entry["score"]))
+        if intents == {"feedback"} and language == "en" and entry.get("feedback"):
+            return replies["feedback"].format(name=self._display_name(name, language),
+                                              feedback=entry["feedback"].strip())
+        return None
+
+    def _all_scores(self, language: str) -> Optional[str]:
+        replies = REPLIES[language]
+        items = []
+        for name, entry in self.scores.items():
+            if "score" not in entry:
+                return None
+            items.append(replies["item"].format(name=self._display_name(name, language),
+                                                score=_format_score(entry["score"])))
+        if not items:
+            return None
+        if len(items) > 1:
+            items[-2:] = [f"{items[-2]} {replies['and']} {items[-1]}"]
+        return replies["all"].format(items=", ".join(items))
+
+    @staticmethod
+    def _display_name(name: str, language: str) -> str:
+        """Category name as it reads inside a sentence."""
+        if language == "en":
+            return name.lower()
+        return CATEGORY_NAMES.get(language, {}).get(name, name)
+
+    @staticmethod
+    def _follow_up(language: str, previous_replies: Iterable[str]) -> Optional[str]:
+        asked = " ".join(previous_replies)
+        return next((question for question in FOLLOW_UPS[language] if question not in asked), None)
+
+    @staticmethod
+    def _language(message: str, votes: dict) -> str:
+        """Cyrillic script means Ukrainian; otherwise the language most of the words belong to."""
+        if re.search(r"[\u0400-\u04ff]", message):
+            return "uk"
+        en, de = votes.get("en", 0), votes.get("de", 0)
+        if de > en or (de == en and re.search(r"[äöüß]", message.casefold())):
+            return "de"
+        return "en"
@@ -0,0 +1,263 @@
+# ============================================
+# STREAMING STT WITH PARTIAL TRANSCRIPTS
+# ============================================
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+
+from audio_utils import STT_BACKEND, _submit_short, _transcribe_short, trim_silence
+from inference_scheduler import PRIORITY_HIGH, PRIORITY_LOW, SchedulerFull, get_inference_scheduler
+
+
+class AudioRingBuffer:
+    """
+    Fixed-capacity float32 ring buffer for incoming PCM.
+
+    Positions are absolute sample indices since the start of the stream;
+    only the window [start, end) is held. Writing past the capacity raises
+    OverflowError, so callers must discard consumed audio in time.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self.start = 0
+        self.end = 0
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def write(self, samples: np.ndarray):
+        n = len(samples)
+        if len(self) + n > self.capacity:
+            raise OverflowError("Audio ring buffer is full")
+        pos = self.end % self.capacity
+        first = min(n, self.capacity - pos)
+        self._data[pos:pos + first] = samples[:first]
+        if first < n:
+            self._data[:n - first] = samples[first:]
+        self.end += n
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Copy the absolute sample range [start, end) out of the buffer."""
+        start, end = max(start, self.start), min(end, self.end)
+        if end <= start:
+            return np.zeros(0, dtype=np.float32)
+        pos = start % self.capacity
+        n = end - start
+        if pos + n <= self.capacity:
+            return self._data[pos:pos + n].copy()
+        first = self.capacity - pos
+        return np.concatenate((self._data[pos:], self._data[:n - first]))
+
+    def discard_until(self, position: int):
+        """Drop everything before the absolute sample position."""
+        self.start = min(max(self.start, position), self.end)
+
+
+class StreamingRecognizer:
+    """
+    Incremental speech recognizer session for live calls.
+
+    PCM frames are pushed with accept_audio() (float32) or accept_pcm16()
+    (16-bit little-endian bytes) at sample_rate. While the caller speaks, a
+    partial hypothesis of the current (not yet finalized) utterance is
+    decoded every partial_interval_s of new audio. When endpoint_silence_ms
+    of silence follows speech, or the utterance reaches max_utterance_s, it
+    is decoded one last time, emitted as final and dropped from the buffer,
+    so finalized audio is never decoded again. Utterances that decode to no
+    text produce no final.
+
+    Decodes run on the shared inference scheduler (micro-batched with other
+    sessions' clips): finals at high priority and blocking, partials at low
+    priority in the background, so audio intake never waits for them. At
+    most one partial is in flight; its event is returned by a later
+    accept_audio() call, or dropped if the utterance was finalized first.
+    Under load a rejected partial is skipped (the previous partial stays
+    current) instead of queueing stale work.
+
+    Events are dictionaries:
+        {"type": "partial" | "final", "text": str, "start_s": float, "end_s": float}
+
+    Args:
+        language: Language code passed to Whisper
+        model_name: STT model (loaded through get_stt_pipeline)
+        sample_rate: Rate of the incoming audio (16000 for Whisper)
+        partial_interval_s: Minimum new audio between partial decodes
+        endpoint_silence_ms: Trailing silence that finalizes an utterance
+        max_utterance_s: Force finalization of utterances longer than this
+        silence_threshold_db: Frame level (dBFS) below which audio counts as silence
+        backend: STT backend, see load_stt_model
+        transcribe_fn: Optional callable(audio, sample_rate) -> text replacing
+            the Whisper pipeline (e.g. for offline tests)
+    """
+
+    FRAME_MS = 30
+
+    def __init__(self, language: str = "de", model_name: str = "distil-whisper/distil-large-v3",
+                 sample_rate: int = 16000, partial_interval_s: float = 0.8,
+                 endpoint_silence_ms: float = 700.0, max_utterance_s: float = 25.0,
+                 silence_threshold_db: float = -45.0, backend: str = STT_BACKEND,
+                 transcribe_fn: Optional[Callable[[np.ndarray, int], str]] = None):
+        self.language = language
+        self.model_name = model_name
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.partial_interval = int(partial_interval_s * sample_rate)
+        self.endpoint_silence = int(endpoint_silence_ms * sample_rate / 1000)
+        self.max_utterance = int(max_utterance_s * sample_rate)
+        self.silence_threshold_db = silence_threshold_db
+        self.transcribe_fn = transcribe_fn
+        self._frame = int(sample_rate * self.FRAME_MS / 1000)
+        # Room for one full utterance plus the endpoint silence and a frame of slack
+        self._buffer = AudioRingBuffer(self.max_utterance + self.endpoint_silence + 4 * self._frame)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._utterance_start = 0
+        self._last_voice_end = None
+        self._last_partial_at = 0
+        self._last_partial_text = ""
+        self._partial = None
+        self.finals = []
+        self.decode_calls = 0
+
+    def accept_pcm16(self, data: bytes) -> List[dict]:
+        """Accept 16-bit little-endian PCM bytes."""
+        samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+        return self.accept_audio(samples)
+
+    def accept_audio(self, samples: Union[np.ndarray, list]) -> List[dict]:
+        """
+        Accept mono float32 samples and return any partial/final events.
+        """
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+        # Only whole frames are analysed; the remainder waits for the next call
+        usable = len(samples) - len(samples) % self._frame
+        self._pending = samples[usable:].copy()
+        events = []
+        for offset in range(0, usable, self._frame):
+            event = self._accept_frame(samples[offset:offset + self._frame])
+            if event is not None:
+                events.append(event)
+        event = self._collect_partial()
+        if event is not None:
+            events.append(event)
+        return events
+
+    def finish(self) -> List[dict]:
+        """Flush the stream: finalize whatever speech is still buffered."""
+        if len(self._pending):
+            self._buffer.write(self._pending)
+            self._pending = np.zeros(0, dtype=np.float32)
+        if self._last_voice_end is None:
+            self._drop_partial()
+            return []
+        event = self._finalize(self._buffer.end)
+        return [event] if event is not None else []
+
+    @property
+    def transcript(self) -> str:
+        """All finalized text so far."""
+        return " ".join(e["text"] for e in self.finals if e["text"])
+
+    def _accept_frame(self, frame: np.ndarray) -> Optional[dict]:
+        self._buffer.write(frame)
+        level_db = 10.0 * np.log10(float(np.dot(frame, frame)) / len(frame) + 1e-10)
+        if level_db > self.silence_threshold_db:
+            if self._last_voice_end is None:
+                # Keep a little lead-in before the first voiced frame
+                self._utterance_start = max(self._buffer.start, self._buffer.end - len(frame) - 10 * self._frame)
+                self._last_partial_at = self._utterance_start
+            self._last_voice_end = self._buffer.end
+
+        if self._last_voice_end is None:
+            # No speech yet: keep only the lead-in window
+            self._buffer.discard_until(self._buffer.end - 10 * self._frame)
+            return None
+
+        end = self._buffer.end
+        if end - self._last_voice_end >= self.endpoint_silence:
+            return self._finalize(end)
+        if end - self._utterance_start >= self.max_utterance:
+            return self._finalize(end)
+        if end - self._last_partial_at >= self.partial_interval and self._partial is None:
+            self._last_partial_at = end
+            self._submit_partial(self._utterance_start, end)
+        return None
+
+    def _finalize(self, end: int) -> Optional[dict]:
+        self._drop_partial()
+        start = self._utterance_start
+        text = self._decode(start, end)
+        self._buffer.discard_until(end)
+        self._utterance_start = end
+        self._last_voice_end = None
+        self._last_partial_text = ""
+        if not text:
+            return None
+        event = self._event("final", text, start, end)
+        self.finals.append(event)
+        return event
+
+    def _decode(self, start: int, end: int) -> str:
+        """Decode [start, end) at high priority and wait for the text."""
+        audio = self._speech(start, end)
+        if len(audio) == 0:
+            return ""
+        self.decode_calls += 1
+        if self.transcribe_fn is not None:
+            return self.transcribe_fn(audio, self.sample_rate).strip()
+        result = _transcribe_short(
+            audio, self.sample_rate, self.language, self.model_name, self.backend, priority=PRIORITY_HIGH)
+        return result.get("text", "").strip()
+
+    def _submit_partial(self, start: int, end: int):
+        """Queue a low-priority decode of [start, end); skipped if the queue is full."""
+        audio = self._speech(start, end)
+        if len(audio) == 0:
+            return
+        try:
+            if self.transcribe_fn is not None:
+                future = get_inference_scheduler().submit(
+                    lambda: {"text": self.transcribe_fn(audio, self.sample_rate)}, priority=PRIORITY_LOW)
+            else:
+                future = _submit_short(
+                    audio, self.sample_rate, self.language, self.model_name, self.backend, priority=PRIORITY_LOW)
+        except SchedulerFull:
+            return
+        self.decode_calls += 1
+        self._partial = (future, start, end)
+
+    def _collect_partial(self) -> Optional[dict]:
+        """The partial event of a finished background decode, if any."""
+        if self._partial is None or not self._partial[0].done():
+            return None
+        future, start, end = self._partial
+        self._partial = None
+        if future.cancelled() or future.exception() is not None:
+            return None
+        text = future.result().get("text", "").strip()
+        if not text or text == self._last_partial_text:
+            return None
+        self._last_partial_text = text
+        return self._event("partial", text, start, end)
+
+    def _drop_partial(self):
+        if self._partial is not None:
+            # Still queued: never runs; already running: the result is ignored
+            self._partial[0].cancel()
+            self._partial = None
+
+    def _speech(self, start: int, end: int) -> np.ndarray:
+        audio = self._buffer.read(start, end)
+        audio, _ = trim_silence(audio, self.sample_rate)
+        return audio
+
+    def _event(self, kind: str, text: str, start: int, end: int) -> dict:
+        return {
+            "type": kind,
+            "text": text,
+            "start_s": start / self.sample_rate,
+            "end_s": end / self.sample_rate,
+        }
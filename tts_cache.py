@@ -0,0 +1,134 @@
+# ============================================
+# BOUNDED TTS AUDIO CACHE (MEMORY LRU + OPTIONAL DISK TIER)
+# ============================================
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from disk_tier import DiskTier
+
+
+def normalize_tts_text(text: str) -> str:
+    """Normalize text for cache keys (Unicode NFKC, collapsed whitespace)."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def make_cache_key(text: str, voice: str, speed: float, language: str, backend: str = "") -> str:
+    """Stable cache key for one synthesized segment."""
+    raw = "\x1f".join([backend, voice, f"{float(speed):.3f}", language, normalize_tts_text(text)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    LRU cache of synthesized audio segments with a memory budget.
+
+    Entries are float32 PCM arrays keyed by make_cache_key. When disk_dir is
+    set, every entry is also written there as .npz so it survives restarts;
+    memory misses fall back to the disk tier before reporting a miss. The
+    disk tier is pruned (least recently used first) to disk_max_bytes.
+
+    Args:
+        max_bytes: Memory budget for cached audio
+        disk_dir: Directory for the persistent tier (None to disable)
+        disk_max_bytes: Size budget for the disk tier
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, disk_dir: Optional[str] = None,
+                 disk_max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._disk = DiskTier(disk_dir, ".npz", max_bytes=disk_max_bytes) if disk_dir else None
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, int]]:
+        """Return (audio, sample_rate) for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(key, entry)
+        return entry
+
+    def put(self, key: str, audio: np.ndarray, sample_rate: int):
+        """Store a synthesized segment in memory (and on disk if enabled)."""
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        # Cached arrays are shared between callers, so make them read-only
+        audio.setflags(write=False)
+        entry = (audio, int(sample_rate))
+        with self._lock:
+            self._insert(key, entry)
+        self._write_disk(key, entry)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current memory usage."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        """Drop all in-memory entries (the disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _insert(self, key: str, entry: Tuple[np.ndarray, int]):
+        size = entry[0].nbytes
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[0].nbytes
+        self._entries[key] = entry
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _read_disk(self, key: str) -> Optional[Tuple[np.ndarray, int]]:
+        if self._disk is None:
+            return None
+        entry = self._disk.read(key, _load_npz)
+        if entry is not None:
+            entry[0].setflags(write=False)
+        return entry
+
+    def _write_disk(self, key: str, entry: Tuple[np.ndarray, int]):
+        if self._disk is not None:
+            self._disk.write(key, lambda f: np.savez(f, audio=entry[0], sample_rate=np.int32(entry[1])))
+
+
+def _load_npz(path: str) -> Tuple[np.ndarray, int]:
+    with np.load(path) as data:
+        return data["audio"].astype(np.float32, copy=False), int(data["sample_rate"])
@@ -0,0 +1,200 @@
+# ============================================
+# PIPELINED VOICE TURN: STT -> STREAMING LLM -> SENTENCE TTS
+# ============================================
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from audio_utils import SentenceSplitter, text_to_speech, transcribe_audio
+
+# Sentinel marking the end of a stage queue
+_END = object()
+
+
+class VoiceTurn:
+    """
+    One running voice turn.
+
+    Audio chunks become available in sentence order through iter_audio()
+    while the LLM is still streaming later sentences. Stage latencies (in
+    seconds, relative to the start of the turn) are collected in latencies:
+
+        stt                 transcription finished
+        llm_first_token     first LLM delta received
+        llm_first_sentence  first complete sentence handed to TTS
+        llm_done            LLM stream finished
+        tts_first_audio     first audio chunk ready for playback
+        tts_done            last audio chunk ready
+        total               turn finished (all stages)
+
+    tts_synthesis holds the synthesis time of every sentence.
+    """
+
+    def __init__(self):
+        self.transcript = ""
+        self.reply = ""
+        self.sentences = []
+        self.latencies = {}
+        self.tts_synthesis = []
+        self.error = None
+        self._start = time.perf_counter()
+        self._audio_queue = queue.Queue()
+        self._done = threading.Event()
+
+    def _mark(self, stage: str):
+        self.latencies.setdefault(stage, time.perf_counter() - self._start)
+
+    def iter_audio(self, timeout: Optional[float] = None) -> Iterator[Tuple[int, str, bytes]]:
+        """
+        Yield (index, sentence, audio_bytes) in playback order as chunks become ready.
+
+        Raises:
+            RuntimeError: If any stage of the turn failed
+        """
+        while True:
+            item = self._audio_queue.get(timeout=timeout)
+            if item is _END:
+                break
+            yield item
+        self._done.wait()
+        if self.error is not None:
+            raise RuntimeError(f"Voice turn failed: {str(self.error)}") from self.error
+
+    def wait(self, timeout: Optional[float] = None) -> str:
+        """Block until the turn is finished and return the full reply text."""
+        self._done.wait(timeout)
+        if self.error is not None:
+            raise RuntimeError(f"Voice turn failed: {str(self.error)}") from self.error
+        return self.reply
+
+
+class VoiceTurnPipeline:
+    """
+    Run STT, the streaming LLM and sentence-level TTS as overlapping stages.
+
+    The LLM stage feeds deltas into a SentenceSplitter; every completed
+    sentence is queued for a TTS worker thread, so the first sentence is
+    synthesized while the LLM is still producing the rest. Audio is queued
+    for playback in sentence order.
+
+    All stages are injectable, so the pipeline runs offline with fakes:
+
+        pipeline = VoiceTurnPipeline(
+            llm_stream=lambda text: iter(["Hello. ", "How are ", "you?"]),
+            synthesize=lambda sentence: sentence.encode(),
+        )
+        turn = pipeline.start(text="Hi")
+
+    Args:
+        llm_stream: Callable taking the user text and returning an iterable of
+            text deltas (e.g. wrapping app.stream_azure_api)
+        transcribe: Callable(audio_bytes, language) -> text (default: transcribe_audio)
+        synthesize: Callable(sentence) -> audio bytes (default: text_to_speech)
+        language: Language code passed to the default STT and TTS functions
+        min_chars: Minimum sentence length before a chunk is sent to TTS
+        max_chars: Maximum chunk length before forcing a clause split
+    """
+
+    def __init__(
+        self,
+        llm_stream: Callable[[str], Iterable[str]],
+        transcribe: Optional[Callable[[bytes, str], str]] = None,
+        synthesize: Optional[Callable[[str], bytes]] = None,
+        language: str = "de",
+        min_chars: int = 12,
+        max_chars: int = 250,
+    ):
+        self.llm_stream = llm_stream
+        self.transcribe = transcribe or (lambda audio, lang: transcribe_audio(audio, language=lang))
+        self.synthesize = synthesize or (lambda sentence: text_to_speech(sentence, language=language))
+        self.language = language
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+
+    def start(self, audio_bytes: Optional[bytes] = None, text: Optional[str] = None) -> VoiceTurn:
+        """
+        Start a voice turn in background threads and return immediately.
+
+        Args:
+            audio_bytes: Caller audio to transcribe (ignored if text is given)
+            text: User text, to skip the STT stage
+
+        Returns:
+            VoiceTurn handle for consuming audio and latencies
+        """
+        if text is None and not audio_bytes:
+            raise ValueError("Either audio_bytes or text is required")
+
+        turn = VoiceTurn()
+        sentence_queue = queue.Queue()
+        tts_thread = threading.Thread(
+            target=self._tts_worker, args=(turn, sentence_queue), daemon=True)
+        llm_thread = threading.Thread(
+            target=self._llm_worker, args=(turn, sentence_queue, audio_bytes, text, tts_thread),
+            daemon=True)
+        tts_thread.start()
+        llm_thread.start()
+        return turn
+
+    def run(self, audio_bytes: Optional[bytes] = None, text: Optional[str] = None) -> VoiceTurn:
+        """Run a voice turn to completion (audio stays queued on the returned turn)."""
+        turn = self.start(audio_bytes=audio_bytes, text=text)
+        turn.wait()
+        return turn
+
+    def _llm_worker(self, turn: VoiceTurn, sentence_queue: queue.Queue,
+                    audio_bytes: Optional[bytes], text: Optional[str], tts_thread: threading.Thread):
+        parts = []
+        try:
+            if text is None:
+                text = self.transcribe(audio_bytes, self.language)
+                turn._mark("stt")
+            turn.transcript = text
+
+            splitter = SentenceSplitter(min_chars=self.min_chars, max_chars=self.max_chars)
+            for delta in self.llm_stream(text):
+                if not delta:
+                    continue
+                turn._mark("llm_first_token")
+                parts.append(delta)
+                for sentence in splitter.feed(delta):
+                    self._queue_sentence(turn, sentence_queue, sentence)
+            for sentence in splitter.flush():
+                self._queue_sentence(turn, sentence_queue, sentence)
+            turn._mark("llm_done")
+        except Exception as e:
+            turn.error = e
+        finally:
+            turn.reply = "".join(parts)
+            sentence_queue.put(_END)
+            tts_thread.join()
+            turn._mark("total")
+            turn._done.set()
+            turn._audio_queue.put(_END)
+
+    def _queue_sentence(self, turn: VoiceTurn, sentence_queue: queue.Queue, sentence: str):
+        turn._mark("llm_first_sentence")
+        turn.sentences.append(sentence)
+        sentence_queue.put((len(turn.sentences) - 1, sentence))
+
+    def _tts_worker(self, turn: VoiceTurn, sentence_queue: queue.Queue):
+        # Single worker: chunks are produced, and therefore queued, in sentence order
+        while True:
+            item = sentence_queue.get()
+            if item is _END:
+                break
+            if turn.error is not None:
+                continue
+            index, sentence = item
+            try:
+                started = time.perf_counter()
+                audio = self.synthesize(sentence)
+                turn.tts_synthesis.append(time.perf_counter() - started)
+            except Exception as e:
+                turn.error = e
+                continue
+            turn._mark("tts_first_audio")
+            turn._audio_queue.put((index, sentence, audio))
+        if turn.error is None:
+            turn._mark("tts_done")
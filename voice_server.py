@@ -0,0 +1,417 @@
+# ============================================
+# HEADLESS ASYNCIO VOICE/CHAT SERVER (WEBSOCKET)
+# ============================================
+"""
+WebSocket server for telephony gateways and other headless clients.
+
+Runs the same conversation as the Streamlit app (build_budgeted_messages,
+the async streaming LLM call, audio_utils STT/TTS) without Streamlit reruns.
+Every connection is one call; calls run concurrently on one event loop,
+and blocking STT/TTS work goes through the shared inference scheduler.
+
+Protocol (JSON text frames unless noted):
+
+    client -> server
+        {"type": "start", "qa_scores": {...}, "language": "de",
+         "encoding": "pcm16", "sample_rate": 16000, "output_sample_rate": 16000,
+         "tts": true, "first_message": ""}    must be the first frame
+        <binary>                              caller audio: 16-bit LE mono PCM at sample_rate,
+                                              or 8 kHz G.711 with "encoding": "ulaw" | "alaw"
+        {"type": "text", "text": "..."}       typed user turn (skips STT)
+        {"type": "end"}                       flush pending speech and hang up
+
+    server -> client
+        {"type": "ready", "call_id": "..."}
+        {"type": "transcript", "final": bool, "text": "..."}
+        {"type": "reply_delta", "text": "..."}
+        {"type": "audio", "index": n, "text": "...", "sample_rate": sr, "bytes": n}
+        <binary>                              reply audio for the preceding "audio" frame, in the
+                                              call's encoding (G.711: whole 20 ms frames at 8 kHz)
+        {"type": "reply_done", "text": "...", "interrupted": bool, "error": bool, "stats": {...}}
+        {"type": "error", "code": "busy" | "bad_request" | "upstream" | "internal", "message": "..."}
+
+A new final transcript while the assistant is still replying interrupts
+that reply (barge-in); the part already generated is kept in the history.
+Every turn ends with exactly one reply_done; "error" is set when the reply
+failed (an "error" frame with the reason precedes it).
+
+    python voice_server.py --host 0.0.0.0 --port 8765 --metrics-port 9108
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from app import DEFAULT_QA_SCORES_JSON, build_budgeted_messages, stream_azure_api_async
+from metrics import start_metrics_server
+from resilient_call import LLMCallError
+from audio_utils import (
+    STT_AVAILABLE, TTS_AVAILABLE, SentenceSplitter, pcm_buffer, resample_audio,
+    text_to_speech_stream, to_pcm16
+)
+from g711 import G711_LAWS, TELEPHONY_SAMPLE_RATE, G711Decoder, G711Encoder
+from inference_scheduler import DeadlineExceeded, SchedulerFull
+from stt_streaming import StreamingRecognizer
+
+logger = logging.getLogger(__name__)
+
+# Server configuration (override via environment or command line)
+VOICE_SERVER_HOST = os.getenv("VOICE_SERVER_HOST", "127.0.0.1")
+VOICE_SERVER_PORT = int(os.getenv("VOICE_SERVER_PORT", "8765"))
+VOICE_SERVER_MAX_CALLS = int(os.getenv("VOICE_SERVER_MAX_CALLS", "200"))
+# Threads for blocking STT/TTS calls (they mostly wait on the inference scheduler)
+VOICE_SERVER_BLOCKING_THREADS = int(os.getenv("VOICE_SERVER_BLOCKING_THREADS", "64"))
+# Seconds a sentence may take to synthesize before it is skipped
+VOICE_SERVER_TTS_DEADLINE_S = float(os.getenv("VOICE_SERVER_TTS_DEADLINE_S", "10"))
+# Port for the Prometheus/JSON metrics endpoint (0 = off)
+VOICE_SERVER_METRICS_PORT = int(os.getenv("VOICE_SERVER_METRICS_PORT", "0"))
+# Sample rates accepted for caller and reply audio (pcm16)
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 48000
+
+
+def parse_sample_rate(value) -> Optional[int]:
+    """Sample rate from a start message as int, or None if it is not a whole number in range."""
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    elif isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool):
+        return None
+    return value if MIN_SAMPLE_RATE <= value <= MAX_SAMPLE_RATE else None
+
+
+class CallSession:
+    """
+    State of one connected call: chat history (kept within the prompt token
+    budget by a running summary), streaming recognizer and the reply
+    currently being generated.
+
+    Args:
+        websocket: Server connection of the call
+        qa_scores: QA scores used for the system prompt
+        language: Language for STT and TTS
+        sample_rate: Rate of incoming caller audio (pcm16 only)
+        output_sample_rate: Rate of outgoing reply audio (pcm16 only; None = TTS native rate)
+        tts: Send synthesized reply audio (False for text-only clients)
+        encoding: "pcm16", or "ulaw" / "alaw" for 8 kHz G.711 in both directions
+    """
+
+    def __init__(self, websocket, qa_scores: dict, language: str = "de", sample_rate: int = 16000,
+                 output_sample_rate: Optional[int] = None, tts: bool = True, encoding: str = "pcm16"):
+        self.websocket = websocket
+        self.call_id = uuid.uuid4().hex[:12]
+        self.qa_scores = qa_scores
+        self.language = language
+        self.encoding = encoding
+        self.tts = tts and TTS_AVAILABLE
+        self.messages = []
+        self.summary_state = {"text": "", "count": 0}
+        # Summarization runs in a worker thread and may outlive an interrupted turn
+        self._summary_lock = threading.Lock()
+        self._decoder = None
+        if encoding in G711_LAWS:
+            # Caller audio is decoded and upsampled to 16 kHz frame by frame
+            self._decoder = G711Decoder(encoding, sample_rate=16000)
+            sample_rate = 16000
+            output_sample_rate = TELEPHONY_SAMPLE_RATE
+        self.output_sample_rate = output_sample_rate
+        self.recognizer = (
+            StreamingRecognizer(language=language, sample_rate=sample_rate) if STT_AVAILABLE else None)
+        self._turn = None
+
+    async def send_json(self, **payload):
+        await self.websocket.send(json.dumps(payload, ensure_ascii=False))
+
+    async def send_error(self, code: str, message: str):
+        await self.send_json(type="error", code=code, message=message)
+
+    async def on_audio(self, data: bytes):
+        """Feed caller audio to the recognizer; a final transcript starts a turn."""
+        if self.recognizer is None:
+            await self.send_error("bad_request", "STT is not available on this server")
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            if self._decoder is not None:
+                events = await loop.run_in_executor(
+                    None, self.recognizer.accept_audio, self._decoder.decode(data))
+            else:
+                events = await loop.run_in_executor(None, self.recognizer.accept_pcm16, data)
+        except SchedulerFull:
+            await self.send_error("busy", "Speech recognition is overloaded")
+            return
+        await self._handle_transcripts(events)
+
+    async def finish_audio(self):
+        """Finalize speech still buffered when the caller hangs up."""
+        if self.recognizer is None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            events = await loop.run_in_executor(None, self.recognizer.finish)
+        except SchedulerFull:
+            return
+        await self._handle_transcripts(events)
+
+    async def _handle_transcripts(self, events: list):
+        for event in events:
+            final = event["type"] == "final"
+            await self.send_json(type="transcript", final=final, text=event["text"])
+            if final and event["text"]:
+                self.start_turn(event["text"])
+
+    def start_turn(self, text: Optional[str]):
+        """Start the reply to text (None: assistant opens the call), interrupting the current one."""
+        self._turn = asyncio.create_task(self._run_turn(text, self._turn))
+
+    async def wait_idle(self):
+        """Wait for the reply in progress, if any."""
+        if self._turn is not None:
+            await asyncio.gather(self._turn, return_exceptions=True)
+
+    def cancel(self):
+        if self._turn is not None:
+            self._turn.cancel()
+
+    async def _run_turn(self, text: Optional[str], previous: Optional[asyncio.Task]):
+        # Record the user message first: it is kept even if this turn is interrupted while waiting
+        if text:
+            self.messages.append({"role": "user", "content": text})
+        stats = {}
+        parts = []
+        position = None
+        sentences = asyncio.Queue()
+        speaker = None
+        splitter = SentenceSplitter()
+        interrupted = failed = False
+        try:
+            if previous is not None:
+                # Cancelled from here rather than in start_turn, so it has always started
+                # and sends its own reply_done; wait for it to record its partial text
+                previous.cancel()
+                await asyncio.gather(previous, return_exceptions=True)
+            # The reply goes right after the messages it answers, even if newer
+            # user messages arrive while it is being generated
+            history = list(self.messages)
+            position = len(history)
+            api_messages = await asyncio.get_running_loop().run_in_executor(
+                None, self._build_messages, history)
+            speaker = asyncio.create_task(self._speak(sentences)) if self.tts else None
+            async for delta in stream_azure_api_async(api_messages, stats):
+                parts.append(delta)
+                await self.send_json(type="reply_delta", text=delta)
+                for sentence in splitter.feed(delta):
+                    sentences.put_nowait(sentence)
+            for sentence in splitter.flush():
+                sentences.put_nowait(sentence)
+            sentences.put_nowait(None)
+            if speaker is not None:
+                await speaker
+        except (asyncio.CancelledError, ConnectionClosed):
+            interrupted = True
+        except LLMCallError as e:
+            failed = True
+            # Speak what was generated before the failure, then report it
+            for sentence in splitter.flush():
+                sentences.put_nowait(sentence)
+            sentences.put_nowait(None)
+            if speaker is not None:
+                await speaker
+            await self.send_error("upstream", f"The assistant could not reply: {str(e)}")
+        except Exception as e:
+            failed = True
+            logger.exception("Turn failed for call %s", self.call_id)
+            await self.send_error("internal", f"The assistant could not reply: {str(e)}")
+        finally:
+            if speaker is not None and not speaker.done():
+                speaker.cancel()
+            reply = "".join(parts)
+            if reply:
+                self.messages.insert(position, {"role": "assistant", "content": reply})
+            try:
+                await self.send_json(type="reply_done", text=reply, interrupted=interrupted, error=failed,
+                                     stats=stats)
+            except ConnectionClosed:
+                pass
+
+    def _build_messages(self, history: list) -> list:
+        """Prompt for history within the token budget (may call the LLM to summarize)."""
+        with self._summary_lock:
+            return build_budgeted_messages(self.qa_scores, history, self.summary_state)
+
+    async def _speak(self, sentences: asyncio.Queue):
+        """Synthesize queued sentences in order and send them as PCM frames."""
+        loop = asyncio.get_running_loop()
+        index = 0
+        while True:
+            sentence = await sentences.get()
+            if sentence is None:
+                return
+            try:
+                chunks = await loop.run_in_executor(None, self._synthesize, sentence)
+            except (SchedulerFull, DeadlineExceeded) as e:
+                await self.send_error("busy", f"Speech synthesis skipped: {str(e)}")
+                continue
+            except Exception as e:
+                logger.warning("TTS failed for call %s: %s", self.call_id, e)
+                await self.send_error("internal", f"Speech synthesis failed: {str(e)}")
+                continue
+            for data, sample_rate in chunks:
+                await self.send_json(type="audio", index=index, text=sentence,
+                                     sample_rate=sample_rate, bytes=len(data))
+                await self.websocket.send(data)
+            index += 1
+
+    def _synthesize(self, sentence: str) -> list:
+        """Synthesize one sentence into (payload, sample_rate) chunks in the call's encoding."""
+        chunks = []
+        encoder = None
+        for audio, sample_rate in text_to_speech_stream(
+                sentence, language=self.language, deadline_s=VOICE_SERVER_TTS_DEADLINE_S):
+            if self.encoding in G711_LAWS:
+                encoder = encoder or G711Encoder(self.encoding, sample_rate=sample_rate)
+                chunks.append((b"".join(encoder.encode(audio)), TELEPHONY_SAMPLE_RATE))
+                continue
+            if self.output_sample_rate and self.output_sample_rate != sample_rate:
+                audio = resample_audio(audio, sample_rate, self.output_sample_rate)
+                sample_rate = self.output_sample_rate
+            chunks.append((pcm_buffer(to_pcm16(audio)), sample_rate))
+        if encoder is not None:
+            # Pad the sentence to whole frames so every payload is self-contained
+            chunks.append((b"".join(encoder.flush()), TELEPHONY_SAMPLE_RATE))
+        return [chunk for chunk in chunks if len(chunk[0])]
+
+
+class VoiceServer:
+    """
+    Accept WebSocket calls and run one CallSession per connection.
+
+    Args:
+        max_calls: Concurrent calls accepted; further connections are closed
+            with code 1013 (try again later)
+    """
+
+    def __init__(self, max_calls: int = VOICE_SERVER_MAX_CALLS):
+        self.max_calls = max_calls
+        self.active_calls = 0
+
+    async def handle(self, websocket):
+        if self.active_calls >= self.max_calls:
+            await websocket.close(1013, "Server is at capacity")
+            return
+        self.active_calls += 1
+        session = None
+        try:
+            session = await self._open_session(websocket)
+            if session is None:
+                return
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    await session.on_audio(message)
+                    continue
+                try:
+                    payload = json.loads(message)
+                except json.JSONDecodeError:
+                    await session.send_error("bad_request", "Invalid JSON")
+                    continue
+                kind = payload.get("type")
+                if kind == "text" and str(payload.get("text", "")).strip():
+                    session.start_turn(payload["text"].strip())
+                elif kind == "end":
+                    await session.finish_audio()
+                    await session.wait_idle()
+                    break
+                else:
+                    await session.send_error("bad_request", f"Unexpected message type: {kind}")
+        except ConnectionClosed:
+            pass
+        finally:
+            if session is not None:
+                session.cancel()
+            self.active_calls -= 1
+
+    async def _open_session(self, websocket) -> Optional[CallSession]:
+        try:
+            payload = json.loads(await websocket.recv())
+        except (json.JSONDecodeError, TypeError):
+            payload = {}
+        if not isinstance(payload, dict) or payload.get("type") != "start":
+            return await self._reject(websocket, "First message must be 'start'", "Expected start message")
+
+        encoding = payload.get("encoding", "pcm16")
+        if encoding != "pcm16" and encoding not in G711_LAWS:
+            return await self._reject(websocket, f"Unsupported encoding: {encoding}", "Unsupported encoding")
+
+        sample_rate = parse_sample_rate(payload.get("sample_rate", 16000))
+        requested_output_rate = payload.get("output_sample_rate")
+        output_sample_rate = None if requested_output_rate is None else parse_sample_rate(requested_output_rate)
+        if sample_rate is None or (requested_output_rate is not None and output_sample_rate is None):
+            return await self._reject(
+                websocket, f"Sample rates must be whole numbers from {MIN_SAMPLE_RATE} to {MAX_SAMPLE_RATE}",
+                "Unsupported sample rate")
+
+        session = CallSession(
+            websocket,
+            qa_scores=payload.get("qa_scores") or DEFAULT_QA_SCORES_JSON,
+            language=payload.get("language", "de"),
+            sample_rate=sample_rate,
+            output_sample_rate=output_sample_rate,
+            tts=bool(payload.get("tts", True)),
+            encoding=encoding,
+        )
+        await session.send_json(type="ready", call_id=session.call_id,
+                                stt=session.recognizer is not None, tts=session.tts)
+        first_message = str(payload.get("first_message", "")).strip()
+        session.start_turn(first_message or None)
+        return session
+
+    @staticmethod
+    async def _reject(websocket, message: str, reason: str) -> None:
+        """Answer an invalid start message with a bad_request error and close the call."""
+        await websocket.send(json.dumps({"type": "error", "code": "bad_request", "message": message}))
+        await websocket.close(1008, reason)
+        return None
+
+
+async def serve_forever(host: str = VOICE_SERVER_HOST, port: int = VOICE_SERVER_PORT,
+                        max_calls: int = VOICE_SERVER_MAX_CALLS):
+    """Run the voice server until cancelled."""
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(
+        max_workers=VOICE_SERVER_BLOCKING_THREADS, thread_name_prefix="voice-blocking"))
+    server = VoiceServer(max_calls=max_calls)
+    async with serve(server.handle, host, port, max_size=2 ** 20) as ws_server:
+        logger.info("Voice server listening on ws://%s:%d", host, port)
+        await ws_server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless voice/chat WebSocket server")
+    parser.add_argument("--host", default=VOICE_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=VOICE_SERVER_PORT)
+    parser.add_argument("--max-calls", type=int, default=VOICE_SERVER_MAX_CALLS)
+    parser.add_argument("--metrics-port", type=int, default=VOICE_SERVER_METRICS_PORT,
+                        help="serve /metrics and /metrics.json on this port (0 = off)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.metrics_port:
+        start_metrics_server(args.host, args.metrics_port)
+        logger.info("Metrics on http://%s:%d/metrics", args.host, args.metrics_port)
+    try:
+        asyncio.run(serve_forever(args.host, args.port, args.max_calls))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()